@@ -0,0 +1,197 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from blogging.configuration import Configuration
+from blogging.controller import Controller
+from blogging.exception.illegal_access_exception import IllegalAccessException
+from blogging.exception.no_current_blog_exception import NoCurrentBlogException
+
+# executor and coalescer shared by async controllers that are not given one
+default_executor = None
+default_coalescer = None
+default_lock = threading.Lock()
+
+def get_default_executor():
+    ''' the shared executor, created on first use '''
+    global default_executor
+    with default_lock:
+        if default_executor is None:
+            default_executor = ThreadPoolExecutor(getattr(Configuration, 'async_workers', None),
+                thread_name_prefix='blogging')
+        return default_executor
+
+def get_default_coalescer():
+    ''' the shared coalescer, writing through the shared executor '''
+    global default_coalescer
+    executor = get_default_executor()
+    with default_lock:
+        if default_coalescer is None:
+            default_coalescer = PostWriteCoalescer(executor)
+        return default_coalescer
+
+class PostWriteCoalescer():
+    ''' groups the create_post calls made on a blog while a write to it is in flight into one batch write '''
+
+    def __init__(self, executor):
+        ''' construct a coalescer persisting through executor '''
+        self.executor = executor
+        # blog key -> [(post_title, post_text, future)] waiting for the next write
+        self.pending = {}
+        self.flushing = set()
+        # flush tasks running, the loop itself only keeps weak references to them
+        self.tasks = set()
+        self.writes = 0
+
+    def key(self, blog):
+        ''' blogs with saved posts share them by id, otherwise each Blog object has its own '''
+        return blog.id if Configuration.autosave else id(blog)
+
+    async def create_post(self, blog, post_title, post_text):
+        ''' queue a post for blog and wait until the batch holding it is written, returns the new post '''
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        key = self.key(blog)
+        self.pending.setdefault(key, []).append((post_title, post_text, future))
+        if key not in self.flushing:
+            self.flushing.add(key)
+            task = loop.create_task(self.flush(key, blog))
+            self.tasks.add(task)
+            task.add_done_callback(self.flushed)
+        return await future
+
+    def flushed(self, task):
+        ''' forget a finished flush task, reporting an exception it failed with to its loop '''
+        self.tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            task.get_loop().call_exception_handler({'message': 'post write flush failed',
+                'exception': task.exception(), 'task': task})
+
+    async def flush(self, key, blog):
+        ''' write the queued posts of blog, batching whatever arrives while a write is running '''
+        loop = asyncio.get_running_loop()
+        try:
+            while self.pending.get(key):
+                batch = self.pending.pop(key)
+                self.writes += 1
+                try:
+                    posts = await loop.run_in_executor(self.executor, blog.create_post_batch,
+                        [(post_title, post_text) for post_title, post_text, _ in batch])
+                except Exception as exception:
+                    for _, _, future in batch:
+                        if not future.done():
+                            future.set_exception(exception)
+                    continue
+                for index, (_, _, future) in enumerate(batch):
+                    if not future.done():
+                        future.set_result(posts[index] if posts is not None else None)
+        finally:
+            self.flushing.discard(key)
+
+class AsyncController():
+    ''' controller exposing the system's operations as coroutines, with blocking work run in an executor '''
+
+    def __init__(self, controller=None, executor=None, coalescer=None):
+        ''' construct an async front-end over controller, by default sharing the executor and coalescer with other sessions '''
+        self.controller = controller or Controller()
+        if executor is None:
+            self.executor = get_default_executor()
+            self.coalescer = coalescer or get_default_coalescer()
+        else:
+            self.executor = executor
+            self.coalescer = coalescer or PostWriteCoalescer(executor)
+
+    async def run(self, method, *args):
+        ''' run a blocking controller method in the executor '''
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(method, *args))
+
+    async def login(self, username, password):
+        ''' user logs in the system '''
+        return await self.run(self.controller.login, username, password)
+
+    async def logout(self):
+        ''' user logs out from the system, flushing what it wrote in the executor '''
+        return await self.run(self.controller.logout)
+
+    async def search_blog(self, blog_id):
+        ''' user searches a blog by its id '''
+        return await self.run(self.controller.search_blog, blog_id)
+
+    async def create_blog(self, blog_id, blog_name, blog_url, blog_email):
+        ''' user creates a blog '''
+        return await self.run(self.controller.create_blog, blog_id, blog_name, blog_url, blog_email)
+
+    async def retrieve_blogs(self, search_term):
+        ''' user retrieves the blogs that satisfy a search_term '''
+        return await self.run(self.controller.retrieve_blogs, search_term)
+
+    async def update_blog(self, original_blog_id, blog_id, blog_name, blog_url, blog_email):
+        ''' user updates a blog '''
+        return await self.run(self.controller.update_blog, original_blog_id, blog_id, blog_name, blog_url, blog_email)
+
+    async def delete_blog(self, blog_id):
+        ''' user deletes a blog '''
+        return await self.run(self.controller.delete_blog, blog_id)
+
+    async def list_blogs(self):
+        ''' user lists all blogs '''
+        return await self.run(self.controller.list_blogs)
+
+    async def set_current_blog(self, blog_id):
+        ''' user sets the current blog '''
+        return await self.run(self.controller.set_current_blog, blog_id)
+
+    async def get_current_blog(self):
+        ''' get the current blog '''
+        return self.controller.get_current_blog()
+
+    async def unset_current_blog(self):
+        ''' unset the current blog '''
+        return self.controller.unset_current_blog()
+
+    async def search_post(self, post_code):
+        ''' user searches a post from the current blog '''
+        return await self.run(self.controller.search_post, post_code)
+
+    async def create_post(self, post_title, post_text):
+        ''' user creates a post in the current blog, written together with other posts created meanwhile '''
+        if not self.controller.logged:
+            raise IllegalAccessException("User must be logged in to create posts")
+
+        if not self.controller.current_blog:
+            raise NoCurrentBlogException("No current blog selected")
+
+        return await self.coalescer.create_post(self.controller.current_blog, post_title, post_text)
+
+    async def create_posts(self, posts):
+        ''' user creates posts in the current blog from an iterable of (post_title, post_text) '''
+        return await self.run(self.controller.create_posts, posts)
+
+    async def retrieve_posts(self, search_term, parallel=False):
+        ''' user retrieves the posts from the current blog that satisfy a search_term '''
+        return await self.run(self.controller.retrieve_posts, search_term, parallel)
+
+    async def search_posts(self, query, mode='all', case_sensitive=False, limit=None):
+        ''' user searches the posts of the current blog by words, best ranked first '''
+        return await self.run(self.controller.search_posts, query, mode, case_sensitive, limit)
+
+    async def search_all_posts(self, search_term, limit=None, parallel=False):
+        ''' user searches the posts of every blog for search_term, as a list of (blog id, post) '''
+        return await self.run(lambda: list(self.controller.search_all_posts(search_term, limit, parallel)))
+
+    async def update_post(self, post_code, new_post_title, new_post_text):
+        ''' user updates a post from the current blog '''
+        return await self.run(self.controller.update_post, post_code, new_post_title, new_post_text)
+
+    async def delete_post(self, post_code):
+        ''' user deletes a post from the current blog '''
+        return await self.run(self.controller.delete_post, post_code)
+
+    async def list_posts(self):
+        ''' user lists all posts from the current blog '''
+        return await self.run(self.controller.list_posts)
+
+    async def iter_posts(self, after=None, limit=None):
+        ''' user reads one page of the posts of the current blog, newest first, as a list '''
+        return await self.run(lambda: list(self.controller.iter_posts(after, limit)))
\ No newline at end of file
@@ -1,19 +1,89 @@
 import datetime
+import itertools
 from blogging.post import Post
-from blogging.dao.post_dao_pickle import PostDAOPickle
+from blogging.configuration import Configuration
+from blogging.dao.post_store_cache import post_bytes, post_stores
+from blogging.rwlock import blog_locks
+
+def global_post_index():
+    ''' the index of the posts of every blog, imported by the first write or search using it rather than with the blog '''
+    from blogging.index.global_post_index import global_posts
+    return global_posts
 
 class Blog():
     ''' class that represents a blog '''
 
+    # fields saved in the blog catalog, whose edits are tracked once a store tracks the blog
+    FIELDS = ('id', 'name', 'url', 'email')
+
     def __init__(self, blog_id, blog_name, blog_url, blog_email):
         ''' construct a blog '''
+        # field -> value it had when last saved, None while no store tracks the blog
+        self.changed = None
+        self.store = None
         self.id = blog_id
         self.name = blog_name
         self.url = blog_url
         self.email = blog_email
         
-        # Initialize DAO for posts
-        self.post_dao = PostDAOPickle(self)
+        # DAO for posts private to this object, used while posts are not saved
+        self._post_dao = None
+
+    @property
+    def post_dao(self):
+        ''' the DAO for the blog's posts, loaded on first access '''
+        if self._post_dao is not None:
+            return self._post_dao
+        if Configuration.autosave:
+            # saved posts are shared by every Blog with this id through the process-wide cache
+            return post_stores.get(self)
+        return post_stores.private_store(self)
+
+    def __setattr__(self, name, value):
+        ''' set an attribute, remembering the saved value of a tracked field the first time it is edited '''
+        changed = self.__dict__.get('changed')
+        if changed is not None and name in Blog.FIELDS and name not in changed:
+            saved = self.__dict__[name]
+            if saved != value:
+                changed[name] = saved
+                if len(changed) == 1:
+                    # the store saves dirty blogs on its next flush
+                    self.store.mark_dirty(self)
+        super().__setattr__(name, value)
+
+    def track(self, store):
+        ''' start recording edits, store is told when the blog becomes dirty '''
+        self.store = store
+        self.changed = {}
+
+    def saved(self):
+        ''' forget the recorded edits once they are saved '''
+        if self.changed is not None:
+            self.changed = {}
+
+    def saved_id(self):
+        ''' id the blog is saved under, which differs from id after the id was edited '''
+        return self.changed.get('id', self.id) if self.changed else self.id
+
+    def __getstate__(self):
+        ''' pickle the fields only, a copy in another process has no post store or tracking store '''
+        state = dict(self.__dict__)
+        state['_post_dao'] = None
+        state['store'] = None
+        state['changed'] = None
+        return state
+
+    def release_post_store(self):
+        ''' drop the blog's post store from memory, it is reloaded on next access; returns False, keeping it,
+        if it is a private store holding posts it does not save '''
+        post_dao = self._post_dao
+        if post_dao is None:
+            return post_stores.invalidate(self.id)
+        if not getattr(post_dao, 'autosave', False) and post_dao.list_posts():
+            # the posts live only in this store
+            return False
+        self._post_dao = None
+        return True
 
     def __eq__(self, other):
         ''' checks whether this blog is the same as other blog '''
@@ -29,36 +99,111 @@ class Blog():
 
     def search_post(self, post_code):
         ''' search a post in the blog '''
-        return self.post_dao.search_post(post_code)
+        with blog_locks.get(self.id).read():
+            return self.post_dao.search_post(post_code)
 
     def create_post(self, post_title, post_text):
         ''' create a post in the blog '''
-        # Get current counter from DAO and increment
-        new_post_code = self.post_dao.counter + 1
-        new_post = Post(new_post_code, post_title, post_text)
-        success = self.post_dao.create_post(new_post)
+        # Reading the counter and creating the post is atomic, so concurrent creates get distinct codes
+        with blog_locks.get(self.id).write():
+            new_post_code = self.post_dao.counter + 1
+            new_post = Post(new_post_code, post_title, post_text)
+            success = self.post_dao.create_post(new_post)
+            if success:
+                global_post_index().add(self.id, [new_post])
         if success:
+            post_stores.charge(self, post_bytes(new_post))
             return new_post
         return None
 
-    def retrieve_posts(self, search_term):
-        ''' retrieve posts in the blog that satisfy a search_term '''
-        return self.post_dao.retrieve_posts(search_term)
+    def create_posts(self, posts, batch_size=None):
+        ''' create posts in the blog from an iterable of (post_title, post_text), returns how many were created '''
+        batch_size = batch_size or getattr(Configuration, 'post_batch_size', 10000)
+        created = 0
+        batch = []
+        # posts are persisted once per batch, so a generator is streamed rather than materialised
+        for post in posts:
+            batch.append(post)
+            if len(batch) == batch_size:
+                if self.create_post_batch(batch) is None:
+                    return created
+                created += len(batch)
+                batch = []
+        if batch and self.create_post_batch(batch) is not None:
+            created += len(batch)
+        return created
+
+    def create_post_batch(self, batch):
+        ''' create one batch of (post_title, post_text) with a single write, returns the new posts or None '''
+        with blog_locks.get(self.id).write():
+            post_dao = self.post_dao
+            post_code = post_dao.counter
+            new_posts = [Post(post_code + offset, post_title, post_text)
+                for offset, (post_title, post_text) in enumerate(batch, 1)]
+            if not post_dao.create_posts(new_posts):
+                return None
+            global_post_index().add(self.id, new_posts)
+        post_stores.charge(self, sum(post_bytes(post) for post in new_posts))
+        return new_posts
+
+    def retrieve_posts(self, search_term, parallel=False):
+        ''' retrieve posts in the blog that satisfy a search_term, scanning them across worker processes if parallel '''
+        if parallel:
+            # the process pool is only set up by the first parallel scan
+            from blogging.index.parallel_scan import parallel_scanner
+            return parallel_scanner.scan_blog(self, search_term)
+        with blog_locks.get(self.id).read():
+            return self.post_dao.retrieve_posts(search_term)
+
+    def search_posts(self, query, mode='all', case_sensitive=False, limit=None):
+        ''' search posts in the blog by words under one of the search modes, best ranked first, at most limit of them '''
+        lock = blog_locks.get(self.id)
+        with lock.read():
+            post_dao = self.post_dao
+            search_posts = getattr(post_dao, 'search_posts', None)
+            if search_posts is not None:
+                return search_posts(query, mode, case_sensitive, limit)
+            # stores without a word index keep the one the first search builds, until the blog is written again
+            search_index = post_stores.search_index(self, post_dao, lock)
+        return search_index.search(query, mode, case_sensitive, limit)
 
     def update_post(self, post_code, new_post_title, new_post_text):
         ''' update a post from the blog '''
-        # Check if post exists first
-        if not self.search_post(post_code):
+        with blog_locks.get(self.id).write():
+            previous = self.post_dao.update_if_exists(post_code, new_post_title, new_post_text)
+            global_posts = global_post_index()
+            if previous is not None and global_posts.covers(self.id):
+                global_posts.add(self.id, [self.post_dao.search_post(post_code)])
+        if previous is None:
             return False
-        return self.post_dao.update_post(post_code, new_post_title, new_post_text)
+        post_stores.charge(self, len(new_post_title) + len(new_post_text) - len(previous[0]) - len(previous[1]))
+        return True
 
     def delete_post(self, post_code):
         ''' delete a post from the blog '''
-        # Check if post exists first
-        if not self.search_post(post_code):
+        with blog_locks.get(self.id).write():
+            post = self.post_dao.delete_if_exists(post_code)
+            if post is not None:
+                global_post_index().remove(self.id, post_code)
+        if post is None:
             return False
-        return self.post_dao.delete_post(post_code)
+        post_stores.charge(self, -post_bytes(post))
+        return True
 
     def list_posts(self):
         ''' list all posts from the blog from the more recently added to the least recently added'''
-        return self.post_dao.delete_post()
\ No newline at end of file
+        with blog_locks.get(self.id).read():
+            return self.post_dao.list_posts()
+
+    def iter_posts(self, after=None, limit=None):
+        ''' iterate posts from the more recently added, starting below the post coded after, at most limit of them '''
+        with blog_locks.get(self.id).read():
+            post_dao = self.post_dao
+            iter_posts = getattr(post_dao, 'iter_posts', None)
+            if iter_posts is not None:
+                # pages are read without holding the lock, each from the posts as they were when it was asked for
+                return iter_posts(after, limit)
+            posts = post_dao.list_posts()
+        if after is not None:
+            posts = (post for post in posts if post.post_code < after)
+        return itertools.islice(posts, limit)
\ No newline at end of file
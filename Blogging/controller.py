@@ -1,9 +1,11 @@
-import hashlib
 import os
-from blogging.blog import Blog
+from blogging.blog import Blog, global_post_index
 from blogging.post import Post
 from blogging.configuration import Configuration
-from blogging.dao.blog_dao_json import BlogDAOJSON
+from blogging.engine import BlogEngine
+from blogging.dao.post_store_cache import post_stores
+from blogging.user_table import load_users
+from blogging.instrumentation import instrument, metrics
 from blogging.exception.invalid_login_exception import InvalidLoginException
 from blogging.exception.duplicate_login_exception import DuplicateLoginException
 from blogging.exception.invalid_logout_exception import InvalidLogoutException
@@ -11,42 +13,79 @@ from blogging.exception.illegal_access_exception import IllegalAccessException
 from blogging.exception.illegal_operation_exception import IllegalOperationException
 from blogging.exception.no_current_blog_exception import NoCurrentBlogException
 
+# verifier shared by controllers that are not given one, created on the first login
+default_verifier = None
+
+def get_default_verifier():
+    ''' the shared verifier, Configuration.password_verifier or SHA-256 as stored in the users file '''
+    global default_verifier
+    if default_verifier is None:
+        # imported here so that constructing a controller does not load hashlib
+        from blogging.password_verifier import SHA256Verifier
+        default_verifier = getattr(Configuration, 'password_verifier', None) or SHA256Verifier()
+    return default_verifier
+
+# operations timed when instrumentation is enabled
+INSTRUMENTED_OPERATIONS = ('login', 'logout', 'search_blog', 'create_blog', 'retrieve_blogs', 'update_blog',
+    'delete_blog', 'list_blogs', 'set_current_blog', 'get_current_blog', 'unset_current_blog', 'search_post',
+    'create_post', 'create_posts', 'retrieve_posts', 'search_posts', 'search_all_posts', 'update_post', 'delete_post',
+    'list_posts', 'iter_posts')
+
 class Controller():
     ''' controller class that receives the system's operations '''
 
-    def __init__(self, autosave=False):
-        ''' construct a controller class '''
+    def __init__(self, autosave=False, verifier=None, engine=None):
+        ''' construct a controller class, a user session over a shared engine (its own if not given) '''
+        self.engine = engine or BlogEngine()
         self.autosave = autosave or Configuration.autosave
-        self.users = {}
-        self.load_users()
+        # the verifier, users and blog DAO are loaded on first use, so short-lived controllers start fast
+        self._verifier = instrument(verifier, 'verifier') if verifier else None
+        self._users = None
         self.username = None
         self.password_hash = None
         self.logged = False
         
-        self.blog_dao = BlogDAOJSON()
+        self._blog_dao = None
         self.current_blog = None
+        if metrics.enabled:
+            # only instrumented controllers pay for timing, through per-instance wrappers
+            for operation in INSTRUMENTED_OPERATIONS:
+                setattr(self, operation, metrics.timed('controller.' + operation, getattr(self, operation)))
+
+
+
+    @property
+    def verifier(self):
+        ''' the password verifier, the shared one unless the controller was given one '''
+        if self._verifier is None:
+            self._verifier = instrument(get_default_verifier(), 'verifier')
+        return self._verifier
 
+    @property
+    def users(self):
+        ''' usernames and password hashes, read from the users file on first use '''
+        if self._users is None:
+            self.load_users()
+        return self._users
 
+    @users.setter
+    def users(self, users):
+        self._users = users
+
+    @property
+    def blog_dao(self):
+        ''' the blog DAO of the engine, opened on first use '''
+        if self._blog_dao is None:
+            self._blog_dao = self.engine.blog_dao
+        return self._blog_dao
+
+    @blog_dao.setter
+    def blog_dao(self, blog_dao):
+        self._blog_dao = blog_dao
 
     def load_users(self):
-        ''' Load users from users.txt file '''
-        try:
-            with open(Configuration.users_file, 'r') as file:
-                for line in file:
-                    line = line.strip()
-                    if line:  # Skip empty lines
-                        username, password_hash = line.split(',')
-                        self.users[username] = password_hash
-        except FileNotFoundError:
-            # If file doesn't exist, start with empty users
-            self.users = {}
-
-
-    def password_hash(self, password):
-        encoded_password = password.encode('utf-8')     
-        hash_object = hashlib.sha256(encoded_password)      
-        hex_dig = hash_object.hexdigest()       
-        return hex_dig
+        ''' Load users from users.txt file, shared with other controllers until the file changes '''
+        self.users = load_users(Configuration.users_file)
 
     def login(self, username, password):
         ''' user logs in the system '''
@@ -56,9 +95,9 @@ class Controller():
         if username not in self.users:
             raise InvalidLoginException("Invalid username")
         
-        # Hash the provided password and compare with stored hash
-        password_hash = hashlib.sha256(password.encode()).hexdigest()
-        if password_hash != self.users[username]:
+        # Compare the provided password with the stored hash
+        password_hash = self.users[username]
+        if not self.verifier.verify(password, password_hash):
             raise InvalidLoginException("Invalid password")
             
         self.username = username
@@ -71,18 +110,30 @@ class Controller():
         if not self.logged:
             raise InvalidLogoutException("No user is currently logged in")
             
+        # pending autosave batches are written when the user leaves
+        self.flush()
         self.username = None
         self.password_hash = None
         self.logged = False
         self.current_blog = None
         return True
 
+    def flush(self):
+        ''' write the changes still pending in the blog catalog and the post stores '''
+        post_stores.flush()
+        # a catalog this session never opened holds none of its changes
+        flush = getattr(self._blog_dao, 'flush', None)
+        if flush is not None:
+            with self.engine.catalog_lock.write():
+                flush()
+
     def search_blog(self, blog_id):
         ''' user searches a blog '''
         if not self.logged:
             raise IllegalAccessException("User must be logged in to search blogs")
             
-        return self.blog_dao.search_blog(blog_id)
+        with self.engine.catalog_lock.read():
+            return self.blog_dao.search_blog(blog_id)
 
     def create_blog(self, blog_id, blog_name, blog_url, blog_email):
         ''' user creates a blog '''
@@ -90,7 +141,8 @@ class Controller():
             raise IllegalAccessException("User must be logged in to create blogs")
         
         blog = Blog(blog_id, blog_name, blog_url, blog_email)
-        success = self.blog_dao.create_blog(blog)
+        with self.engine.catalog_lock.write():
+            success = self.blog_dao.create_blog(blog)
         if not success:
             raise IllegalOperationException("Blog ID already exists")
         return blog
@@ -100,34 +152,29 @@ class Controller():
         if not self.logged:
             raise IllegalAccessException("User must be logged in to retrieve blogs")
             
-        return self.blog_dao.retrieve_blogs(search_term)
+        with self.engine.catalog_lock.read():
+            return self.blog_dao.retrieve_blogs(search_term)
 
     def update_blog(self, original_blog_id, blog_id, blog_name, blog_url, blog_email):
         ''' user updates a blog '''
         if not self.logged:
             raise IllegalAccessException("User must be logged in to update blogs")
         
-        blog = self.blog_dao.search_blog(original_blog_id)
-        if not blog:
-            raise IllegalOperationException("Blog not found")
-            
-        if self.current_blog and blog == self.current_blog:
+        if self.current_blog and self.current_blog.id == original_blog_id:
             raise IllegalOperationException("Cannot update current blog")
         
-        # Update blog fields
-        blog.name = blog_name
-        blog.url = blog_url
-        blog.email = blog_email
-        
-        # Handle ID change
-        if original_blog_id != blog_id:
-            if self.blog_dao.search_blog(blog_id):
-                raise IllegalOperationException("New blog ID already exists")
-            self.blog_dao.delete_blog(original_blog_id)
-            blog.id = blog_id
-            self.blog_dao.create_blog(blog)
-        else:
-            self.blog_dao.update_blog(original_blog_id, blog)
+        # One DAO operation per update, the store looks the blog up once
+        blog = Blog(blog_id, blog_name, blog_url, blog_email)
+        with self.engine.catalog_lock.write():
+            if original_blog_id != blog_id:
+                if not self.blog_dao.rename_blog(original_blog_id, blog):
+                    if self.blog_dao.search_blog(original_blog_id):
+                        raise IllegalOperationException("New blog ID already exists")
+                    raise IllegalOperationException("Blog not found")
+                post_stores.invalidate(original_blog_id)
+                global_post_index().drop(original_blog_id)
+            elif not self.blog_dao.update_blog(original_blog_id, blog):
+                raise IllegalOperationException("Blog not found")
             
         return True
             
@@ -136,28 +183,31 @@ class Controller():
         if not self.logged:
             raise IllegalAccessException("User must be logged in to delete blogs")
             
-        blog = self.blog_dao.search_blog(blog_id)
-        if not blog:
-            raise IllegalOperationException("Blog not found")
-            
-        if self.current_blog and blog == self.current_blog:
+        if self.current_blog and self.current_blog.id == blog_id:
             raise IllegalOperationException("Cannot delete current blog")
             
-        return self.blog_dao.delete_blog(blog_id)
+        with self.engine.catalog_lock.write():
+            if not self.blog_dao.delete_blog(blog_id):
+                raise IllegalOperationException("Blog not found")
+            post_stores.invalidate(blog_id)
+            global_post_index().drop(blog_id)
+        return True
 
     def list_blogs(self):
         ''' user lists all blogs '''
         if not self.logged:
             raise IllegalAccessException("User must be logged in to list blogs")
             
-        return self.blog_dao.list_blogs()
+        with self.engine.catalog_lock.read():
+            return self.blog_dao.list_blogs()
 
     def set_current_blog(self, blog_id):
         ''' user sets the current blog '''
         if not self.logged:
             raise IllegalAccessException("User must be logged in to set current blog")
             
-        blog = self.blog_dao.search_blog(blog_id)
+        with self.engine.catalog_lock.read():
+            blog = self.blog_dao.search_blog(blog_id)
         if not blog:
             raise IllegalOperationException("Blog not found")
             
@@ -199,15 +249,57 @@ class Controller():
             
         return self.current_blog.create_post(post_title, post_text)
 
-    def retrieve_posts(self, search_term):
-        ''' user retrieves the posts from the current blog that satisfy a search_term '''
+    def create_posts(self, posts):
+        ''' user creates posts in the current blog from an iterable of (post_title, post_text) '''
+        if not self.logged:
+            raise IllegalAccessException("User must be logged in to create posts")
+            
+        if not self.current_blog:
+            raise NoCurrentBlogException("No current blog selected")
+            
+        return self.current_blog.create_posts(posts)
+
+    def retrieve_posts(self, search_term, parallel=False):
+        ''' user retrieves the posts from the current blog that satisfy a search_term, scanning them
+        across worker processes if parallel '''
         if not self.logged:
             raise IllegalAccessException("User must be logged in to retrieve posts")
             
         if not self.current_blog:
             raise NoCurrentBlogException("No current blog selected")
             
-        return self.current_blog.retrieve_posts(search_term)
+        return self.current_blog.retrieve_posts(search_term, parallel)
+
+    def search_posts(self, query, mode='all', case_sensitive=False, limit=None):
+        ''' user searches the posts of the current blog by words, best ranked first, at most limit of them '''
+        if not self.logged:
+            raise IllegalAccessException("User must be logged in to search posts")
+            
+        if not self.current_blog:
+            raise NoCurrentBlogException("No current blog selected")
+            
+        # the word index is only imported by the first word search
+        from blogging.index.word_index import SEARCH_MODES
+        if mode not in SEARCH_MODES:
+            raise IllegalOperationException("Unknown search mode")
+            
+        return self.current_blog.search_posts(query, mode, case_sensitive, limit)
+
+    def search_all_posts(self, search_term, limit=None, parallel=False):
+        ''' user searches the posts of every blog for search_term, returns an iterator of (blog id, post)
+        yielding results as they are found, at most limit of them; if parallel, every blog is scanned across
+        worker processes and results come blog by blog in catalog order, each in creation order '''
+        if not self.logged:
+            raise IllegalAccessException("User must be logged in to search posts")
+            
+        with self.engine.catalog_lock.read():
+            blogs = self.blog_dao.list_blogs()
+        if parallel:
+            from blogging.index.parallel_scan import parallel_scanner
+            found = parallel_scanner.scan_blogs(blogs, search_term)
+            return iter(found if limit is None else found[:max(limit, 0)])
+        from blogging.index.global_post_index import search_all_posts
+        return search_all_posts(blogs, search_term, limit)
 
     def update_post(self, post_code, new_post_title, new_post_text):
         ''' user updates a post from the current blog '''
@@ -237,4 +329,14 @@ class Controller():
         if not self.current_blog:
             raise NoCurrentBlogException("No current blog selected")
             
-        return self.current_blog.list_posts()
\ No newline at end of file
+        return self.current_blog.list_posts()
+
+    def iter_posts(self, after=None, limit=None):
+        ''' user pages through the posts of the current blog, newest first, after the post coded after '''
+        if not self.logged:
+            raise IllegalAccessException("User must be logged in to list posts")
+            
+        if not self.current_blog:
+            raise NoCurrentBlogException("No current blog selected")
+            
+        return self.current_blog.iter_posts(after, limit)
\ No newline at end of file
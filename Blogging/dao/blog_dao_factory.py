@@ -0,0 +1,25 @@
+from blogging.configuration import Configuration
+from blogging.instrumentation import instrument, metrics
+
+def create_blog_dao():
+    ''' create the blog DAO, selected by Configuration.blog_storage '''
+    if metrics.enabled:
+        return instrument(metrics.timed('blog_dao.load', open_blog_dao)(), 'blog_dao')
+    return open_blog_dao()
+
+def open_blog_dao():
+    ''' open the configured blog DAO '''
+    # backends are imported when first opened, so only the configured one is ever loaded
+    storage = getattr(Configuration, 'blog_storage', 'json')
+    if storage == 'sharded':
+        from blogging.dao.sharded_blog_dao import open_sharded_blog_dao
+        # each shard is stored and searched by its own worker process
+        return open_sharded_blog_dao()
+    if storage == 'sqlite':
+        from blogging.dao.blog_dao_sqlite import BlogDAOSQLite
+        # searches are served by the database's full-text index
+        return BlogDAOSQLite()
+    from blogging.dao.blog_dao_json import BlogDAOJSON
+    from blogging.dao.indexed_blog_dao import IndexedBlogDAO
+    # searches are served by an in-memory index
+    return IndexedBlogDAO(BlogDAOJSON())
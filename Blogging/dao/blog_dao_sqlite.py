@@ -0,0 +1,126 @@
+import sqlite3
+import threading
+from blogging.blog import Blog
+from blogging.dao.blog_order import BlogOrder
+from blogging.dao.sqlite_database import connect, fts_phrase, transaction, use_fts
+
+class BlogDAOSQLite():
+    ''' blog DAO backed by SQLite, with blog names searched through a trigram full-text index '''
+
+    def __init__(self, autosave=None, database_file=None):
+        ''' construct the DAO over the blogging database '''
+        self.connection = connect(autosave, database_file)
+        # id of blog object -> blog edited since the last flush
+        self.dirty = {}
+        self.dirty_lock = threading.Lock()
+
+    def make_blog(self, row):
+        ''' build a blog from a database row, tracking edits made to it '''
+        blog = Blog(*row)
+        blog.track(self)
+        return blog
+
+    def mark_dirty(self, blog):
+        ''' remember an edited blog until the next flush '''
+        with self.dirty_lock:
+            self.dirty[id(blog)] = blog
+
+    def flush(self):
+        ''' save the edited blogs and commit the pending writes '''
+        with self.dirty_lock:
+            dirty = list(self.dirty.values())
+            self.dirty = {}
+        for blog in dirty:
+            if blog.changed:
+                self.update_blog(blog.saved_id(), blog)
+        self.connection.flush()
+
+    def search_blog(self, key):
+        ''' search a blog by its id '''
+        row = self.connection.execute('SELECT id, name, url, email FROM blog WHERE id = ?', (key,)).fetchone()
+        return self.make_blog(row) if row else None
+
+    def create_blog(self, blog):
+        ''' create a blog, returns False if its id is taken '''
+        # the connection's lock keeps the catalog order in the order of the writes
+        with self.connection.lock:
+            cursor = self.connection.write('INSERT OR IGNORE INTO blog (id, name, url, email) VALUES (?, ?, ?, ?)',
+                (blog.id, blog.name, blog.url, blog.email))
+            if cursor.rowcount != 1:
+                return False
+            if self.connection.blog_order is not None:
+                self.connection.blog_order.append(blog)
+        return True
+
+    def retrieve_blogs(self, search_term):
+        ''' retrieve blogs whose name contains search_term, in the order they were stored '''
+        if use_fts(search_term):
+            rows = self.connection.execute('SELECT blog.id, blog.name, blog.url, blog.email FROM blog_fts '
+                'JOIN blog ON blog.rowid = blog_fts.rowid WHERE blog_fts MATCH ? AND instr(blog.name, ?) > 0 '
+                'ORDER BY blog.rowid', (fts_phrase(search_term), search_term))
+        else:
+            rows = self.connection.execute('SELECT id, name, url, email FROM blog WHERE instr(name, ?) > 0 '
+                'ORDER BY rowid', (search_term,))
+        return [self.make_blog(row) for row in rows]
+
+    def update_blog(self, key, blog):
+        ''' update the blog stored under key, writing only the edited fields of a tracked blog '''
+        fields = Blog.FIELDS if blog.changed is None else [field for field in Blog.FIELDS if field in blog.changed]
+        if not fields:
+            # nothing was edited, only check the blog still exists
+            return self.connection.execute('SELECT 1 FROM blog WHERE id = ?', (key,)).fetchone() is not None
+        with self.connection.lock:
+            cursor = self.connection.write('UPDATE blog SET ' + ', '.join(field + ' = ?' for field in fields)
+                + ' WHERE id = ?', [getattr(blog, field) for field in fields] + [key])
+            if cursor.rowcount != 1:
+                return False
+            if self.connection.blog_order is not None:
+                self.connection.blog_order.replace(key, blog)
+        blog.saved()
+        return True
+
+    def rename_blog(self, key, blog):
+        ''' give the blog stored under key a new id and data in one statement, moving it to the end as a re-creation would;
+        its posts and post counter move to the new id in the same transaction '''
+        try:
+            with transaction(self.connection):
+                cursor = self.connection.execute('UPDATE blog SET rowid = (SELECT max(rowid) + 1 FROM blog), '
+                    'id = ?, name = ?, url = ?, email = ? WHERE id = ?', (blog.id, blog.name, blog.url, blog.email, key))
+                if cursor.rowcount != 1:
+                    return False
+                for table in ('post', 'post_counter'):
+                    # orphans of an earlier blog of the new id, deleted without its posts by older versions
+                    self.connection.execute('DELETE FROM ' + table + ' WHERE blog_id = ?', (blog.id,))
+                    self.connection.execute('UPDATE ' + table + ' SET blog_id = ? WHERE blog_id = ?', (blog.id, key))
+                if self.connection.blog_order is not None:
+                    self.connection.blog_order.move(key, blog)
+        except sqlite3.IntegrityError:
+            # the new id is taken
+            return False
+        blog.saved()
+        return True
+
+    def delete_blog(self, key):
+        ''' delete a blog, with its posts and post counter in the same transaction '''
+        with transaction(self.connection):
+            cursor = self.connection.execute('DELETE FROM blog WHERE id = ?', (key,))
+            if cursor.rowcount != 1:
+                return False
+            self.connection.execute('DELETE FROM post WHERE blog_id = ?', (key,))
+            self.connection.execute('DELETE FROM post_counter WHERE blog_id = ?', (key,))
+            if self.connection.blog_order is not None:
+                self.connection.blog_order.remove(key)
+        return True
+
+    def list_blogs(self):
+        ''' list all blogs in the order they were stored, as a snapshot that later writes leave untouched;
+        it is taken without copying the catalog and read without locking it '''
+        with self.connection.lock:
+            # writes through this connection keep the order up to date, those of other connections or processes do not
+            data_version = self.connection.execute('PRAGMA data_version').fetchone()[0]
+            order = self.connection.blog_order
+            if order is None or self.connection.blog_order_data_version != data_version:
+                order = self.connection.blog_order = BlogOrder(
+                    self.connection.execute('SELECT id, name, url, email FROM blog ORDER BY rowid'))
+                self.connection.blog_order_data_version = data_version
+            return order.snapshot(self.make_blog)
@@ -0,0 +1,165 @@
+import itertools
+from collections.abc import Sequence
+from operator import itemgetter
+
+# dead records a catalog keeps on top of its live ones before it rebuilds its cells without them
+GARBAGE_SLACK = 64
+
+def blog_record(blog):
+    ''' the (id, name, url, email) record of a blog '''
+    return (blog.id, blog.name, blog.url, blog.email)
+
+def record_at(cell, version):
+    ''' the record a cell held at version, None if the blog was deleted or moved away by then '''
+    born, record = cell[-1]
+    if born <= version:
+        return record
+    for born, record in reversed(cell):
+        if born <= version:
+            return record
+    return None
+
+class BlogListView(Sequence):
+    ''' read-only list of the blog catalog as it was at one version, read from the cells it was taken from
+    without copying them or locking; blogs are built as they are read '''
+
+    __slots__ = ('cells', 'end', 'version', 'count', 'make_blog')
+
+    def __init__(self, cells, end, version, count, make_blog):
+        ''' construct a view of the first end cells at version, holding count blogs built by make_blog '''
+        self.cells = cells
+        self.end = end
+        self.version = version
+        self.count = count
+        self.make_blog = make_blog
+
+    def __len__(self):
+        return self.count
+
+    def records(self):
+        ''' the records of the blogs in stored order '''
+        version = self.version
+        for cell in itertools.islice(self.cells, self.end):
+            born, record = cell[-1]
+            if born > version:
+                # written after the snapshot, an older record is the one it holds
+                record = record_at(cell, version)
+            if record is not None:
+                yield record
+
+    def __iter__(self):
+        make_blog = self.make_blog
+        return (make_blog(record) for record in self.records())
+
+    def __getitem__(self, index):
+        ''' the blog at index in stored order, or a list of blogs for a slice '''
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.count)
+            if step < 0:
+                return list(self)[index]
+            return list(itertools.islice(self, start, stop, step))
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError('blog list index out of range')
+        return next(itertools.islice(self, index, None))
+
+    def __eq__(self, other):
+        ''' equal to a list or view holding equal blogs in the same order '''
+        if not isinstance(other, (list, BlogListView)):
+            return NotImplemented
+        return len(self) == len(other) and all(blog == other_blog for blog, other_blog in zip(self, other))
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(list(self))
+
+class BlogOrder():
+    ''' the blog catalog in stored order, each blog's place a cell of (version, record) appended on every write;
+    snapshots read the records of their version while writes go on, the caller serialises writes and snapshots '''
+
+    def __init__(self, records=(), record=blog_record, key=itemgetter(0)):
+        ''' construct the order from records in stored order, record gives the record of a blog written later
+        and key the blog id of a record '''
+        records = list(records)
+        self.record = record
+        self.version = 0
+        self.cells = [[(0, record)] for record in records]
+        # blog id -> position of its cell
+        self.positions = {key(record): position for position, record in enumerate(records)}
+        self.count = len(records)
+        # superseded records kept for snapshots that may still read them
+        self.garbage = 0
+        # version of the latest snapshot, records written after it are overwritten rather than superseded
+        self.read_version = -1
+
+    def append(self, blog):
+        ''' record a blog created at the end of the catalog '''
+        self.version += 1
+        self.add(blog)
+
+    def add(self, blog):
+        self.positions[blog.id] = len(self.cells)
+        self.cells.append([(self.version, self.record(blog))])
+        self.count += 1
+
+    def current(self, key):
+        ''' the latest record of the blog stored under key, None if there is none '''
+        position = self.positions.get(key)
+        return None if position is None else self.cells[position][-1][1]
+
+    def push(self, cell, record):
+        ''' give cell the record of the current version, replacing its latest one if no snapshot can read it '''
+        if cell[-1][0] > self.read_version:
+            cell[-1] = (self.version, record)
+        else:
+            cell.append((self.version, record))
+        self.garbage += 1
+
+    def kill(self, key):
+        ''' mark the blog stored under key deleted at the current version, returns whether it was there '''
+        position = self.positions.pop(key, None)
+        if position is None:
+            return False
+        self.push(self.cells[position], None)
+        self.count -= 1
+        return True
+
+    def replace(self, key, blog):
+        ''' record new data, and possibly a new id, for the blog stored under key, keeping its place '''
+        position = self.positions.pop(key, None)
+        if position is None:
+            return
+        self.version += 1
+        self.positions[blog.id] = position
+        self.push(self.cells[position], self.record(blog))
+        self.collect()
+
+    def move(self, key, blog):
+        ''' record the blog stored under key given a new id and data at the end, as one change '''
+        self.version += 1
+        if self.kill(key):
+            self.add(blog)
+        self.collect()
+
+    def remove(self, key):
+        ''' record a deleted blog '''
+        self.version += 1
+        self.kill(key)
+        self.collect()
+
+    def collect(self):
+        ''' rebuild the cells without superseded records once these outnumber the live ones,
+        snapshots taken earlier keep reading the previous cells '''
+        if self.garbage <= self.count + GARBAGE_SLACK:
+            return
+        live = sorted(self.positions.items(), key=itemgetter(1))
+        self.cells = [[(self.version, self.cells[position][-1][1])] for _, position in live]
+        self.positions = {key: position for position, (key, _) in enumerate(live)}
+        self.garbage = 0
+
+    def snapshot(self, make_blog):
+        ''' a view of the catalog at the current version, blogs built from records by make_blog '''
+        self.read_version = self.version
+        return BlogListView(self.cells, len(self.cells), self.version, self.count, make_blog)
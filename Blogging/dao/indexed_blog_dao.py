@@ -0,0 +1,132 @@
+import threading
+from blogging.dao.blog_order import BlogOrder
+from blogging.index.ngram_index import NGramIndex
+from blogging.instrumentation import metrics
+
+def stored_blog(blog):
+    ''' the blog itself, which the catalog keeps in its order as the underlying DAO stores it '''
+    return blog
+
+def blog_id(blog):
+    ''' the id of a blog '''
+    return blog.id
+
+class IndexedBlogDAO():
+    ''' blog DAO that answers retrieve_blogs from an in-memory n-gram index over another blog DAO '''
+
+    def __init__(self, blog_dao):
+        ''' construct an indexed view over blog_dao, the index is built on the first search '''
+        self.blog_dao = blog_dao
+        self.index = None
+        # the catalog read by list_blogs snapshots and by updates finding the stored blogs, loaded on first use
+        # and kept up to date by writes; it holds the stored blogs rather than copies, which would not share
+        # the posts a blog holds unsaved
+        self.order = None
+        self.order_lock = threading.Lock()
+
+    def __getattr__(self, name):
+        ''' anything not indexed is served by the underlying DAO '''
+        if name == 'blog_dao':
+            raise AttributeError(name)
+        return getattr(self.blog_dao, name)
+
+    def get_index(self):
+        ''' return the index, building it from the underlying DAO on first use '''
+        if self.index is None:
+            index = NGramIndex()
+            for blog in self.blog_dao.list_blogs():
+                index.add(blog.id, blog.name)
+            self.index = index
+        return self.index
+
+    def search_blog(self, key):
+        ''' search a blog by its id '''
+        return self.blog_dao.search_blog(key)
+
+    def create_blog(self, blog):
+        ''' create a blog and index its name '''
+        success = self.blog_dao.create_blog(blog)
+        if success and self.index is not None:
+            self.index.add(blog.id, blog.name)
+        if success:
+            self.change_order('append', blog)
+        return success
+
+    def retrieve_blogs(self, search_term):
+        ''' retrieve blogs whose name contains search_term, in the order they were stored '''
+        index = self.get_index()
+        blogs = []
+        for key in index.search(search_term):
+            blog = self.blog_dao.search_blog(key)
+            if blog is not None:
+                blogs.append(blog)
+        if metrics.enabled:
+            metrics.add_scanned('blog_dao.retrieve_blogs', index.last_scanned)
+        return blogs
+
+    def update_blog(self, key, blog):
+        ''' update a blog and reindex its name '''
+        blog = self.apply_to_stored(key, blog)
+        success = self.blog_dao.update_blog(key, blog)
+        if success and self.index is not None:
+            self.index.add(key, blog.name)
+        if success:
+            self.change_order('replace', key, blog)
+        return success
+
+    def rename_blog(self, key, blog):
+        ''' give the blog stored under key a new id and data, returns False if it is missing or the id is taken '''
+        rename_blog = getattr(self.blog_dao, 'rename_blog', None)
+        if rename_blog is not None:
+            success = rename_blog(key, blog)
+        else:
+            # the blog is re-created, the stored object is checked against the taken ids before it is changed
+            with self.order_lock:
+                taken = self.get_order().current(blog.id) is not None
+            if taken:
+                return False
+            blog = self.apply_to_stored(key, blog)
+            success = self.blog_dao.delete_blog(key) and self.blog_dao.create_blog(blog)
+        if success and self.index is not None:
+            self.index.remove(key)
+            self.index.add(blog.id, blog.name)
+        if success:
+            self.change_order('move', key, blog)
+        return success
+
+    def apply_to_stored(self, key, blog):
+        ''' the blog stored under key given the data of blog, or blog itself if none is stored; the stored object
+        is kept rather than replaced, as it holds the posts of the blog that are not saved '''
+        with self.order_lock:
+            stored = self.get_order().current(key)
+        if stored is None or stored is blog:
+            return blog
+        stored.id, stored.name, stored.url, stored.email = blog.id, blog.name, blog.url, blog.email
+        return stored
+
+    def delete_blog(self, key):
+        ''' delete a blog and drop it from the index '''
+        success = self.blog_dao.delete_blog(key)
+        if success and self.index is not None:
+            self.index.remove(key)
+        if success:
+            self.change_order('remove', key)
+        return success
+
+    def get_order(self):
+        ''' the catalog order, loaded from the underlying DAO on first use; called under order_lock '''
+        if self.order is None:
+            self.order = BlogOrder(self.blog_dao.list_blogs(), stored_blog, blog_id)
+        return self.order
+
+    def change_order(self, change, *arguments):
+        ''' apply a write to the catalog order, if a listing loaded it '''
+        with self.order_lock:
+            if self.order is not None:
+                getattr(self.order, change)(*arguments)
+
+    def list_blogs(self):
+        ''' list all blogs in the order they were stored, as a snapshot of which blogs there are that later
+        writes through this DAO leave untouched '''
+        with self.order_lock:
+            return self.get_order().snapshot(stored_blog)
@@ -0,0 +1,188 @@
+from blogging.dao.post_order import PostOrder
+from blogging.index.ngram_index import NGramIndex
+from blogging.index.word_index import WordIndex
+from blogging.instrumentation import metrics
+
+def fields_reader(post_dao):
+    ''' a function reading the title and text of a post of post_dao by code, as indexes keeping no copy read them;
+    it holds the underlying DAO only, so the indexed DAO is freed as soon as it is no longer used '''
+    def fields(post_code):
+        post = post_dao.search_post(post_code)
+        return (post.post_title, post.post_text)
+    return fields
+
+class IndexedPostDAO():
+    ''' post DAO that answers retrieve_posts from an in-memory n-gram index over another post DAO,
+    and search_posts from an in-memory word index '''
+
+    def __init__(self, post_dao):
+        ''' construct an indexed view over post_dao, each index is built on the first search it serves '''
+        self.post_dao = post_dao
+        self.index = None
+        self.word_index = None
+        # the indexes of a store that may hold texts compressed read them through its posts, rather than keep
+        # a decompressed copy of every text
+        self.lookup = fields_reader(post_dao) if hasattr(post_dao, 'compression') else None
+        # posts in creation order, for stores without lookups or pages of their own, built on first use
+        self.order = None
+
+    def __getattr__(self, name):
+        ''' anything not indexed is served by the underlying DAO (e.g. counter) '''
+        if name == 'post_dao':
+            raise AttributeError(name)
+        return getattr(self.post_dao, name)
+
+    def get_index(self):
+        ''' return the index, building it from the underlying DAO on first use '''
+        if self.index is None:
+            index = NGramIndex(lookup=self.lookup)
+            for post in sorted(self.post_dao.list_posts(), key=lambda post: post.post_code):
+                index.add(post.post_code, post.post_title, post.post_text)
+            self.index = index
+        return self.index
+
+    def get_word_index(self):
+        ''' return the word index, building it from the underlying DAO on first use '''
+        if self.word_index is None:
+            index = WordIndex(lookup=self.lookup)
+            for post in sorted(self.post_dao.list_posts(), key=lambda post: post.post_code):
+                index.add(post.post_code, post.post_title, post.post_text)
+            self.word_index = index
+        return self.word_index
+
+    def get_order(self):
+        ''' return the order of the posts, building it from the underlying DAO on first use '''
+        if self.order is None:
+            self.order = PostOrder(sorted(self.post_dao.list_posts(), key=lambda post: post.post_code))
+        return self.order
+
+    def indexes(self):
+        ''' the indexes built so far, which writes keep up to date '''
+        return [index for index in (self.index, self.word_index) if index is not None]
+
+    def search_post(self, post_code):
+        ''' search a post by its code '''
+        return self.post_dao.search_post(post_code)
+
+    def create_post(self, post):
+        ''' create a post and index it '''
+        success = self.post_dao.create_post(post)
+        if success and self.order is not None:
+            self.order.append(post)
+        if success:
+            for index in self.indexes():
+                index.add(post.post_code, post.post_title, post.post_text)
+        return success
+
+    def create_posts(self, posts):
+        ''' create a batch of posts and index them, persisting once when the underlying DAO supports batches '''
+        create_posts = getattr(self.post_dao, 'create_posts', None)
+        if create_posts is not None:
+            success = create_posts(posts)
+        else:
+            success = self.create_each(posts)
+        if success and self.order is not None:
+            self.order.extend(posts)
+        if success:
+            for index in self.indexes():
+                for post in posts:
+                    index.add(post.post_code, post.post_title, post.post_text)
+        return success
+
+    def create_each(self, posts):
+        ''' create a batch of posts one at a time in a store without batches; a store saving all of its posts
+        on every write while autosave is on only saves with the last post, which holds the whole batch '''
+        if not posts:
+            return True
+        post_dao = self.post_dao
+        autosave = getattr(post_dao, 'autosave', False)
+        if autosave:
+            post_dao.autosave = False
+        try:
+            created = [post_dao.create_post(post) for post in posts[:-1]]
+        finally:
+            if autosave:
+                post_dao.autosave = autosave
+        return post_dao.create_post(posts[-1]) and all(created)
+
+    def retrieve_posts(self, search_term):
+        ''' retrieve posts whose title or text contain search_term, in creation order '''
+        index = self.get_index()
+        posts = []
+        for post_code in index.search(search_term):
+            post = self.post_dao.search_post(post_code)
+            if post is not None:
+                posts.append(post)
+        if metrics.enabled:
+            metrics.add_scanned('post_dao.retrieve_posts', index.last_scanned)
+        return posts
+
+    def search_posts(self, query, mode='all', case_sensitive=False, limit=None):
+        ''' retrieve posts matching query under one of the word index's search modes, best ranked first '''
+        index = self.get_word_index()
+        posts = []
+        for post_code in index.search(query, mode, case_sensitive, limit):
+            post = self.post_dao.search_post(post_code)
+            if post is not None:
+                posts.append(post)
+        if metrics.enabled:
+            metrics.add_scanned('post_dao.search_posts', index.last_scanned)
+        return posts
+
+    def update_post(self, post_code, new_post_title, new_post_text):
+        ''' update a post and reindex it '''
+        return self.update_if_exists(post_code, new_post_title, new_post_text) is not None
+
+    def update_if_exists(self, post_code, new_post_title, new_post_text):
+        ''' update a post and reindex it, returns its previous (post_title, post_text) or None if missing '''
+        update_if_exists = getattr(self.post_dao, 'update_if_exists', None)
+        if update_if_exists is not None:
+            previous = update_if_exists(post_code, new_post_title, new_post_text)
+        else:
+            # one lookup in the order and one write, rather than a search of the store before its update
+            post = self.get_order().get(post_code)
+            previous = None
+            if post is not None:
+                previous = (post.post_title, post.post_text)
+                if not self.post_dao.update_post(post_code, new_post_title, new_post_text):
+                    previous = None
+                elif post.post_title != new_post_title or post.post_text != new_post_text:
+                    # the store replaced the post rather than update it in place
+                    self.order.replace(self.post_dao.search_post(post_code))
+        if previous is not None:
+            for index in self.indexes():
+                index.add(post_code, new_post_title, new_post_text, previous=previous)
+        return previous
+
+    def delete_post(self, post_code):
+        ''' delete a post and drop it from the index '''
+        return self.delete_if_exists(post_code) is not None
+
+    def delete_if_exists(self, post_code):
+        ''' delete a post and drop it from the index, returns the deleted post or None if missing '''
+        delete_if_exists = getattr(self.post_dao, 'delete_if_exists', None)
+        if delete_if_exists is not None:
+            post = delete_if_exists(post_code)
+        else:
+            post = self.get_order().get(post_code)
+            if post is not None and not self.post_dao.delete_post(post_code):
+                post = None
+        if post is not None and self.order is not None:
+            self.order.remove(post_code)
+        if post is not None:
+            previous = (post.post_title, post.post_text) if self.lookup is not None else None
+            for index in self.indexes():
+                index.remove(post_code, previous=previous)
+        return post
+
+    def list_posts(self):
+        ''' list all posts, newest first '''
+        return self.post_dao.list_posts()
+
+    def iter_posts(self, after=None, limit=None):
+        ''' yield posts newest first, older than the post coded after, at most limit of them; a store without
+        pages of its own is paged through the order of its posts '''
+        iter_posts = getattr(self.post_dao, 'iter_posts', None)
+        if iter_posts is not None:
+            return iter_posts(after, limit)
+        return self.get_order().iter_newest(after, limit)
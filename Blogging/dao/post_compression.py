@@ -0,0 +1,226 @@
+import os
+import pickle
+import zlib
+from blogging.configuration import Configuration
+from blogging.post import Post
+
+# the post_text slot of Post, which holds the compressed text of a CompressedPost
+TEXT_SLOT = Post.post_text
+
+# compression methods, by the name Configuration.post_compression selects them with
+METHODS = ('zlib', 'lzma')
+
+# zlib looks back this far, a longer dictionary would not be used
+DICTIONARY_BYTES = 32768
+
+# bytes taken from the start of each sampled text when training a dictionary
+SAMPLE_BYTES = 1024
+
+def train_dictionary(texts, size=DICTIONARY_BYTES):
+    ''' a preset dictionary of at most size bytes from the start of texts spread evenly over them,
+    where the boilerplate articles of one blog repeat '''
+    samples = max(1, size // SAMPLE_BYTES)
+    step = max(1, len(texts) // samples)
+    chunks = [text.encode()[:SAMPLE_BYTES] for text in texts[::step][:samples]]
+    # zlib prefers matches close to the data, so the texts sampled last end up nearest
+    return b''.join(chunks)[-size:]
+
+class Codec():
+    ''' compresses texts with one method, and the blog's dictionary if it has one '''
+
+    def __init__(self, method, level=None, dictionary=None):
+        ''' construct a codec for method at level, its default when None '''
+        self.method = method
+        self.level = level
+        self.dictionary = dictionary
+        if method == 'lzma':
+            import lzma
+            self.lzma = lzma
+            # raw streams carry no header, the filters are fixed by the codec
+            self.filters = [{'id': lzma.FILTER_LZMA2, 'preset': 6 if level is None else level}]
+        elif method != 'zlib':
+            raise ValueError('unknown post compression %r, expected one of %s' % (method, ', '.join(METHODS)))
+
+    def compress(self, text):
+        ''' the compressed UTF-8 bytes of text '''
+        data = text.encode()
+        if self.method == 'lzma':
+            return self.lzma.compress(data, format=self.lzma.FORMAT_RAW, filters=self.filters)
+        level = zlib.Z_DEFAULT_COMPRESSION if self.level is None else self.level
+        # raw deflate, the log and snapshot already detect torn records
+        if self.dictionary:
+            compressor = zlib.compressobj(level, zlib.DEFLATED, -15, zdict=self.dictionary)
+        else:
+            compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+        return compressor.compress(data) + compressor.flush()
+
+    def decompress(self, data):
+        ''' the text compressed into data '''
+        if self.method == 'lzma':
+            return self.lzma.decompress(data, format=self.lzma.FORMAT_RAW, filters=self.filters).decode()
+        if self.dictionary:
+            decompressor = zlib.decompressobj(-15, zdict=self.dictionary)
+        else:
+            decompressor = zlib.decompressobj(-15)
+        return (decompressor.decompress(data) + decompressor.flush()).decode()
+
+class CompressedPost(Post):
+    ''' post loaded with a compressed text, decompressed on each access until the text is replaced '''
+
+    __slots__ = ('codec',)
+
+    @property
+    def post_text(self):
+        ''' the text, decompressed unless it was replaced in memory '''
+        if self.codec is None:
+            return TEXT_SLOT.__get__(self, CompressedPost)
+        return self.codec.decompress(TEXT_SLOT.__get__(self, CompressedPost))
+
+    @post_text.setter
+    def post_text(self, post_text):
+        TEXT_SLOT.__set__(self, post_text)
+        self.codec = None
+
+    def resident_bytes(self):
+        ''' bytes held by the text in memory, compressed or not '''
+        return len(TEXT_SLOT.__get__(self, CompressedPost))
+
+    def __reduce_ex__(self, protocol):
+        ''' pickle as a plain post, only a DAO knows the codec of the compressed text '''
+        return (plain_post, (Post.__getstate__(self),))
+
+def plain_post(state):
+    ''' a Post restored from its pickled state '''
+    post = Post.__new__(Post)
+    post.__setstate__(state)
+    return post
+
+class PostPickler(pickle.Pickler):
+    ''' pickler writing the long texts of posts compressed by the blog's compression '''
+
+    def __init__(self, file, compression):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.compression = compression
+
+    def persistent_id(self, value):
+        # subclasses keeping texts elsewhere, such as stored posts, pickle themselves
+        if type(value) is Post or type(value) is CompressedPost:
+            return self.compression.reference(value)
+        return None
+
+class PostUnpickler(pickle.Unpickler):
+    ''' unpickler restoring posts written compressed as CompressedPost '''
+
+    def __init__(self, file, compression):
+        super().__init__(file)
+        self.compression = compression
+
+    def persistent_load(self, reference):
+        return self.compression.restore(reference)
+
+class TextCompression():
+    ''' compression of the long post texts of one blog's records, with a zlib dictionary trained on its texts
+    and kept next to them; records written with other settings, or none, stay readable '''
+
+    def __init__(self, dictionary_file, method=None, threshold=None, level=None):
+        ''' construct the compression of the blog whose dictionary is kept in dictionary_file, compressing
+        texts of at least threshold bytes with method when written, and none when method is None '''
+        self.dictionary_file = dictionary_file
+        self.method = method
+        self.threshold = 256 if threshold is None else threshold
+        self.level = level
+        self.dictionary = None
+        self.dictionary_loaded = False
+        # (method, whether the dictionary is used) -> codec
+        self.codecs = {}
+
+    @classmethod
+    def configured(cls, dictionary_file):
+        ''' the compression selected by the configuration '''
+        return cls(dictionary_file, getattr(Configuration, 'post_compression', None),
+            getattr(Configuration, 'post_compression_threshold', None),
+            getattr(Configuration, 'post_compression_level', None))
+
+    def get_dictionary(self):
+        ''' the blog's dictionary, None until one was trained '''
+        if not self.dictionary_loaded:
+            try:
+                with open(self.dictionary_file, 'rb') as file:
+                    self.dictionary = file.read()
+            except FileNotFoundError:
+                self.dictionary = None
+            self.dictionary_loaded = True
+        return self.dictionary
+
+    def codec(self, method, shared):
+        ''' the codec of method, with the blog's dictionary if shared '''
+        codec = self.codecs.get((method, shared))
+        if codec is None:
+            codec = self.codecs[(method, shared)] = Codec(method, self.level, self.get_dictionary() if shared else None)
+        return codec
+
+    def train(self, posts):
+        ''' train the blog's dictionary on the texts of posts once they are enough to fill one,
+        it is written before any record using it and never changes afterwards '''
+        if self.method != 'zlib' or self.get_dictionary() is not None:
+            return
+        texts = []
+        size = 0
+        for post in posts:
+            text = post.post_text
+            if len(text) >= self.threshold:
+                texts.append(text)
+                size += min(len(text), SAMPLE_BYTES)
+        if size < DICTIONARY_BYTES:
+            return
+        dictionary = train_dictionary(texts)
+        os.makedirs(os.path.dirname(self.dictionary_file) or '.', exist_ok=True)
+        temporary_file = self.dictionary_file + '.tmp'
+        with open(temporary_file, 'wb') as file:
+            file.write(dictionary)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_file, self.dictionary_file)
+        self.dictionary = dictionary
+        self.codecs = {}
+
+    def reference(self, post):
+        ''' the persistent reference a post is written as, None to pickle it as is '''
+        if self.method is None:
+            return None
+        # a text loaded compressed with the current codec is written without compressing it again
+        shared = self.method == 'zlib' and self.get_dictionary() is not None
+        codec = self.codec(self.method, shared)
+        if type(post) is CompressedPost and post.codec is codec:
+            data = TEXT_SLOT.__get__(post, CompressedPost)
+        else:
+            text = post.post_text
+            if len(text) < self.threshold:
+                return None
+            data = codec.compress(text)
+            if len(data) >= len(text):
+                return None
+        return (self.method, shared, post.post_code, post.post_title, data, post.creation_micros, post.update_micros)
+
+    def restore(self, reference):
+        ''' the post written as reference, its text decompressed on access '''
+        method, shared, post_code, post_title, data, creation_micros, update_micros = reference
+        post = CompressedPost.__new__(CompressedPost)
+        post.post_code = post_code
+        post.post_title = post_title
+        TEXT_SLOT.__set__(post, data)
+        post.codec = self.codec(method, shared)
+        post.creation_micros = creation_micros
+        post.update_micros = update_micros
+        return post
+
+    def dump(self, value, file):
+        ''' pickle value to file, compressing the texts of the posts it holds '''
+        if self.method is None:
+            pickle.dump(value, file, pickle.HIGHEST_PROTOCOL)
+        else:
+            PostPickler(file, self).dump(value)
+
+    def load(self, file):
+        ''' unpickle the next value from file, whatever compression its posts were written with '''
+        return PostUnpickler(file, self).load()
@@ -0,0 +1,31 @@
+from blogging.configuration import Configuration
+from blogging.instrumentation import instrument, metrics
+
+def create_post_dao(blog):
+    ''' create the post DAO for a blog, selected by Configuration.post_storage '''
+    if metrics.enabled:
+        # loading the store is timed apart from the calls made to it
+        return instrument(metrics.timed('post_dao.load', open_post_dao)(blog), 'post_dao')
+    return open_post_dao(blog)
+
+def open_post_dao(blog):
+    ''' open the configured post DAO of a blog, loading its posts '''
+    # backends are imported when first opened, so only the configured one is ever loaded
+    storage = getattr(Configuration, 'post_storage', 'pickle')
+    if storage == 'sqlite':
+        from blogging.dao.post_dao_sqlite import PostDAOSQLite
+        # searches are served by the database's full-text index
+        return PostDAOSQLite(blog)
+    if storage == 'mmap':
+        from blogging.dao.post_dao_mmap import PostDAOMmap
+        # texts stay in the mapped file, searches scan it rather than index them in memory
+        return PostDAOMmap(blog)
+    if storage == 'log':
+        from blogging.dao.post_dao_log import PostDAOLog
+        post_dao = PostDAOLog(blog)
+    else:
+        from blogging.dao.post_dao_pickle import PostDAOPickle
+        post_dao = PostDAOPickle(blog)
+    from blogging.dao.indexed_post_dao import IndexedPostDAO
+    # searches are served by an in-memory index
+    return IndexedPostDAO(post_dao)
@@ -0,0 +1,245 @@
+import os
+import pickle
+import time
+from blogging.configuration import Configuration
+from blogging.dao.post_compression import TextCompression
+from blogging.dao.post_order import PostOrder
+from blogging.instrumentation import metrics
+from blogging.post import Post
+
+class PostDAOLog():
+    ''' post DAO that persists a blog's posts as a snapshot plus an append-only log of mutations '''
+
+    # appended to the blog id in the names of the log and snapshot files
+    file_suffix = ''
+
+    def __init__(self, blog, autosave=None, path=None):
+        ''' construct the DAO, replaying the snapshot and log tail of the blog when autosave is on '''
+        self.blog = blog
+        self.autosave = Configuration.autosave if autosave is None else autosave
+        path = path or getattr(Configuration, 'records_path', 'records')
+        self.log_file = os.path.join(path, str(blog.id) + self.file_suffix + '.log')
+        self.snapshot_file = os.path.join(path, str(blog.id) + self.file_suffix + '.snapshot')
+        # fold the log into the snapshot after this many records
+        self.compaction_records = getattr(Configuration, 'log_compaction_records', 1000)
+        self.fsync = getattr(Configuration, 'log_fsync', False)
+        # long texts are written compressed, with a dictionary trained on the blog's texts
+        self.compression = TextCompression.configured(os.path.join(path, str(blog.id) + self.file_suffix + '.dict'))
+        # changes are written once this many are pending, or once the oldest is this many seconds old
+        self.batch_records = getattr(Configuration, 'autosave_batch_records', None) or 1
+        self.batch_interval = getattr(Configuration, 'autosave_interval', None)
+        # post code -> changed post, or None once deleted, since the last write
+        self.dirty = {}
+        self.dirty_since = None
+        self.posts = {}
+        self.order = PostOrder()
+        self.counter = 0
+        self.log_records = 0
+        self.log = None
+        if self.autosave:
+            self.load()
+
+    def load(self):
+        ''' load the snapshot, then replay the records appended after it '''
+        try:
+            with open(self.snapshot_file, 'rb') as file:
+                self.counter, self.posts = self.compression.load(file)
+                if metrics.enabled:
+                    metrics.add_bytes('post_dao_log', read=file.tell())
+        except FileNotFoundError:
+            pass
+        try:
+            with open(self.log_file, 'rb') as file:
+                valid = 0
+                while True:
+                    try:
+                        record = self.compression.load(file)
+                    except EOFError:
+                        break
+                    except (pickle.UnpicklingError, ValueError, AttributeError):
+                        # a torn record left by a crash mid-append, drop it and what follows
+                        break
+                    self.apply(record)
+                    self.log_records += self.mutations(record)
+                    valid = file.tell()
+            if valid != os.path.getsize(self.log_file):
+                os.truncate(self.log_file, valid)
+            if metrics.enabled:
+                metrics.add_bytes('post_dao_log', read=valid)
+        except FileNotFoundError:
+            pass
+        self.order = PostOrder(self.posts.values())
+
+    def mutations(self, record):
+        ''' number of changes held by a logged record '''
+        operation, value = record
+        if operation == 'create_many':
+            return len(value)
+        if operation == 'changes':
+            return len(value[1])
+        return 1
+
+    def apply(self, record):
+        ''' apply one logged mutation to the in-memory posts '''
+        operation, value = record
+        if operation == 'changes':
+            counter, changes = value
+            for post_code, post in changes:
+                if post is None:
+                    self.posts.pop(post_code, None)
+                else:
+                    self.posts[post_code] = post
+            self.counter = max(self.counter, counter)
+        elif operation == 'delete':
+            self.posts.pop(value, None)
+        elif operation == 'create_many':
+            for post in value:
+                self.posts[post.post_code] = post
+                self.counter = max(self.counter, post.post_code)
+        else:
+            self.posts[value.post_code] = value
+            if operation == 'create':
+                self.counter = max(self.counter, value.post_code)
+
+    def append(self, record, mutations=1):
+        ''' append one record holding mutations changes to the log, compacting it when it grows too long '''
+        if not self.autosave:
+            return
+        if self.log is None:
+            os.makedirs(os.path.dirname(self.log_file) or '.', exist_ok=True)
+            self.log = open(self.log_file, 'ab')
+        if metrics.enabled:
+            start = self.log.tell()
+        self.compression.dump(record, self.log)
+        self.log.flush()
+        if metrics.enabled:
+            metrics.add_bytes('post_dao_log', written=self.log.tell() - start)
+        if self.fsync:
+            os.fsync(self.log.fileno())
+        self.log_records += mutations
+        if self.log_records >= self.compaction_records:
+            self.compact()
+
+    def change(self, posts, deleted=()):
+        ''' record changed posts and deleted codes, writing them once enough are pending '''
+        if not self.autosave:
+            return
+        for post in posts:
+            self.dirty[post.post_code] = post
+        for post_code in deleted:
+            self.dirty[post_code] = None
+        now = time.monotonic()
+        if self.dirty_since is None:
+            self.dirty_since = now
+        if len(self.dirty) >= self.batch_records or (self.batch_interval is not None
+                and now - self.dirty_since >= self.batch_interval):
+            self.flush()
+
+    def flush(self):
+        ''' write the pending changes to the log as one record, each changed post once in its latest state '''
+        if not self.dirty:
+            return
+        changes = list(self.dirty.items())
+        self.dirty = {}
+        self.dirty_since = None
+        self.compression.train([post for _, post in changes if post is not None])
+        self.append(('changes', (self.counter, changes)), len(changes))
+
+    def compact(self):
+        ''' write the current posts as the new snapshot and empty the log '''
+        if not self.autosave:
+            return
+        # the snapshot holds the pending changes too
+        self.dirty = {}
+        self.dirty_since = None
+        os.makedirs(os.path.dirname(self.snapshot_file) or '.', exist_ok=True)
+        self.compression.train(self.posts.values())
+        temporary_file = self.snapshot_file + '.tmp'
+        with open(temporary_file, 'wb') as file:
+            self.compression.dump((self.counter, self.posts), file)
+            file.flush()
+            os.fsync(file.fileno())
+            if metrics.enabled:
+                metrics.add_bytes('post_dao_log', written=file.tell())
+        os.replace(temporary_file, self.snapshot_file)
+        if self.log is not None:
+            self.log.close()
+            self.log = None
+        open(self.log_file, 'wb').close()
+        self.log_records = 0
+
+    def close(self):
+        ''' write the pending changes and close the log file '''
+        if self.autosave:
+            self.flush()
+        if self.log is not None:
+            self.log.close()
+            self.log = None
+
+    def search_post(self, post_code):
+        ''' search a post by its code '''
+        return self.posts.get(post_code)
+
+    def create_post(self, post):
+        ''' create a post, appending it to the log '''
+        if post.post_code in self.posts:
+            return False
+        self.posts[post.post_code] = post
+        self.order.append(post)
+        self.counter = max(self.counter, post.post_code)
+        self.change([post])
+        return True
+
+    def create_posts(self, posts):
+        ''' create a batch of posts with unused codes, appending them to the log as one record '''
+        if any(post.post_code in self.posts for post in posts):
+            return False
+        for post in posts:
+            self.posts[post.post_code] = post
+            self.counter = max(self.counter, post.post_code)
+        self.order.extend(posts)
+        self.change(posts)
+        return True
+
+    def retrieve_posts(self, search_term):
+        ''' retrieve posts whose title or text contain search_term, in creation order '''
+        return [post for post in self.posts.values() if search_term in post.post_title or search_term in post.post_text]
+
+    def update_post(self, post_code, new_post_title, new_post_text):
+        ''' update a post, appending its new state to the log '''
+        return self.update_if_exists(post_code, new_post_title, new_post_text) is not None
+
+    def update_if_exists(self, post_code, new_post_title, new_post_text):
+        ''' update a post with one lookup, returns its previous (post_title, post_text) or None if missing '''
+        post = self.posts.get(post_code)
+        if post is None:
+            return None
+        previous = (post.post_title, post.post_text)
+        # a new object, so listings handed out earlier keep the post as it was
+        updated = Post(post_code, new_post_title, new_post_text)
+        updated.creation_micros = post.creation_micros
+        self.posts[post_code] = updated
+        self.order.replace(updated)
+        self.change([updated])
+        return previous
+
+    def delete_post(self, post_code):
+        ''' delete a post, appending the deletion to the log '''
+        return self.delete_if_exists(post_code) is not None
+
+    def delete_if_exists(self, post_code):
+        ''' delete a post with one lookup, returns the deleted post or None if missing '''
+        post = self.posts.pop(post_code, None)
+        if post is None:
+            return None
+        self.order.remove(post_code)
+        self.change((), [post_code])
+        return post
+
+    def list_posts(self):
+        ''' list all posts, newest first, as a view that later changes leave untouched '''
+        return self.order.newest()
+
+    def iter_posts(self, after=None, limit=None):
+        ''' yield posts newest first, older than the post coded after, at most limit of them '''
+        return self.order.iter_newest(after, limit)
@@ -0,0 +1,215 @@
+import bisect
+import copyreg
+import mmap
+import os
+import tempfile
+from blogging.post import Post, now_micros
+from blogging.dao.post_dao_log import PostDAOLog
+from blogging.instrumentation import metrics
+
+# the post_text slot of Post, which holds a text replaced in memory
+TEXT_SLOT = Post.post_text
+
+class TextFile():
+    ''' append-only file of UTF-8 post texts, read through a memory mapping '''
+
+    def __init__(self, path=None):
+        ''' open the file at path, or an anonymous temporary file when path is None '''
+        self.path = path
+        if path is None:
+            self.file = tempfile.TemporaryFile()
+        else:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            self.file = open(path, 'a+b')
+        self.size = self.file.seek(0, os.SEEK_END)
+        self.mapping = None
+
+    def append(self, texts, fsync=False):
+        ''' append texts with one write, returns the (offset, length) in bytes of each '''
+        spans = []
+        chunks = []
+        offset = self.size
+        for text in texts:
+            data = text.encode()
+            spans.append((offset, len(data)))
+            chunks.append(data)
+            offset += len(data)
+        self.file.write(b''.join(chunks))
+        self.file.flush()
+        if fsync:
+            os.fsync(self.file.fileno())
+        if metrics.enabled:
+            metrics.add_bytes('post_dao_mmap', written=offset - self.size)
+        self.size = offset
+        return spans
+
+    def view(self):
+        ''' a mapping of the whole file, remapped when the file grew since the last one '''
+        if not self.size:
+            # an empty file cannot be mapped
+            return b''
+        mapping = self.mapping
+        if mapping is None or len(mapping) < self.size:
+            # readers holding the previous mapping keep it alive until they are done with it
+            mapping = self.mapping = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        return mapping
+
+    def read(self, offset, length):
+        ''' the text stored at offset '''
+        if not length:
+            return ''
+        mapping = self.mapping
+        if mapping is None or len(mapping) < offset + length:
+            mapping = self.view()
+        return mapping[offset:offset + length].decode()
+
+    def close(self):
+        ''' close the file, mappings already made stay readable '''
+        self.file.close()
+
+def plain_post(state):
+    ''' a Post restored from its pickled state '''
+    post = Post.__new__(Post)
+    post.__setstate__(state)
+    return post
+
+class StoredPost(Post):
+    ''' post whose text stays in the blog's text file and is read from the mapping on each access '''
+
+    __slots__ = ('text_file', 'offset', 'length')
+
+    def __init__(self, post_code, post_title, creation_micros, update_micros, text_file, offset, length):
+        ''' construct a post over the text stored at offset in text_file '''
+        self.post_code = post_code
+        self.post_title = post_title
+        self.creation_micros = creation_micros
+        self.update_micros = update_micros
+        self.text_file = text_file
+        self.offset = offset
+        self.length = length
+
+    @property
+    def post_text(self):
+        ''' the text, read from the mapping unless it was replaced in memory '''
+        if self.offset is None:
+            return TEXT_SLOT.__get__(self, StoredPost)
+        return self.text_file.read(self.offset, self.length)
+
+    @post_text.setter
+    def post_text(self, post_text):
+        TEXT_SLOT.__set__(self, post_text)
+        self.offset = None
+
+    def __reduce_ex__(self, protocol):
+        ''' pickle the location of the text, or the text itself once it was replaced in memory '''
+        if self.offset is None:
+            return (plain_post, (Post.__getstate__(self),))
+        return (copyreg.__newobj__, (StoredPost,),
+            (self.post_code, self.post_title, self.creation_micros, self.update_micros, self.offset, self.length))
+
+    def __setstate__(self, state):
+        ''' restore a pickled location, the DAO attaches the text file after loading '''
+        self.post_code, self.post_title, self.creation_micros, self.update_micros, self.offset, self.length = state
+        self.text_file = None
+
+class PostDAOMmap(PostDAOLog):
+    ''' post DAO keeping titles and timestamps in memory and texts in a memory-mapped append-only file,
+    texts of updated and deleted posts stay in the file, which is never rewritten '''
+
+    file_suffix = '.meta'
+    # only metadata is resident, texts are paged in by the operating system
+    in_memory = False
+
+    def __init__(self, blog, autosave=None, path=None):
+        ''' construct the DAO, mapping the text file of the blog when autosave is on '''
+        super().__init__(blog, autosave, path)
+        # texts stay in the text file uncompressed, so searches can scan the mapping
+        self.compression.method = None
+        if not self.autosave:
+            self.text_file = TextFile()
+            self.index_offsets()
+
+    def load(self):
+        ''' load titles and text locations, then attach them to the text file '''
+        self.text_file = TextFile(os.path.join(os.path.dirname(self.log_file), str(self.blog.id) + '.text'))
+        super().load()
+        self.index_offsets()
+
+    def index_offsets(self):
+        ''' attach the loaded posts to the text file and sort their offsets for searches '''
+        for post in self.posts.values():
+            if isinstance(post, StoredPost):
+                post.text_file = self.text_file
+        located = sorted((post.offset, post.post_code) for post in self.posts.values()
+            if isinstance(post, StoredPost) and post.offset is not None and post.length)
+        # text offsets in file order and the post written at each, stale entries are skipped by searches
+        self.offsets = [offset for offset, _ in located]
+        self.offset_codes = [post_code for _, post_code in located]
+
+    def store(self, posts, update_micros=None):
+        ''' append the texts of posts to the text file, returns them as stored posts '''
+        spans = self.text_file.append([post.post_text for post in posts], self.fsync)
+        stored = []
+        for post, (offset, length) in zip(posts, spans):
+            stored.append(StoredPost(post.post_code, post.post_title, post.creation_micros,
+                update_micros or post.update_micros, self.text_file, offset, length))
+            if length:
+                self.offsets.append(offset)
+                self.offset_codes.append(post.post_code)
+        return stored
+
+    def create_post(self, post):
+        ''' create a post, appending its text to the text file and its metadata to the log '''
+        if post.post_code in self.posts:
+            return False
+        return super().create_post(self.store([post])[0])
+
+    def create_posts(self, posts):
+        ''' create a batch of posts with one write to the text file and one log record '''
+        if any(post.post_code in self.posts for post in posts):
+            return False
+        return super().create_posts(self.store(posts))
+
+    def retrieve_posts(self, search_term):
+        ''' retrieve posts whose title or text contain search_term, in creation order, scanning the mapping '''
+        posts = self.posts
+        if not search_term:
+            return list(posts.values())
+        found = {post.post_code for post in posts.values() if search_term in post.post_title}
+        if self.offsets:
+            # UTF-8 is self-synchronising, so a byte match is a character match
+            term = search_term.encode()
+            mapping = self.text_file.view()
+            offsets = self.offsets
+            position = mapping.find(term)
+            while position != -1:
+                index = bisect.bisect_right(offsets, position) - 1
+                post = posts.get(self.offset_codes[index]) if index >= 0 else None
+                if (post is not None and getattr(post, 'offset', None) == offsets[index]
+                        and position + len(term) <= post.offset + post.length):
+                    found.add(post.post_code)
+                    # the rest of this text cannot add anything
+                    position = mapping.find(term, post.offset + post.length)
+                else:
+                    position = mapping.find(term, position + 1)
+        return [post for post in posts.values() if post.post_code in found]
+
+    def update_if_exists(self, post_code, new_post_title, new_post_text):
+        ''' update a post, appending the new text, returns its previous (post_title, post_text) or None if missing '''
+        post = self.posts.get(post_code)
+        if post is None:
+            return None
+        previous = (post.post_title, post.post_text)
+        # posts already handed out keep reading their previous text
+        updated = self.store([Post(post_code, new_post_title, new_post_text)], now_micros())[0]
+        updated.creation_micros = post.creation_micros
+        self.posts[post_code] = updated
+        self.order.replace(updated)
+        self.change([updated])
+        return previous
+
+    def close(self):
+        ''' close the log and text files, posts already handed out stay readable '''
+        super().close()
+        self.text_file.view()
+        self.text_file.close()
\ No newline at end of file
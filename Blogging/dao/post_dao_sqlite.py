@@ -0,0 +1,127 @@
+import sqlite3
+from blogging.post import Post, now_micros
+from blogging.dao.sqlite_database import connect, fts_phrase, transaction, use_fts
+
+POST_COLUMNS = 'post.post_code, post.post_title, post.post_text, post.creation_time, post.update_time'
+
+def make_post(row):
+    ''' build a post from a database row '''
+    post = Post(row[0], row[1], row[2])
+    post.creation_micros = row[3]
+    post.update_micros = row[4]
+    return post
+
+class PostDAOSQLite():
+    ''' post DAO backed by SQLite, with posts searched through a trigram full-text index '''
+
+    # posts stay on disk, so caching the DAO costs next to no memory
+    in_memory = False
+
+    def __init__(self, blog, autosave=None, database_file=None):
+        ''' construct the DAO for the posts of blog '''
+        self.blog = blog
+        self.connection = connect(autosave, database_file)
+
+    @property
+    def counter(self):
+        ''' highest post code ever assigned in the blog '''
+        row = self.connection.execute('SELECT counter FROM post_counter WHERE blog_id = ?', (self.blog.id,)).fetchone()
+        return row[0] if row else 0
+
+    def flush(self):
+        ''' commit the pending writes '''
+        self.connection.flush()
+
+    def search_post(self, post_code):
+        ''' search a post by its code '''
+        row = self.connection.execute('SELECT ' + POST_COLUMNS + ' FROM post WHERE blog_id = ? AND post_code = ?',
+            (self.blog.id, post_code)).fetchone()
+        return make_post(row) if row else None
+
+    def create_post(self, post):
+        ''' create a post, returns False if its code is taken '''
+        with transaction(self.connection):
+            cursor = self.connection.execute('INSERT OR IGNORE INTO post VALUES (?, ?, ?, ?, ?, ?)',
+                (self.blog.id, post.post_code, post.post_title, post.post_text,
+                post.creation_micros, post.update_micros))
+            if cursor.rowcount != 1:
+                return False
+            self.connection.execute('INSERT INTO post_counter VALUES (?, ?) ON CONFLICT (blog_id) '
+                'DO UPDATE SET counter = max(counter, excluded.counter)', (self.blog.id, post.post_code))
+        return True
+
+    def create_posts(self, posts):
+        ''' create a batch of posts with unused codes in one transaction '''
+        if not posts:
+            return True
+        try:
+            with transaction(self.connection):
+                self.connection.executemany('INSERT INTO post VALUES (?, ?, ?, ?, ?, ?)',
+                    ((self.blog.id, post.post_code, post.post_title, post.post_text,
+                    post.creation_micros, post.update_micros) for post in posts))
+                self.connection.execute('INSERT INTO post_counter VALUES (?, ?) ON CONFLICT (blog_id) '
+                    'DO UPDATE SET counter = max(counter, excluded.counter)',
+                    (self.blog.id, max(post.post_code for post in posts)))
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def retrieve_posts(self, search_term):
+        ''' retrieve posts whose title or text contain search_term, in creation order '''
+        if use_fts(search_term):
+            rows = self.connection.execute('SELECT ' + POST_COLUMNS + ' FROM post_fts '
+                'JOIN post ON post.rowid = post_fts.rowid WHERE post_fts MATCH ? AND post.blog_id = ? '
+                'AND (instr(post.post_title, ?) > 0 OR instr(post.post_text, ?) > 0) ORDER BY post.post_code',
+                ('{post_title post_text} : ' + fts_phrase(search_term), self.blog.id, search_term, search_term))
+        else:
+            rows = self.connection.execute('SELECT ' + POST_COLUMNS + ' FROM post WHERE blog_id = ? '
+                'AND (instr(post_title, ?) > 0 OR instr(post_text, ?) > 0) ORDER BY post_code',
+                (self.blog.id, search_term, search_term))
+        return [make_post(row) for row in rows]
+
+    def update_post(self, post_code, new_post_title, new_post_text):
+        ''' update the title and text of a post '''
+        cursor = self.connection.write('UPDATE post SET post_title = ?, post_text = ?, update_time = ? '
+            'WHERE blog_id = ? AND post_code = ?',
+            (new_post_title, new_post_text, now_micros(), self.blog.id, post_code))
+        return cursor.rowcount == 1
+
+    def update_if_exists(self, post_code, new_post_title, new_post_text):
+        ''' update a post, returns its previous (post_title, post_text) or None if missing '''
+        with transaction(self.connection):
+            previous = self.connection.execute('SELECT post_title, post_text FROM post WHERE blog_id = ? AND post_code = ?',
+                (self.blog.id, post_code)).fetchone()
+            if previous is not None:
+                self.update_post(post_code, new_post_title, new_post_text)
+        return previous
+
+    def delete_post(self, post_code):
+        ''' delete a post '''
+        cursor = self.connection.write('DELETE FROM post WHERE blog_id = ? AND post_code = ?', (self.blog.id, post_code))
+        return cursor.rowcount == 1
+
+    def delete_if_exists(self, post_code):
+        ''' delete a post with one statement, returns the deleted post or None if missing '''
+        rows = self.connection.write_returning('DELETE FROM post WHERE blog_id = ? AND post_code = ? RETURNING '
+            + POST_COLUMNS.replace('post.', ''), (self.blog.id, post_code))
+        return make_post(rows[0]) if rows else None
+
+    def list_posts(self):
+        ''' list all posts, newest first '''
+        rows = self.connection.execute('SELECT ' + POST_COLUMNS + ' FROM post WHERE blog_id = ? ORDER BY post_code DESC',
+            (self.blog.id,))
+        return [make_post(row) for row in rows]
+
+    def iter_posts(self, after=None, limit=None):
+        ''' yield posts newest first, older than the post coded after, at most limit of them '''
+        query = 'SELECT ' + POST_COLUMNS + ' FROM post WHERE blog_id = ?'
+        parameters = [self.blog.id]
+        if after is not None:
+            query += ' AND post_code < ?'
+            parameters.append(after)
+        query += ' ORDER BY post_code DESC'
+        if limit is not None:
+            query += ' LIMIT ?'
+            parameters.append(limit)
+        for row in self.connection.execute(query, parameters):
+            yield make_post(row)
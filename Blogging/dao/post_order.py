@@ -0,0 +1,203 @@
+import bisect
+import itertools
+from collections.abc import Sequence
+
+# posts per block: a change moves or copies at most a block of posts, a view copies one reference per block
+BLOCK_SIZE = 512
+
+class PostListView(Sequence):
+    ''' read-only list of a blog's posts newest first, over the blocks of the order it was taken from without
+    copying them; the order never changes these blocks in place once a view holds them '''
+
+    __slots__ = ('blocks', 'count', 'starts')
+
+    def __init__(self, blocks, count):
+        ''' construct a view of blocks, lists of posts oldest first, holding count posts in all '''
+        self.blocks = blocks
+        self.count = count
+        # position of the first post of each block counting from the oldest, built by the first indexing
+        self.starts = None
+
+    def __len__(self):
+        return self.count
+
+    def locate(self, position):
+        ''' block and offset of the post at position counting from the oldest, position count is past the last '''
+        last = len(self.blocks) - 1
+        start = self.count - len(self.blocks[last])
+        if position >= start:
+            # the newest posts, read most, are found without the starts of every block
+            return last, position - start
+        starts = self.starts
+        if starts is None:
+            starts = self.starts = list(itertools.accumulate((len(block) for block in self.blocks[:-1]), initial=0))
+        block = bisect.bisect_right(starts, position) - 1
+        return block, position - starts[block]
+
+    def iter_from(self, block, offset):
+        ''' the posts before offset in block and those of every block before it, newest first '''
+        blocks = self.blocks
+        return itertools.chain(reversed(blocks[block][:offset]),
+            itertools.chain.from_iterable(reversed(blocks[earlier]) for earlier in range(block - 1, -1, -1)))
+
+    def __getitem__(self, index):
+        ''' the post at index counting from the newest, or a list of posts for a slice '''
+        count = self.count
+        if isinstance(index, slice):
+            start, stop, step = index.indices(count)
+            if step == 1:
+                if start >= stop:
+                    return []
+                block, offset = self.locate(count - start)
+                if offset >= stop - start:
+                    # within one block, as a page of the newest posts usually is
+                    return self.blocks[block][offset - (stop - start):offset][::-1]
+                return list(itertools.islice(self.iter_from(block, offset), stop - start))
+            return [self[position] for position in range(start, stop, step)]
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError('post list index out of range')
+        block, offset = self.locate(count - 1 - index)
+        return self.blocks[block][offset]
+
+    def __iter__(self):
+        if not self.blocks:
+            return iter(())
+        return self.iter_from(len(self.blocks) - 1, len(self.blocks[-1]))
+
+    def __reversed__(self):
+        return itertools.chain.from_iterable(self.blocks)
+
+    def __eq__(self, other):
+        ''' equal to a list or view holding equal posts in the same order '''
+        if not isinstance(other, (list, PostListView)):
+            return NotImplemented
+        return len(self) == len(other) and all(post == other_post for post, other_post in zip(self, other))
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(list(self))
+
+class PostOrder():
+    ''' a blog's posts in creation order, for listing and paging through them newest first; posts are kept in blocks
+    found by bisection on their first codes, so a change costs a bisection and the moves within one block, plus
+    a copy of that block if a view still reads it '''
+
+    def __init__(self, posts=()):
+        ''' construct the order from posts listed oldest first '''
+        posts = list(posts)
+        self.blocks = [posts[start:start + BLOCK_SIZE] for start in range(0, len(posts), BLOCK_SIZE)]
+        # codes only grow, so every block and the blocks between them stay sorted by code
+        self.codes = [[post.post_code for post in block] for block in self.blocks]
+        # code of the first post of each block
+        self.firsts = [codes[0] for codes in self.codes]
+        self.count = len(posts)
+        # ids of the blocks created since the latest view was taken, the only ones changed in place
+        self.owned = {id(block) for block in self.blocks}
+
+    def own(self, block):
+        ''' the posts of block, copied first if a view may still read them '''
+        posts = self.blocks[block]
+        if id(posts) not in self.owned:
+            posts = self.blocks[block] = posts[:]
+            self.owned.add(id(posts))
+        return posts
+
+    def append(self, post):
+        ''' record a newly created post '''
+        if self.codes and len(self.codes[-1]) < BLOCK_SIZE:
+            self.own(len(self.blocks) - 1).append(post)
+            self.codes[-1].append(post.post_code)
+        else:
+            block = [post]
+            self.owned.add(id(block))
+            self.blocks.append(block)
+            self.codes.append([post.post_code])
+            self.firsts.append(post.post_code)
+        self.count += 1
+
+    def extend(self, posts):
+        ''' record a batch of newly created posts '''
+        for post in posts:
+            self.append(post)
+
+    def position(self, post_code):
+        ''' the block and offset of the post coded post_code, or None if it is not recorded '''
+        block = bisect.bisect_right(self.firsts, post_code) - 1
+        if block < 0:
+            return None
+        codes = self.codes[block]
+        offset = bisect.bisect_left(codes, post_code)
+        if offset < len(codes) and codes[offset] == post_code:
+            return block, offset
+        return None
+
+    def get(self, post_code):
+        ''' the post coded post_code, or None if it is not recorded '''
+        position = self.position(post_code)
+        if position is None:
+            return None
+        block, offset = position
+        return self.blocks[block][offset]
+
+    def remove(self, post_code):
+        ''' forget a deleted post '''
+        position = self.position(post_code)
+        if position is None:
+            return
+        block, offset = position
+        del self.own(block)[offset]
+        codes = self.codes[block]
+        del codes[offset]
+        self.count -= 1
+        if not codes:
+            self.owned.discard(id(self.blocks[block]))
+            del self.blocks[block], self.codes[block], self.firsts[block]
+        else:
+            self.firsts[block] = codes[0]
+            if len(codes) < BLOCK_SIZE // 4:
+                self.merge(block)
+
+    def merge(self, block):
+        ''' join a block left small by deletions with a neighbour it fits in, so blocks stay few '''
+        for left in (block - 1, block):
+            right = left + 1
+            if left >= 0 and right < len(self.blocks) and len(self.codes[left]) + len(self.codes[right]) <= BLOCK_SIZE:
+                self.owned.discard(id(self.blocks[left]))
+                self.owned.discard(id(self.blocks[right]))
+                posts = self.blocks[left] + self.blocks[right]
+                self.owned.add(id(posts))
+                self.blocks[left:right + 1] = [posts]
+                self.codes[left:right + 1] = [self.codes[left] + self.codes[right]]
+                del self.firsts[right]
+                return
+
+    def replace(self, post):
+        ''' record a new object for an existing post, keeping its place '''
+        position = self.position(post.post_code)
+        if position is not None:
+            block, offset = position
+            self.own(block)[offset] = post
+
+    def newest(self):
+        ''' a view of all posts newest first, unaffected by later changes '''
+        # the view holds every current block, changes copy a block before touching it
+        self.owned = set()
+        return PostListView(self.blocks[:], self.count)
+
+    def iter_newest(self, after=None, limit=None):
+        ''' iterate posts newest first, starting below the code after, at most limit of them '''
+        if limit is not None and limit <= 0 or not self.blocks:
+            return iter(())
+        if after is None:
+            block, offset = len(self.blocks) - 1, len(self.codes[-1])
+        else:
+            block = bisect.bisect_left(self.firsts, after) - 1
+            if block < 0:
+                return iter(())
+            offset = bisect.bisect_left(self.codes[block], after)
+        # the iterator is read lazily, after the lock is released
+        posts = self.newest().iter_from(block, offset)
+        return posts if limit is None else itertools.islice(posts, limit)
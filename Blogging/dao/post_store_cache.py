@@ -0,0 +1,248 @@
+import atexit
+import threading
+import weakref
+from collections import OrderedDict
+from blogging.configuration import Configuration
+from blogging.post import Post
+from blogging.rwlock import blog_locks
+
+# rough per-post bookkeeping cost on top of its title and text
+POST_OVERHEAD_BYTES = 200
+
+def post_bytes(post):
+    ''' estimated memory held by one loaded post, whose text may be held compressed '''
+    if type(post) is not Post:
+        # posts holding their text compressed tell how much of it is resident
+        resident_bytes = getattr(post, 'resident_bytes', None)
+        if resident_bytes is not None:
+            return POST_OVERHEAD_BYTES + len(post.post_title) + resident_bytes()
+    return POST_OVERHEAD_BYTES + len(post.post_title) + len(post.post_text)
+
+class SearchIndex():
+    ''' word index of the posts of a store without one of its own, valid until the blog is written again '''
+
+    __slots__ = ('lock', 'writes', 'index', 'by_code', 'size')
+
+    def __init__(self, post_dao, lock):
+        ''' index the posts of post_dao, read under the blog lock lock '''
+        # the word index is only imported by the first search needing it
+        from blogging.index.word_index import WordIndex
+        posts = post_dao.list_posts()
+        self.index = WordIndex()
+        self.by_code = {}
+        for post in reversed(posts):
+            self.index.add(post.post_code, post.post_title, post.post_text)
+            self.by_code[post.post_code] = post
+        # the lock is kept with the index, so its count of writes lasts as long as the index
+        self.lock = lock
+        self.writes = lock.writes
+        # the index holds the texts, counted against the cache budget whatever the store keeps on disk
+        self.size = sum(post_bytes(post) for post in posts)
+
+    def current(self, lock):
+        ''' checks whether the blog, guarded by lock, was not written since the index was built '''
+        return self.lock is lock and self.writes == lock.writes
+
+    def search(self, query, mode, case_sensitive, limit):
+        ''' posts matching query, best ranked first '''
+        by_code = self.by_code
+        return [by_code[post_code] for post_code in self.index.search(query, mode, case_sensitive, limit)]
+
+class PostStoreCache():
+    ''' process-wide LRU cache of loaded post stores, keyed by blog id '''
+
+    def __init__(self, max_entries=None, max_bytes=None):
+        ''' construct a cache bounded by number of stores and estimated bytes (None is unbounded) '''
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # blog id -> [post_dao, estimated bytes], least recently used first
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        # stores private to one Blog object, which hold unsaved posts and are never evicted
+        self.private = weakref.WeakSet()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # guards the entries, which every post access reorders
+        self.lock = threading.RLock()
+        # blog id -> lock held while its store loads, so stores of different blogs load in parallel
+        self.loading = {}
+        # bumped by every invalidation, a store loaded across one is not cached
+        self.invalidations = 0
+
+    def __len__(self):
+        ''' number of post stores currently resident '''
+        return len(self.entries) + len(self.private)
+
+    def get(self, blog):
+        ''' the post store of blog, loading it on a miss '''
+        with self.lock:
+            entry = self.entries.get(blog.id)
+            if entry is not None:
+                self.hits += 1
+                self.entries.move_to_end(blog.id)
+                return entry[0]
+            loading = self.loading.get(blog.id)
+            if loading is None:
+                loading = self.loading[blog.id] = threading.Lock()
+        with loading:
+            with self.lock:
+                # another thread may have loaded it meanwhile
+                entry = self.entries.get(blog.id)
+                if entry is not None:
+                    self.hits += 1
+                    self.entries.move_to_end(blog.id)
+                    return entry[0]
+                self.misses += 1
+                invalidations = self.invalidations
+            # the backends are only imported once a blog's posts are first read
+            from blogging.dao.post_dao_factory import create_post_dao
+            post_dao = create_post_dao(blog)
+            size = self.measure(post_dao) if self.max_bytes is not None else 0
+            with self.lock:
+                self.loading.pop(blog.id, None)
+                if self.invalidations != invalidations:
+                    # the blog may have been deleted or renamed while loading
+                    return post_dao
+                self.entries[blog.id] = [post_dao, size]
+                self.total_bytes += size
+                self.evict()
+            return post_dao
+
+    def private_store(self, blog):
+        ''' the store private to one Blog object, created once and counted as resident '''
+        with self.lock:
+            if blog._post_dao is None:
+                from blogging.dao.post_dao_factory import create_post_dao
+                blog._post_dao = create_post_dao(blog)
+                self.private.add(blog._post_dao)
+            return blog._post_dao
+
+    def measure(self, post_dao):
+        ''' estimated bytes held by a store, zero for stores that keep posts on disk '''
+        if not getattr(post_dao, 'in_memory', True):
+            return 0
+        return sum(post_bytes(post) for post in post_dao.list_posts())
+
+    def charge(self, blog, delta, held=False):
+        ''' account for delta bytes written to the cached store of blog, or held in memory along with it if held '''
+        if self.max_bytes is None:
+            return
+        with self.lock:
+            entry = self.entries.get(blog.id)
+            if entry is not None and (held or getattr(entry[0], 'in_memory', True)):
+                entry[1] += delta
+                self.total_bytes += delta
+                self.evict()
+
+    def search_index(self, blog, post_dao, lock):
+        ''' the word index of post_dao, the store of blog, built again once the blog was written; called under
+        the blog lock lock, held shared; an index is charged to the cache budget when it replaces the previous one,
+        so readers building one at the same time charge it once '''
+        built = getattr(post_dao, 'search_index', None)
+        if built is not None and built.current(lock):
+            return built
+        fresh = SearchIndex(post_dao, lock)
+        with self.lock:
+            built = getattr(post_dao, 'search_index', None)
+            if built is not None and built.current(lock):
+                # another reader swapped its index in meanwhile
+                return built
+            post_dao.search_index = fresh
+            entry = self.entries.get(blog.id)
+            if entry is not None and entry[0] is post_dao:
+                # a private store is not counted against the budget, nor is its index
+                self.charge(blog, fresh.size - (built.size if built is not None else 0), held=True)
+        return fresh
+
+    def invalidate(self, blog_id):
+        ''' drop the cached store of a blog, e.g. after the blog is deleted, once writers using it are done '''
+        # the blog lock is taken before the cache lock, in the order of post accesses
+        with blog_locks.get(blog_id).write():
+            with self.lock:
+                self.invalidations += 1
+                entry = self.entries.pop(blog_id, None)
+                if entry is not None:
+                    self.total_bytes -= entry[1]
+                    self.close(entry[0])
+                return entry is not None
+
+    def evict(self):
+        ''' evict least recently used stores until the cache is within budget, keeping the newest and stores in use '''
+        if not self.over_budget():
+            return
+        for blog_id in list(self.entries)[:-1]:
+            if self.drop(blog_id):
+                self.evictions += 1
+                if not self.over_budget():
+                    break
+
+    def over_budget(self):
+        ''' checks whether the cache holds more than its budgets allow '''
+        return ((self.max_entries is not None and len(self.entries) > self.max_entries) or
+            (self.max_bytes is not None and self.total_bytes > self.max_bytes))
+
+    def release(self, keep=0):
+        ''' release least recently used stores until at most keep remain cached, skipping stores in use '''
+        released = 0
+        with self.lock:
+            for blog_id in list(self.entries)[:max(len(self.entries) - keep, 0)]:
+                if self.drop(blog_id):
+                    released += 1
+        return released
+
+    def drop(self, blog_id):
+        ''' drop and close the cached store of blog_id unless its blog lock is held, returns whether it did;
+        called under the cache lock, which post accesses take while holding their blog lock, so it does not wait
+        for the blog lock and leaves a store a writer is using to the next eviction '''
+        with blog_locks.get(blog_id).try_write() as taken:
+            if taken:
+                post_dao, size = self.entries.pop(blog_id)
+                self.total_bytes -= size
+                self.close(post_dao)
+            return taken
+
+    def close(self, post_dao):
+        ''' let an evicted store release its files '''
+        close = getattr(post_dao, 'close', None)
+        if close is not None:
+            close()
+
+    def flush(self):
+        ''' write the changes pending in every cached store '''
+        with self.lock:
+            entries = [(blog_id, entry[0]) for blog_id, entry in self.entries.items()]
+        for blog_id, post_dao in entries:
+            flush = getattr(post_dao, 'flush', None)
+            if flush is not None:
+                with blog_locks.get(blog_id).write():
+                    flush()
+
+    def stats(self):
+        ''' hit, miss and eviction counters and current usage '''
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'entries': len(self.entries), 'bytes': self.total_bytes}
+
+# only stores persisted under autosave are cached by blog id; evicting them loses nothing
+post_stores = PostStoreCache(getattr(Configuration, 'post_store_cache_entries', None),
+    getattr(Configuration, 'post_store_cache_bytes', None))
+
+def resident_post_stores():
+    ''' number of post stores currently resident in memory '''
+    return len(post_stores)
+
+def release_post_stores(keep=0):
+    ''' release cached post stores, e.g. under memory pressure, keeping the keep most recently used '''
+    return post_stores.release(keep)
+
+def flush_post_stores():
+    ''' write the changes pending in every cached post store '''
+    post_stores.flush()
+
+# batched changes of users who never logged out are written when the process exits
+atexit.register(flush_post_stores)
+
+def post_store_stats():
+    ''' hit, miss and eviction counters of the post store cache '''
+    return post_stores.stats()
@@ -0,0 +1,271 @@
+import atexit
+import heapq
+import multiprocessing
+import os
+import sqlite3
+import threading
+import weakref
+import zlib
+from blogging.blog import Blog
+from blogging.configuration import Configuration
+from blogging.dao.blog_dao_sqlite import BlogDAOSQLite
+from blogging.dao.sqlite_database import fts_phrase, use_fts
+
+# settings a worker copies from the configuration of the process that started it
+WORKER_SETTINGS = ('autosave', 'autosave_batch_records', 'autosave_interval')
+
+# database file -> sharded catalog shared by the controllers of this process
+catalogs = {}
+catalogs_lock = threading.Lock()
+
+def shard_of(blog_id, shards):
+    ''' the shard holding blog_id, the same in every process and run '''
+    return zlib.crc32(repr(blog_id).encode()) % shards
+
+def shard_file(database_file, number):
+    ''' the database file of one shard '''
+    base, extension = os.path.splitext(database_file)
+    return '%s.shard%d%s' % (base, number, extension or '.db')
+
+class ShardBlogDAO(BlogDAOSQLite):
+    ''' blog DAO of one shard, whose rowids are the catalog-wide sequence numbers of its blogs '''
+
+    def make_blog(self, row):
+        ''' build a blog from a database row, blogs sent to the coordinator are copies and are not tracked '''
+        return Blog(*row)
+
+    def create_ordered(self, blog, sequence):
+        ''' create a blog at position sequence of the catalog, returns False if its id is taken '''
+        cursor = self.connection.write('INSERT OR IGNORE INTO blog (rowid, id, name, url, email) VALUES (?, ?, ?, ?, ?)',
+            (sequence, blog.id, blog.name, blog.url, blog.email))
+        return cursor.rowcount == 1
+
+    def rename_ordered(self, key, blog, sequence):
+        ''' give the blog stored under key a new id, data and position sequence '''
+        try:
+            cursor = self.connection.write('UPDATE blog SET rowid = ?, id = ?, name = ?, url = ?, email = ? WHERE id = ?',
+                (sequence, blog.id, blog.name, blog.url, blog.email, key))
+        except sqlite3.IntegrityError:
+            # the new id is taken
+            return False
+        return cursor.rowcount == 1
+
+    def sequence_of(self, key):
+        ''' position of the blog stored under key, None if it is missing '''
+        row = self.connection.execute('SELECT rowid FROM blog WHERE id = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def last_sequence(self):
+        ''' highest position held by this shard, 0 when it is empty '''
+        return self.connection.execute('SELECT coalesce(max(rowid), 0) FROM blog').fetchone()[0]
+
+    def retrieve_ordered(self, search_term):
+        ''' (position, blog) of the blogs whose name contains search_term, by position '''
+        if use_fts(search_term):
+            rows = self.connection.execute('SELECT blog.rowid, blog.id, blog.name, blog.url, blog.email FROM blog_fts '
+                'JOIN blog ON blog.rowid = blog_fts.rowid WHERE blog_fts MATCH ? AND instr(blog.name, ?) > 0 '
+                'ORDER BY blog.rowid', (fts_phrase(search_term), search_term))
+        else:
+            rows = self.connection.execute('SELECT rowid, id, name, url, email FROM blog WHERE instr(name, ?) > 0 '
+                'ORDER BY rowid', (search_term,))
+        return [(row[0], Blog(*row[1:])) for row in rows]
+
+    def list_ordered(self):
+        ''' (position, blog) of every blog of the shard, by position '''
+        rows = self.connection.execute('SELECT rowid, id, name, url, email FROM blog ORDER BY rowid')
+        return [(row[0], Blog(*row[1:])) for row in rows]
+
+def serve(connection, database_file, settings):
+    ''' worker process loop: run each (method, arguments) received on the shard's DAO and send back the result '''
+    for name, value in settings.items():
+        setattr(Configuration, name, value)
+    blog_dao = ShardBlogDAO(settings['autosave'], database_file)
+    while True:
+        try:
+            request = connection.recv()
+        except EOFError:
+            # the coordinator is gone
+            request = None
+        if request is None:
+            blog_dao.flush()
+            return
+        method, arguments = request
+        try:
+            connection.send((True, getattr(blog_dao, method)(*arguments)))
+        except Exception as exception:
+            connection.send((False, exception))
+
+class Shard():
+    ''' a worker process serving one shard, called by one thread at a time '''
+
+    def __init__(self, context, database_file, settings):
+        ''' start the worker of the shard stored in database_file '''
+        self.connection, worker_connection = context.Pipe()
+        self.process = context.Process(target=serve, args=(worker_connection, database_file, settings),
+            name='blogging-shard', daemon=True)
+        self.process.start()
+        worker_connection.close()
+        self.lock = threading.Lock()
+
+    def send(self, method, arguments):
+        self.connection.send((method, arguments))
+
+    def receive(self):
+        ''' the result of the request sent last, raising what the worker raised '''
+        success, result = self.connection.recv()
+        if not success:
+            raise result
+        return result
+
+    def call(self, method, *arguments):
+        ''' run method of the shard's DAO in its worker '''
+        with self.lock:
+            self.send(method, arguments)
+            return self.receive()
+
+    def close(self):
+        ''' stop the worker once it has written its pending changes '''
+        with self.lock:
+            if self.process.is_alive():
+                self.connection.send(None)
+                self.process.join()
+            self.connection.close()
+
+def stop_shards(shards):
+    ''' stop the workers of a catalog, each writing its pending changes first '''
+    for shard in shards:
+        shard.close()
+
+class ShardedBlogDAO():
+    ''' blog DAO partitioning blogs by a hash of their id across shards, each stored and searched by its own
+    worker process; every blog carries a catalog-wide sequence number, so listings merge back into stored order '''
+
+    def __init__(self, autosave=None, database_file=None, shards=None):
+        ''' start one worker per shard, over shard files next to the blogging database when autosave is on '''
+        autosave = Configuration.autosave if autosave is None else autosave
+        database_file = database_file or getattr(Configuration, 'database_file', 'blogging.db')
+        count = shards or getattr(Configuration, 'blog_shards', None) or 4
+        settings = {name: getattr(Configuration, name, None) for name in WORKER_SETTINGS}
+        settings['autosave'] = autosave
+        # spawned workers do not inherit locks held by this process's threads
+        context = multiprocessing.get_context(getattr(Configuration, 'shard_start_method', None) or 'spawn')
+        if autosave:
+            os.makedirs(os.path.dirname(database_file) or '.', exist_ok=True)
+        self.shards = [Shard(context, shard_file(database_file, number), settings) for number in range(count)]
+        # guards the sequence and keeps moves between shards from interleaving
+        self.lock = threading.Lock()
+        self.sequence = max(self.fan_out('last_sequence'))
+        self.closed = False
+        # stops the workers once the catalog is no longer referenced, e.g. a controller's own catalog without
+        # autosave; it holds the shards rather than the catalog, so registering it with atexit keeps nothing alive,
+        # and registered after the workers started it runs before multiprocessing terminates them at exit
+        self.finalizer = weakref.finalize(self, stop_shards, self.shards)
+        self.finalizer.atexit = False
+        atexit.register(self.finalizer)
+
+    def shard(self, blog_id):
+        return self.shards[shard_of(blog_id, len(self.shards))]
+
+    def fan_out(self, method, *arguments):
+        ''' run method on every shard at once, returns their results in shard order '''
+        # locks are always taken in shard order, so concurrent fan-outs cannot deadlock
+        for shard in self.shards:
+            shard.lock.acquire()
+        try:
+            for shard in self.shards:
+                shard.send(method, arguments)
+            results = []
+            error = None
+            for shard in self.shards:
+                # every reply is read, so no shard is left with a stale one
+                try:
+                    results.append(shard.receive())
+                except Exception as exception:
+                    error = error or exception
+            if error is not None:
+                raise error
+            return results
+        finally:
+            for shard in self.shards:
+                shard.lock.release()
+
+    def merge(self, results):
+        ''' blogs of the per-shard (position, blog) lists, in catalog order '''
+        return [blog for _, blog in heapq.merge(*results, key=lambda entry: entry[0])]
+
+    def next_sequence(self):
+        with self.lock:
+            self.sequence += 1
+            return self.sequence
+
+    def search_blog(self, key):
+        ''' search a blog by its id '''
+        return self.shard(key).call('search_blog', key)
+
+    def create_blog(self, blog):
+        ''' create a blog at the end of the catalog, returns False if its id is taken '''
+        return self.shard(blog.id).call('create_ordered', blog, self.next_sequence())
+
+    def retrieve_blogs(self, search_term):
+        ''' retrieve blogs whose name contains search_term, searching every shard at once, in the order they were stored '''
+        return self.merge(self.fan_out('retrieve_ordered', search_term))
+
+    def update_blog(self, key, blog):
+        ''' update the blog stored under key, keeping its place '''
+        if self.shard(key) is self.shard(blog.id):
+            return self.shard(key).call('update_blog', key, blog)
+        return self.move(key, blog, None)
+
+    def rename_blog(self, key, blog):
+        ''' give the blog stored under key a new id and data, moving it to the end as a re-creation would '''
+        if self.shard(key) is self.shard(blog.id):
+            return self.shard(key).call('rename_ordered', key, blog, self.next_sequence())
+        return self.move(key, blog, self.next_sequence())
+
+    def move(self, key, blog, sequence):
+        ''' move the blog stored under key to the shard of its new id, at sequence or at its current place if None;
+        it is created before being deleted, so a crash in between leaves it under both ids rather than none '''
+        source, target = self.shard(key), self.shard(blog.id)
+        with self.lock:
+            if sequence is None:
+                sequence = source.call('sequence_of', key)
+                if sequence is None:
+                    return False
+            if not target.call('create_ordered', blog, sequence):
+                return False
+            if not source.call('delete_blog', key):
+                target.call('delete_blog', blog.id)
+                return False
+        return True
+
+    def delete_blog(self, key):
+        ''' delete a blog '''
+        return self.shard(key).call('delete_blog', key)
+
+    def list_blogs(self):
+        ''' list all blogs in the order they were stored, reading every shard at once '''
+        return self.merge(self.fan_out('list_ordered'))
+
+    def flush(self):
+        ''' commit the pending writes of every shard '''
+        self.fan_out('flush')
+
+    def close(self):
+        ''' stop the workers, each writing its pending changes first '''
+        if not self.closed:
+            self.closed = True
+            atexit.unregister(self.finalizer)
+            self.finalizer()
+
+def open_sharded_blog_dao(autosave=None, database_file=None):
+    ''' the sharded catalog of the blogging database, shared by this process's controllers when autosave is on;
+    without autosave every catalog is a new in-memory one, its workers stopped once it is no longer referenced '''
+    autosave = Configuration.autosave if autosave is None else autosave
+    if not autosave:
+        return ShardedBlogDAO(False)
+    database_file = database_file or getattr(Configuration, 'database_file', 'blogging.db')
+    with catalogs_lock:
+        catalog = catalogs.get(database_file)
+        if catalog is None or catalog.closed:
+            catalog = catalogs[database_file] = ShardedBlogDAO(True, database_file)
+    return catalog
\ No newline at end of file
@@ -0,0 +1,203 @@
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from blogging.configuration import Configuration
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS blog (
+    id PRIMARY KEY,
+    name TEXT NOT NULL,
+    url TEXT NOT NULL,
+    email TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS post (
+    blog_id NOT NULL,
+    post_code INTEGER NOT NULL,
+    post_title TEXT NOT NULL,
+    post_text TEXT NOT NULL,
+    creation_time INTEGER NOT NULL,
+    update_time INTEGER NOT NULL,
+    PRIMARY KEY (blog_id, post_code)
+);
+CREATE TABLE IF NOT EXISTS post_counter (
+    blog_id PRIMARY KEY,
+    counter INTEGER NOT NULL
+);
+'''
+
+# trigram full-text indexes kept in sync with their content tables by triggers
+FTS_SCHEMA = '''
+CREATE VIRTUAL TABLE IF NOT EXISTS blog_fts USING fts5(
+    name, content='blog', content_rowid='rowid', tokenize='trigram case_sensitive 1');
+CREATE TRIGGER IF NOT EXISTS blog_fts_insert AFTER INSERT ON blog BEGIN
+    INSERT INTO blog_fts(rowid, name) VALUES (new.rowid, new.name);
+END;
+CREATE TRIGGER IF NOT EXISTS blog_fts_delete AFTER DELETE ON blog BEGIN
+    INSERT INTO blog_fts(blog_fts, rowid, name) VALUES ('delete', old.rowid, old.name);
+END;
+CREATE TRIGGER IF NOT EXISTS blog_fts_update AFTER UPDATE ON blog BEGIN
+    INSERT INTO blog_fts(blog_fts, rowid, name) VALUES ('delete', old.rowid, old.name);
+    INSERT INTO blog_fts(rowid, name) VALUES (new.rowid, new.name);
+END;
+CREATE VIRTUAL TABLE IF NOT EXISTS post_fts USING fts5(
+    post_title, post_text, content='post', content_rowid='rowid', tokenize='trigram case_sensitive 1');
+CREATE TRIGGER IF NOT EXISTS post_fts_insert AFTER INSERT ON post BEGIN
+    INSERT INTO post_fts(rowid, post_title, post_text) VALUES (new.rowid, new.post_title, new.post_text);
+END;
+CREATE TRIGGER IF NOT EXISTS post_fts_delete AFTER DELETE ON post BEGIN
+    INSERT INTO post_fts(post_fts, rowid, post_title, post_text) VALUES ('delete', old.rowid, old.post_title, old.post_text);
+END;
+CREATE TRIGGER IF NOT EXISTS post_fts_update AFTER UPDATE ON post BEGIN
+    INSERT INTO post_fts(post_fts, rowid, post_title, post_text) VALUES ('delete', old.rowid, old.post_title, old.post_text);
+    INSERT INTO post_fts(rowid, post_title, post_text) VALUES (new.rowid, new.post_title, new.post_text);
+END;
+'''
+
+# trigram tokenizer needs SQLite 3.34
+FTS_AVAILABLE = sqlite3.sqlite_version_info >= (3, 34, 0)
+
+# shortest term the trigram index can answer, shorter terms are scanned
+FTS_MIN_TERM = 3
+
+# database file -> shared connection
+connections = {}
+connections_lock = threading.Lock()
+
+class Connection(sqlite3.Connection):
+    ''' connection shared between threads, whose writes and transactions do not interleave '''
+
+    def __init__(self, *args, **kwargs):
+        ''' open the connection '''
+        super().__init__(*args, **kwargs)
+        self.lock = threading.RLock()
+        # writes are committed together once this many are pending, or once the oldest is this many seconds old
+        self.batch_records = getattr(Configuration, 'autosave_batch_records', None) or 1
+        self.batch_interval = getattr(Configuration, 'autosave_interval', None)
+        self.pending = 0
+        self.pending_since = None
+        # transaction() blocks currently open, the batch is not committed inside one
+        self.nesting = 0
+        # the blog catalog read by list_blogs snapshots, loaded by the first listing and kept up to date by writes
+        self.blog_order = None
+        # data_version when it was loaded, which changes once another connection commits
+        self.blog_order_data_version = None
+
+    def batching(self):
+        ''' whether writes are grouped into batch transactions '''
+        return self.batch_records > 1 or self.batch_interval is not None
+
+    def write(self, sql, parameters=()):
+        ''' run one writing statement outside of other threads' transactions '''
+        with self.lock:
+            if not self.batching():
+                return self.execute(sql, parameters)
+            self.begin_batch()
+            cursor = self.execute(sql, parameters)
+            self.written()
+            return cursor
+
+    def write_returning(self, sql, parameters=()):
+        ''' run one writing statement with a RETURNING clause, returns its rows '''
+        with self.lock:
+            if self.batching():
+                self.begin_batch()
+            # the rows are fetched before the batch may commit, which needs the statement completed
+            rows = self.execute(sql, parameters).fetchall()
+            if self.batching():
+                self.written()
+            return rows
+
+    def begin_batch(self):
+        ''' open the batch transaction if none is open '''
+        if not self.in_transaction:
+            self.execute('BEGIN')
+            self.pending_since = time.monotonic()
+
+    def written(self):
+        ''' count one write into the batch, committing it once it is full or old enough '''
+        self.pending += 1
+        if self.nesting:
+            return
+        if self.pending >= self.batch_records or (self.batch_interval is not None
+                and time.monotonic() - self.pending_since >= self.batch_interval):
+            self.flush()
+
+    def flush(self):
+        ''' commit the pending writes '''
+        with self.lock:
+            if self.in_transaction:
+                self.execute('COMMIT')
+            self.pending = 0
+            self.pending_since = None
+
+def connect(autosave=None, database_file=None):
+    ''' connection to the blogging database, an in-memory one of its own when autosave is off '''
+    autosave = Configuration.autosave if autosave is None else autosave
+    if not autosave:
+        return open_database(':memory:')
+    database_file = database_file or getattr(Configuration, 'database_file', 'blogging.db')
+    with connections_lock:
+        connection = connections.get(database_file)
+        if connection is None:
+            os.makedirs(os.path.dirname(database_file) or '.', exist_ok=True)
+            connection = connections[database_file] = open_database(database_file)
+    return connection
+
+def flush_connections():
+    ''' commit the pending writes of every shared connection '''
+    with connections_lock:
+        shared = list(connections.values())
+    for connection in shared:
+        connection.flush()
+
+# the batch transaction would otherwise be rolled back when the process exits
+atexit.register(flush_connections)
+
+def open_database(database_file):
+    ''' open a database and create the schema if it is missing '''
+    connection = sqlite3.connect(database_file, isolation_level=None, check_same_thread=False, factory=Connection)
+    if database_file != ':memory:':
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+    connection.executescript(SCHEMA)
+    if FTS_AVAILABLE:
+        connection.executescript(FTS_SCHEMA)
+    return connection
+
+def fts_phrase(search_term):
+    ''' quote search_term as an FTS5 phrase '''
+    return '"' + search_term.replace('"', '""') + '"'
+
+def use_fts(search_term):
+    ''' whether search_term can be answered from the full-text index '''
+    return FTS_AVAILABLE and len(search_term) >= FTS_MIN_TERM
+
+@contextmanager
+def transaction(connection):
+    ''' run the enclosed statements as one transaction, or as one write of the batch transaction '''
+    with connection.lock:
+        if connection.batching():
+            connection.begin_batch()
+            connection.execute('SAVEPOINT write')
+            connection.nesting += 1
+            try:
+                yield connection
+            except BaseException:
+                connection.execute('ROLLBACK TO write')
+                connection.execute('RELEASE write')
+                raise
+            finally:
+                connection.nesting -= 1
+            connection.execute('RELEASE write')
+            connection.written()
+            return
+        connection.execute('BEGIN')
+        try:
+            yield connection
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
@@ -0,0 +1,22 @@
+import threading
+from blogging.dao.blog_dao_factory import create_blog_dao
+from blogging.rwlock import ReadWriteLock
+
+class BlogEngine():
+    ''' state shared by concurrent controller sessions: the blog catalog and the lock guarding it '''
+
+    def __init__(self, blog_dao=None):
+        ''' construct an engine over blog_dao, or over the configured blog DAO opened on first use '''
+        self._blog_dao = blog_dao
+        self.open_lock = threading.Lock()
+        # guards the blog catalog; each blog's posts are guarded by its own lock
+        self.catalog_lock = ReadWriteLock()
+
+    @property
+    def blog_dao(self):
+        ''' the blog DAO, loading the catalog the first time it is needed '''
+        if self._blog_dao is None:
+            with self.open_lock:
+                if self._blog_dao is None:
+                    self._blog_dao = create_blog_dao()
+        return self._blog_dao
\ No newline at end of file
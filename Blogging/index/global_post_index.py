@@ -0,0 +1,198 @@
+import threading
+from collections import OrderedDict
+from blogging.configuration import Configuration
+from blogging.dao.post_store_cache import POST_OVERHEAD_BYTES
+from blogging.index.ngram_index import NGramIndex
+from blogging.rwlock import blog_locks
+
+# default estimated bytes the global index may hold before it evicts blogs
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# rough cost of the n-gram postings of one indexed character
+POSTING_BYTES = 24
+
+# executor shared by the per-blog scans, created on first use
+scan_executor = None
+scan_executor_lock = threading.Lock()
+
+def get_scan_executor():
+    ''' the shared executor running per-blog scans '''
+    global scan_executor
+    with scan_executor_lock:
+        if scan_executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            scan_executor = ThreadPoolExecutor(getattr(Configuration, 'scan_workers', None),
+                thread_name_prefix='blogging-scan')
+        return scan_executor
+
+def indexed_bytes(post):
+    ''' estimated memory the index holds for one post, whose text it keeps as read, decompressed or off a mapped
+    file, along with the postings of its n-grams '''
+    return POST_OVERHEAD_BYTES + (len(post.post_title) + len(post.post_text)) * (1 + POSTING_BYTES)
+
+def indexing():
+    ''' whether saved posts are gathered into the global index, only saved posts are shared by blog id '''
+    return Configuration.autosave and getattr(Configuration, 'global_post_index', True)
+
+class GlobalPostIndex():
+    ''' process-wide n-gram index of the posts of every blog, keyed by (blog id, post code);
+    a blog is covered once it was scanned, from then on its writes keep it up to date, until it is evicted to keep
+    the index within its byte budget '''
+
+    def __init__(self, max_bytes=None):
+        ''' construct an index covering no blog, bounded by estimated bytes (None is unbounded) '''
+        self.max_bytes = max_bytes
+        self.index = NGramIndex()
+        # (blog id, post code) -> [post, estimated bytes]
+        self.posts = {}
+        # covered blog id -> codes of its indexed posts, least recently searched first
+        self.blogs = OrderedDict()
+        # covered blog id -> estimated bytes of its indexed posts
+        self.sizes = {}
+        self.total_bytes = 0
+        self.evictions = 0
+        # taken inside a blog's lock, never the other way round
+        self.lock = threading.Lock()
+
+    def covers(self, blog_id):
+        ''' checks whether the posts of blog_id are all indexed '''
+        return blog_id in self.blogs
+
+    def load(self, blog_id, posts):
+        ''' index every post of a blog, called under the blog's lock so no write interleaves;
+        a blog that alone exceeds the budget is left to scans '''
+        sized = [(post, indexed_bytes(post)) for post in posts]
+        with self.lock:
+            self.unlink(blog_id)
+            if self.max_bytes is not None and sum(size for _, size in sized) > self.max_bytes:
+                return
+            codes = self.blogs[blog_id] = set()
+            self.sizes[blog_id] = 0
+            for post, size in sized:
+                self.link(blog_id, codes, post, size)
+            self.evict(blog_id)
+
+    def add(self, blog_id, posts):
+        ''' index created or updated posts of a covered blog, called under the blog's write lock '''
+        if blog_id not in self.blogs:
+            return
+        with self.lock:
+            codes = self.blogs.get(blog_id)
+            if codes is not None:
+                for post in posts:
+                    self.link(blog_id, codes, post, indexed_bytes(post))
+                self.evict(blog_id)
+
+    def remove(self, blog_id, post_code):
+        ''' drop a deleted post of a covered blog, called under the blog's write lock '''
+        if blog_id not in self.blogs:
+            return
+        with self.lock:
+            codes = self.blogs.get(blog_id)
+            if codes is not None and post_code in codes:
+                codes.discard(post_code)
+                self.index.remove((blog_id, post_code))
+                self.charge(blog_id, -self.posts.pop((blog_id, post_code))[1])
+
+    def drop(self, blog_id):
+        ''' forget a deleted or renamed blog, which is scanned again if it comes back '''
+        with self.lock:
+            self.unlink(blog_id)
+
+    def link(self, blog_id, codes, post, size):
+        key = (blog_id, post.post_code)
+        entry = self.posts.get(key)
+        if entry is not None:
+            self.charge(blog_id, -entry[1])
+        self.index.add(key, post.post_title, post.post_text)
+        self.posts[key] = [post, size]
+        codes.add(post.post_code)
+        self.charge(blog_id, size)
+
+    def charge(self, blog_id, delta):
+        self.sizes[blog_id] += delta
+        self.total_bytes += delta
+
+    def unlink(self, blog_id):
+        for post_code in self.blogs.pop(blog_id, ()):
+            self.index.remove((blog_id, post_code))
+            del self.posts[(blog_id, post_code)]
+        self.total_bytes -= self.sizes.pop(blog_id, 0)
+
+    def evict(self, blog_id):
+        ''' evict least recently searched blogs until the index is within budget, blog_id last '''
+        if self.max_bytes is None or self.total_bytes <= self.max_bytes:
+            return
+        self.blogs.move_to_end(blog_id)
+        while self.blogs and self.total_bytes > self.max_bytes:
+            self.unlink(next(iter(self.blogs)))
+            self.evictions += 1
+
+    def search(self, term, blog_ids):
+        ''' (blog id, post) of the indexed posts of blog_ids containing term, and the ids of blog_ids
+        the index covered, whose posts are all searched '''
+        with self.lock:
+            covered = {blog_id for blog_id in blog_ids if blog_id in self.blogs}
+            found = []
+            if covered:
+                for blog_id in covered:
+                    self.blogs.move_to_end(blog_id)
+                for key in self.index.search(term):
+                    if key[0] in covered:
+                        found.append((key[0], self.posts[key][0]))
+            return found, covered
+
+    def clear(self):
+        ''' forget every blog, e.g. when the records are replaced '''
+        with self.lock:
+            self.index = NGramIndex()
+            self.posts = {}
+            self.blogs = OrderedDict()
+            self.sizes = {}
+            self.total_bytes = 0
+
+# the process-wide index, filled as blogs are scanned
+global_posts = GlobalPostIndex(getattr(Configuration, 'global_post_index_bytes', DEFAULT_MAX_BYTES))
+
+def scan_blog(blog, term, index):
+    ''' posts of blog containing term, indexing all of them in the global index when index is set '''
+    with blog_locks.get(blog.id).read():
+        posts = list(reversed(blog.post_dao.list_posts()))
+        if index:
+            global_posts.load(blog.id, posts)
+    # a one-off scan, building the blog's own search index would cost more than it saves
+    return [post for post in posts if term in post.post_title or term in post.post_text]
+
+def search_all_posts(blogs, term, limit=None):
+    ''' yield (blog id, post) for the posts of blogs containing term, at most limit of them: first those of
+    blogs the global index covers, then those of the other blogs as their parallel scans complete;
+    each blog's posts come in creation order, blogs in no particular order '''
+    if limit is not None and limit <= 0:
+        return
+    index = indexing()
+    count = 0
+    pending = blogs
+    if index:
+        # blogs evicted from the index meanwhile are left uncovered, and scanned with the others
+        found, covered = global_posts.search(term, [blog.id for blog in blogs])
+        pending = [blog for blog in blogs if blog.id not in covered]
+        for result in found:
+            yield result
+            count += 1
+            if count == limit:
+                return
+    if not pending:
+        return
+    from concurrent.futures import as_completed
+    scans = {get_scan_executor().submit(scan_blog, blog, term, index): blog.id for blog in pending}
+    try:
+        for scan in as_completed(scans):
+            for post in scan.result():
+                yield scans[scan], post
+                count += 1
+                if count == limit:
+                    return
+    finally:
+        # scans not started yet are dropped once the caller stops reading
+        for scan in scans:
+            scan.cancel()
@@ -0,0 +1,108 @@
+class NGramIndex():
+    ''' incremental character n-gram index answering case-sensitive substring queries '''
+
+    def __init__(self, n=3, scan_ratio=0.25, lookup=None):
+        ''' construct an empty index over n-grams of length n, which keeps the fields it indexes unless lookup
+        reads them back by key; such an index is told the previous fields of a key it reindexes or removes '''
+        self.n = n
+        self.lookup = lookup
+        # above this fraction of matching keys, verifying every key in order beats intersecting
+        self.scan_ratio = scan_ratio
+        # n-gram -> set of keys whose fields contain that n-gram
+        self.postings = {}
+        # key -> indexed fields, or None when read through lookup, kept in insertion order
+        self.fields = {}
+        # key -> insertion sequence number, used to order results
+        self.sequence = {}
+        self.next_sequence = 0
+        # keys examined by the latest search
+        self.last_scanned = 0
+
+    def __len__(self):
+        ''' number of keys in the index '''
+        return len(self.fields)
+
+    def __contains__(self, key):
+        ''' checks whether key is indexed '''
+        return key in self.fields
+
+    def grams(self, text):
+        ''' set of n-grams of a string '''
+        n = self.n
+        return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+    def add(self, key, *fields, previous=None):
+        ''' index the fields of key, keeping its position if it was already indexed with the previous fields '''
+        if key in self.fields:
+            self._unlink(key, previous)
+        else:
+            self.sequence[key] = self.next_sequence
+            self.next_sequence += 1
+        self.fields[key] = fields if self.lookup is None else None
+        for gram in set().union(*(self.grams(field) for field in fields)):
+            keys = self.postings.get(gram)
+            if keys is None:
+                self.postings[gram] = {key}
+            else:
+                keys.add(key)
+
+    def remove(self, key, previous=None):
+        ''' remove key, indexed with the previous fields, from the index, returns whether it was indexed '''
+        if key not in self.fields:
+            return False
+        self._unlink(key, previous)
+        del self.fields[key]
+        del self.sequence[key]
+        return True
+
+    def indexed_fields(self, key, previous=None):
+        ''' the fields key was indexed with, the previous ones given if the index keeps none '''
+        fields = self.fields[key]
+        if fields is not None:
+            return fields
+        return self.lookup(key) if previous is None else previous
+
+    def _unlink(self, key, previous=None):
+        ''' drop key from the postings of its current fields '''
+        for gram in set().union(*(self.grams(field) for field in self.indexed_fields(key, previous))):
+            keys = self.postings[gram]
+            keys.discard(key)
+            if not keys:
+                del self.postings[gram]
+
+    def candidates(self, term):
+        ''' keys that may contain term, in no particular order, or None when a full scan is cheaper '''
+        if len(term) < self.n:
+            return None
+        postings = []
+        for gram in self.grams(term):
+            keys = self.postings.get(gram)
+            if not keys:
+                return set()
+            postings.append(keys)
+        postings.sort(key=len)
+        if len(postings[0]) > self.scan_ratio * len(self.fields):
+            return None
+        result = set(postings[0])
+        for keys in postings[1:]:
+            result &= keys
+            if not result:
+                break
+        return result
+
+    def search(self, term):
+        ''' keys with at least one field containing term, in insertion order '''
+        keys = self.candidates(term)
+        if keys is None:
+            keys = self.fields
+        else:
+            keys = sorted(keys, key=self.sequence.__getitem__)
+        self.last_scanned = len(keys)
+        fields = self.fields.__getitem__ if self.lookup is None else self.lookup
+        found = []
+        for key in keys:
+            for field in fields(key):
+                if term in field:
+                    found.append(key)
+                    break
+        return found
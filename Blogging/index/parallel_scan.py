@@ -0,0 +1,210 @@
+import array
+import bisect
+import mmap
+import multiprocessing
+import os
+import struct
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from blogging.configuration import Configuration
+from blogging.rwlock import blog_locks
+
+# shared memory on Linux, the default temporary folder elsewhere
+SEGMENT_FOLDER = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+# partitions per worker process, so a slow partition does not leave the others idle
+PARTITIONS_PER_WORKER = 4
+
+# below this many bytes of text a scan runs in the calling process
+MIN_PARALLEL_BYTES = 1 << 20
+
+# default bytes of text the kept segments may hold before the least recently scanned are dropped
+DEFAULT_SEGMENT_BYTES = 256 * 1024 * 1024
+
+def scan_partition(path, first, last, term):
+    ''' worker task: positions in [first, last) of the posts of the segment at path with a field containing term '''
+    if not term:
+        return list(range(first, last))
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapping:
+        count = struct.unpack_from('<q', mapping)[0]
+        base = 8 + 8 * (2 * count + 1)
+        # field starts of the partition, relative to the data: title of post i at 2i, its text at 2i + 1
+        offsets = array.array('q')
+        offsets.frombytes(mapping[8 + 16 * first:8 + 8 * (2 * last + 1)])
+        end = base + offsets[-1]
+        found = []
+        position = mapping.find(term, base + offsets[0], end)
+        while position != -1:
+            field = bisect.bisect_right(offsets, position - base) - 1
+            if position - base + len(term) <= offsets[field + 1]:
+                post = field // 2
+                found.append(first + post)
+                # the rest of this post cannot add anything
+                position = mapping.find(term, base + offsets[2 * post + 2], end)
+            else:
+                position = mapping.find(term, position + 1, end)
+        return found
+
+def remove_file(path):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+class Segment():
+    ''' titles and texts of a list of posts encoded once into a file the worker processes map, so a scan sends
+    them only a path and a range; the file is removed when the segment is collected '''
+
+    def __init__(self, posts):
+        ''' encode posts, listed in the order scans return them '''
+        self.posts = posts
+        offsets = array.array('q', [0])
+        chunks = []
+        size = 0
+        for post in posts:
+            for field in (post.post_title, post.post_text):
+                data = field.encode()
+                chunks.append(data)
+                size += len(data)
+                offsets.append(size)
+        self.offsets = offsets
+        self.size = size
+        file = tempfile.NamedTemporaryFile(prefix='blogging-scan-', dir=SEGMENT_FOLDER, delete=False)
+        with file:
+            file.write(struct.pack('<q', len(posts)))
+            file.write(offsets.tobytes())
+            file.write(b''.join(chunks))
+        self.path = file.name
+        weakref.finalize(self, remove_file, self.path)
+
+    def partitions(self, count):
+        ''' up to count ranges of post positions holding about the same number of bytes '''
+        posts = len(self.posts)
+        if not posts:
+            return []
+        ranges = []
+        first = 0
+        for number in range(1, count):
+            # the post whose text ends nearest the number-th fraction of the data
+            last = min(posts, bisect.bisect_left(self.offsets, self.size * number // count, 2 * first + 2) // 2)
+            if last > first:
+                ranges.append((first, last))
+                first = last
+        ranges.append((first, posts))
+        return ranges
+
+class ParallelScanner():
+    ''' scans posts for a substring across a pool of worker processes, keeping one segment per blog
+    until the blog's posts are written again, or until the segments kept exceed their byte budget '''
+
+    def __init__(self, workers=None, min_parallel_bytes=MIN_PARALLEL_BYTES, max_bytes=None):
+        ''' construct a scanner over workers processes, the number of cores by default, that scans blogs of fewer than
+        min_parallel_bytes in the calling process and keeps segments of at most max_bytes of text in all
+        (Configuration.scan_segment_bytes by default, None there is unbounded); the pool starts on first use '''
+        self.workers = workers or getattr(Configuration, 'scan_processes', None) or os.cpu_count() or 1
+        self.min_parallel_bytes = min_parallel_bytes
+        self.max_bytes = max_bytes or getattr(Configuration, 'scan_segment_bytes', DEFAULT_SEGMENT_BYTES)
+        self.executor = None
+        # blog id -> (post store, blog lock, its write count, segment), least recently scanned first
+        self.segments = OrderedDict()
+        self.total_bytes = 0
+        self.evictions = 0
+        # reentrant, a store may be collected, and its entry discarded, while this thread holds it
+        self.lock = threading.RLock()
+
+    def get_executor(self):
+        ''' the process pool, started on first use '''
+        with self.lock:
+            if self.executor is None:
+                # spawned workers do not inherit locks held by this process's threads
+                self.executor = ProcessPoolExecutor(self.workers,
+                    mp_context=multiprocessing.get_context(getattr(Configuration, 'shard_start_method', None) or 'spawn'))
+            return self.executor
+
+    def scan(self, segment, term):
+        ''' posts of segment with a title or text containing term, in segment order '''
+        data = term.encode()
+        if segment.size < self.min_parallel_bytes or self.workers == 1:
+            # the pool round trip costs more than a small scan
+            positions = scan_partition(segment.path, 0, len(segment.posts), data)
+        else:
+            executor = self.get_executor()
+            futures = [executor.submit(scan_partition, segment.path, first, last, data)
+                for first, last in segment.partitions(self.workers * PARTITIONS_PER_WORKER)]
+            # partitions are contiguous and submitted in order, so concatenating keeps the order
+            positions = [position for future in futures for position in future.result()]
+        return [segment.posts[position] for position in positions]
+
+    def segment(self, blog):
+        ''' the segment of the posts of blog in creation order, encoded again only after they were written '''
+        lock = blog_locks.get(blog.id)
+        with lock.read():
+            post_dao = blog.post_dao
+            with self.lock:
+                entry = self.segments.get(blog.id)
+                if entry is not None and entry[0]() is post_dao and entry[2] == lock.writes:
+                    self.segments.move_to_end(blog.id)
+                    return entry[3]
+            segment = Segment(list(reversed(post_dao.list_posts())))
+            # the entry, and with it the segment's file, goes when the store is dropped, e.g. with its blog
+            store = weakref.ref(post_dao, lambda store: self.discard(blog.id, store))
+            with self.lock:
+                self.discard(blog.id)
+                if self.max_bytes is None or segment.size <= self.max_bytes:
+                    # the lock is kept alive with the entry, so its write count keeps counting
+                    self.segments[blog.id] = (store, lock, lock.writes, segment)
+                    self.total_bytes += segment.size
+                    self.evict()
+            return segment
+
+    def evict(self):
+        ''' drop the least recently scanned segments until those kept are within budget; a scan still using
+        a dropped segment keeps its file until it is done '''
+        while self.max_bytes is not None and self.total_bytes > self.max_bytes and len(self.segments) > 1:
+            self.discard(next(iter(self.segments)))
+            self.evictions += 1
+
+    def discard(self, blog_id, store=None):
+        ''' drop the segment of blog_id, only if it was built from store when given '''
+        with self.lock:
+            entry = self.segments.get(blog_id)
+            if entry is not None and (store is None or entry[0] is store):
+                del self.segments[blog_id]
+                self.total_bytes -= entry[3].size
+
+    def scan_blog(self, blog, term):
+        ''' posts of blog with a title or text containing term, in creation order '''
+        return self.scan(self.segment(blog), term)
+
+    def scan_blogs(self, blogs, term):
+        ''' (blog id, post) of the posts of blogs containing term, blog by blog, each in creation order;
+        partitions of every blog run in the pool at once '''
+        segments = [(blog.id, self.segment(blog)) for blog in blogs]
+        total = sum(segment.size for _, segment in segments)
+        if total < self.min_parallel_bytes or self.workers == 1:
+            return [(blog_id, post) for blog_id, segment in segments for post in self.scan(segment, term)]
+        executor = self.get_executor()
+        data = term.encode()
+        scans = []
+        for blog_id, segment in segments:
+            # each blog gets a share of the partitions as large as its share of the text
+            share = max(1, self.workers * PARTITIONS_PER_WORKER * segment.size // total)
+            scans.append((blog_id, segment, [executor.submit(scan_partition, segment.path, first, last, data)
+                for first, last in segment.partitions(share)]))
+        return [(blog_id, segment.posts[position]) for blog_id, segment, futures in scans
+            for future in futures for position in future.result()]
+
+    def shutdown(self):
+        ''' stop the worker processes and drop every segment '''
+        with self.lock:
+            executor, self.executor = self.executor, None
+            self.segments = OrderedDict()
+            self.total_bytes = 0
+        if executor is not None:
+            executor.shutdown()
+
+# the process-wide scanner, its pool is started by the first parallel scan
+parallel_scanner = ParallelScanner()
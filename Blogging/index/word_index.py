@@ -0,0 +1,201 @@
+import heapq
+import math
+import re
+
+# maximal runs of letters, digits and underscores
+WORD = re.compile(r'\w+')
+
+# posts holding every query word, any of them, the words in sequence, or a case-insensitive substring
+SEARCH_MODES = ('all', 'any', 'phrase', 'substring')
+
+def words(text, case_sensitive=False):
+    ''' the words of text in order, casefolded unless case_sensitive '''
+    found = WORD.findall(text)
+    return found if case_sensitive else [word.casefold() for word in found]
+
+def contains_sequence(haystack, needle):
+    ''' checks whether the list needle appears contiguously in the list haystack '''
+    width = len(needle)
+    first = needle[0]
+    for start in range(len(haystack) - width + 1):
+        if haystack[start] == first and haystack[start:start + width] == needle:
+            return True
+    return False
+
+class WordIndex():
+    ''' incremental inverted index of casefolded words, ranking matches by BM25 '''
+
+    def __init__(self, k1=1.2, b=0.75, lookup=None):
+        ''' construct an empty index with the BM25 term saturation k1 and length normalisation b, which keeps
+        the fields it indexes unless lookup reads them back by key; such an index is told the previous fields
+        of a key it reindexes or removes '''
+        self.k1 = k1
+        self.lookup = lookup
+        self.b = b
+        # word -> {key: occurrences of the word in the key's fields}
+        self.postings = {}
+        # key -> indexed fields, or None when read through lookup, kept in insertion order
+        self.fields = {}
+        # key -> number of words in its fields
+        self.lengths = {}
+        self.total_length = 0
+        # key -> insertion sequence number, breaking ties between equal scores
+        self.sequence = {}
+        self.next_sequence = 0
+        # keys examined by the latest search
+        self.last_scanned = 0
+
+    def __len__(self):
+        ''' number of keys in the index '''
+        return len(self.fields)
+
+    def __contains__(self, key):
+        ''' checks whether key is indexed '''
+        return key in self.fields
+
+    def add(self, key, *fields, previous=None):
+        ''' index the words of the fields of key, keeping its position if it was already indexed with the
+        previous fields '''
+        if key in self.fields:
+            self._unlink(key, previous)
+        else:
+            self.sequence[key] = self.next_sequence
+            self.next_sequence += 1
+        self.fields[key] = fields if self.lookup is None else None
+        counts = {}
+        length = 0
+        for field in fields:
+            for word in words(field):
+                counts[word] = counts.get(word, 0) + 1
+                length += 1
+        for word, count in counts.items():
+            keys = self.postings.get(word)
+            if keys is None:
+                self.postings[word] = {key: count}
+            else:
+                keys[key] = count
+        self.lengths[key] = length
+        self.total_length += length
+
+    def remove(self, key, previous=None):
+        ''' remove key, indexed with the previous fields, from the index, returns whether it was indexed '''
+        if key not in self.fields:
+            return False
+        self._unlink(key, previous)
+        del self.fields[key]
+        del self.sequence[key]
+        return True
+
+    def indexed_fields(self, key, previous=None):
+        ''' the fields key was indexed with, the previous ones given if the index keeps none '''
+        fields = self.fields[key]
+        if fields is not None:
+            return fields
+        return self.lookup(key) if previous is None else previous
+
+    def _unlink(self, key, previous=None):
+        ''' drop key from the postings of its current fields '''
+        for word in set().union(*(words(field) for field in self.indexed_fields(key, previous))):
+            keys = self.postings[word]
+            del keys[key]
+            if not keys:
+                del self.postings[word]
+        self.total_length -= self.lengths.pop(key)
+
+    def scores(self, keys, terms):
+        ''' BM25 score of each of keys for the casefolded terms '''
+        count = len(self.fields)
+        if not count:
+            return {}
+        k1 = self.k1
+        # length normalisation of each key is shared by every term
+        norm = k1 * (1 - self.b)
+        slope = k1 * self.b * count / self.total_length if self.total_length else 0.0
+        lengths = self.lengths
+        scores = dict.fromkeys(keys, 0.0)
+        for term in set(terms):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            if len(postings) < len(scores):
+                pairs = ((key, occurrences) for key, occurrences in postings.items() if key in scores)
+            else:
+                pairs = ((key, postings[key]) for key in scores if key in postings)
+            for key, occurrences in pairs:
+                scores[key] += idf * occurrences * (k1 + 1) / (occurrences + norm + slope * lengths[key])
+        return scores
+
+    def matches(self, query, mode, case_sensitive):
+        ''' candidate keys for query under mode, the casefolded terms to rank them by, and the check
+        a candidate must pass to match, None when every candidate matches '''
+        if mode == 'substring':
+            return self.substring_matches(query, case_sensitive)
+        terms = words(query)
+        if not terms:
+            return [], terms, None
+        postings = [self.postings.get(term, {}) for term in dict.fromkeys(terms)]
+        if mode == 'any':
+            keys = set().union(*postings)
+        else:
+            postings.sort(key=len)
+            others = postings[1:]
+            keys = [key for key in postings[0] if all(key in keys for keys in others)]
+        check = None
+        if (mode == 'phrase' and len(terms) > 1) or case_sensitive:
+            # word postings cannot tell word order or case, the candidates' own words can
+            needle = words(query, case_sensitive)
+            check = lambda key: self.verify(key, needle, mode, case_sensitive)
+        return keys, terms, check
+
+    def verify(self, key, needle, mode, case_sensitive):
+        ''' checks whether the fields of key hold the words of needle as mode requires '''
+        fields = [words(field, case_sensitive) for field in self.indexed_fields(key)]
+        if mode == 'phrase':
+            # a phrase does not run from the title into the text
+            return any(contains_sequence(found, needle) for found in fields)
+        present = set().union(*fields)
+        if mode == 'any':
+            return not present.isdisjoint(needle)
+        return present.issuperset(needle)
+
+    def substring_matches(self, query, case_sensitive):
+        ''' keys that may have a field containing query, the words containing it to rank them by, and the check '''
+        folded = query if case_sensitive else query.casefold()
+        if not folded:
+            return [], [], None
+        if WORD.fullmatch(folded):
+            # a piece of one word can only appear inside the indexed words containing it
+            terms = [word for word in self.postings if folded.casefold() in word]
+            keys = set().union(*(self.postings[term] for term in terms))
+        else:
+            terms = []
+            keys = self.fields
+        fields = self.fields.__getitem__ if self.lookup is None else self.lookup
+        if case_sensitive:
+            check = lambda key: any(query in field for field in fields(key))
+        else:
+            check = lambda key: any(folded in field.casefold() for field in fields(key))
+        return keys, terms, check
+
+    def search(self, query, mode='all', case_sensitive=False, limit=None):
+        ''' keys matching query under mode, best BM25 score first, equal scores in insertion order,
+        at most limit of them '''
+        if mode not in SEARCH_MODES:
+            raise ValueError('unknown search mode %r, expected one of %s' % (mode, ', '.join(SEARCH_MODES)))
+        keys, terms, check = self.matches(query, mode, case_sensitive)
+        scores = self.scores(keys, terms)
+        self.last_scanned = len(scores)
+        sequence = self.sequence
+        if check is None:
+            rank = lambda key: (-scores[key], sequence[key])
+            return sorted(scores, key=rank) if limit is None else heapq.nsmallest(limit, scores, key=rank)
+        ranked = [(-score, sequence[key], key) for key, score in scores.items()]
+        # candidates are checked best first, only until limit of them matched
+        heapq.heapify(ranked)
+        found = []
+        while ranked and (limit is None or len(found) < limit):
+            key = heapq.heappop(ranked)[2]
+            if check(key):
+                found.append(key)
+        return found
@@ -0,0 +1,182 @@
+import bisect
+import functools
+import threading
+import time
+from blogging.configuration import Configuration
+
+# upper bounds of the latency buckets, in seconds
+LATENCY_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+# upper bounds of the items scanned buckets
+SCANNED_BUCKETS = (1, 10, 100, 1000, 10000, 100000, 1000000)
+
+class Histogram():
+    ''' cumulative-bucket histogram, as Prometheus exposes them '''
+
+    def __init__(self, bounds):
+        ''' construct an empty histogram over the given upper bounds '''
+        self.bounds = bounds
+        # one more bucket for values above the last bound
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, value):
+        ''' record one value '''
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        ''' (upper bound, values at or below it) for every bucket, the last bound is infinity '''
+        total = 0
+        buckets = []
+        for bound, count in zip(self.bounds + (float('inf'),), self.counts):
+            total += count
+            buckets.append((bound, total))
+        return buckets
+
+    def snapshot(self):
+        ''' the histogram as a plain dict '''
+        return {'count': self.count, 'sum': self.sum,
+            'buckets': [[bound if bound != float('inf') else '+Inf', count] for bound, count in self.cumulative()]}
+
+class Metrics():
+    ''' call latencies, bytes moved and items scanned, recorded only while enabled '''
+
+    def __init__(self, enabled=False):
+        ''' construct an empty registry '''
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        ''' forget everything recorded so far '''
+        with self.lock:
+            # operation -> latency histogram, whose count is the number of calls
+            self.latency = {}
+            # component -> bytes
+            self.bytes_read = {}
+            self.bytes_written = {}
+            # operation -> items scanned histogram
+            self.scanned = {}
+
+    def observe(self, operation, seconds):
+        ''' record one call of operation taking seconds '''
+        with self.lock:
+            histogram = self.latency.get(operation)
+            if histogram is None:
+                histogram = self.latency[operation] = Histogram(LATENCY_BUCKETS)
+            histogram.observe(seconds)
+
+    def add_bytes(self, component, read=0, written=0):
+        ''' record bytes component read from or wrote to storage '''
+        with self.lock:
+            if read:
+                self.bytes_read[component] = self.bytes_read.get(component, 0) + read
+            if written:
+                self.bytes_written[component] = self.bytes_written.get(component, 0) + written
+
+    def add_scanned(self, operation, items):
+        ''' record how many items one search of operation had to examine '''
+        with self.lock:
+            histogram = self.scanned.get(operation)
+            if histogram is None:
+                histogram = self.scanned[operation] = Histogram(SCANNED_BUCKETS)
+            histogram.observe(items)
+
+    def timed(self, operation, function):
+        ''' function wrapped to record its calls as operation '''
+        @functools.wraps(function)
+        def timed_function(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.observe(operation, time.perf_counter() - start)
+        return timed_function
+
+    def snapshot(self):
+        ''' everything recorded so far as a dict of plain values '''
+        with self.lock:
+            return {
+                'calls': {operation: histogram.count for operation, histogram in self.latency.items()},
+                'latency_seconds': {operation: histogram.snapshot() for operation, histogram in self.latency.items()},
+                'bytes_read': dict(self.bytes_read),
+                'bytes_written': dict(self.bytes_written),
+                'items_scanned': {operation: histogram.snapshot() for operation, histogram in self.scanned.items()},
+            }
+
+    def prometheus(self):
+        ''' everything recorded so far in the Prometheus text exposition format '''
+        lines = []
+        with self.lock:
+            lines.append('# HELP blogging_calls_total Calls made to each operation.')
+            lines.append('# TYPE blogging_calls_total counter')
+            for operation, histogram in sorted(self.latency.items()):
+                lines.append('blogging_calls_total{operation="%s"} %d' % (operation, histogram.count))
+            self.histogram_lines(lines, 'blogging_latency_seconds', 'Time spent in each operation.', self.latency)
+            for name, description, values in [('blogging_read_bytes_total', 'Bytes read from storage.', self.bytes_read),
+                    ('blogging_written_bytes_total', 'Bytes written to storage.', self.bytes_written)]:
+                lines.append('# HELP %s %s' % (name, description))
+                lines.append('# TYPE %s counter' % name)
+                for component, value in sorted(values.items()):
+                    lines.append('%s{component="%s"} %d' % (name, component, value))
+            self.histogram_lines(lines, 'blogging_items_scanned', 'Items examined by each search.', self.scanned)
+        return '\n'.join(lines) + '\n'
+
+    def histogram_lines(self, lines, name, description, histograms):
+        ''' append the exposition of a family of histograms labelled by operation '''
+        lines.append('# HELP %s %s' % (name, description))
+        lines.append('# TYPE %s histogram' % name)
+        for operation, histogram in sorted(histograms.items()):
+            for bound, count in histogram.cumulative():
+                lines.append('%s_bucket{operation="%s",le="%s"} %d' % (name, operation,
+                    '+Inf' if bound == float('inf') else repr(bound), count))
+            lines.append('%s_sum{operation="%s"} %r' % (name, operation, histogram.sum))
+            lines.append('%s_count{operation="%s"} %d' % (name, operation, histogram.count))
+
+class Instrumented():
+    ''' view of a DAO or verifier whose method calls are timed under component.method '''
+
+    def __init__(self, target, component):
+        ''' construct a timed view over target '''
+        self.target = target
+        self.component = component
+
+    def __getattr__(self, name):
+        ''' methods of the target are timed, other attributes are passed through '''
+        if name in ('target', 'component'):
+            raise AttributeError(name)
+        attribute = getattr(self.target, name)
+        if not callable(attribute) or name.startswith('_'):
+            return attribute
+        timed = metrics.timed(self.component + '.' + name, attribute)
+        # later lookups find the wrapper without going through __getattr__
+        setattr(self, name, timed)
+        return timed
+
+# the process-wide registry; components check metrics.enabled when they are created, so enable it first
+metrics = Metrics(getattr(Configuration, 'instrumentation', False))
+
+def enable():
+    ''' start recording for components created from now on '''
+    metrics.enabled = True
+
+def disable():
+    ''' stop recording for components created from now on '''
+    metrics.enabled = False
+
+def instrument(target, component):
+    ''' target timed under component when instrumentation is enabled, target itself otherwise '''
+    if metrics.enabled:
+        return Instrumented(target, component)
+    return target
+
+def snapshot():
+    ''' everything recorded so far as a dict '''
+    return metrics.snapshot()
+
+def prometheus():
+    ''' everything recorded so far in the Prometheus text format '''
+    return metrics.prometheus()
\ No newline at end of file
@@ -0,0 +1,75 @@
+import hashlib
+import hmac
+import os
+import threading
+from collections import OrderedDict
+
+class SHA256Verifier():
+    ''' verifies passwords stored as unsalted SHA-256 hex digests, the format of the users file '''
+
+    def hash(self, password):
+        ''' hash a password for storage '''
+        return hashlib.sha256(password.encode('utf-8')).hexdigest()
+
+    def verify(self, password, stored_hash):
+        ''' checks whether password matches stored_hash '''
+        return hmac.compare_digest(self.hash(password), stored_hash)
+
+class ScryptVerifier():
+    ''' verifies passwords stored as salted scrypt hashes: scrypt$n$r$p$salt$hash '''
+
+    def __init__(self, n=2 ** 14, r=8, p=1):
+        ''' construct a verifier hashing new passwords with the given scrypt cost '''
+        self.n = n
+        self.r = r
+        self.p = p
+
+    def hash(self, password):
+        ''' hash a password with a fresh salt for storage '''
+        salt = os.urandom(16)
+        digest = hashlib.scrypt(password.encode('utf-8'), salt=salt, n=self.n, r=self.r, p=self.p)
+        return "scrypt$%d$%d$%d$%s$%s" % (self.n, self.r, self.p, salt.hex(), digest.hex())
+
+    def verify(self, password, stored_hash):
+        ''' checks whether password matches stored_hash '''
+        try:
+            scheme, n, r, p, salt, digest = stored_hash.split('$')
+            n, r, p, salt, digest = int(n), int(r), int(p), bytes.fromhex(salt), bytes.fromhex(digest)
+        except ValueError:
+            return False
+        if scheme != 'scrypt':
+            return False
+        actual = hashlib.scrypt(password.encode('utf-8'), salt=salt, n=n, r=r, p=p, maxmem=2 * 128 * n * r + 2 ** 20)
+        return hmac.compare_digest(actual, digest)
+
+class CachingVerifier():
+    ''' remembers recent successful verifications of an expensive verifier '''
+
+    def __init__(self, verifier, size=1024):
+        ''' construct a cache of at most size entries in front of verifier '''
+        self.verifier = verifier
+        self.size = size
+        # passwords are only kept as a keyed digest under a per-process secret
+        self.secret = os.urandom(32)
+        self.verified = OrderedDict()
+        # guards the entries, which logins on every thread reorder; the verifier itself runs outside it
+        self.lock = threading.Lock()
+
+    def hash(self, password):
+        ''' hash a password for storage '''
+        return self.verifier.hash(password)
+
+    def verify(self, password, stored_hash):
+        ''' checks whether password matches stored_hash, skipping the verifier on a cache hit '''
+        key = (stored_hash, hmac.new(self.secret, password.encode('utf-8'), hashlib.sha256).digest())
+        with self.lock:
+            if key in self.verified:
+                self.verified.move_to_end(key)
+                return True
+        if not self.verifier.verify(password, stored_hash):
+            return False
+        with self.lock:
+            self.verified[key] = True
+            if len(self.verified) > self.size:
+                self.verified.popitem(last=False)
+        return True
@@ -1,22 +1,68 @@
 import datetime
+import time
+
+def now_micros():
+    ''' current time as integer microseconds since the epoch '''
+    return time.time_ns() // 1000
+
+def to_datetime(micros):
+    ''' convert epoch microseconds to a local datetime, as datetime.now() returns '''
+    seconds, microseconds = divmod(micros, 1000000)
+    return datetime.datetime.fromtimestamp(seconds).replace(microsecond=microseconds)
+
+def to_micros(moment):
+    ''' convert a local datetime to epoch microseconds '''
+    return int(moment.replace(microsecond=0).timestamp()) * 1000000 + moment.microsecond
 
 class Post():
     ''' class that represents a post '''
 
+    # timestamps are kept as epoch microseconds and converted to datetime on access
+    __slots__ = ('post_code', 'post_title', 'post_text', 'creation_micros', 'update_micros')
+
     def __init__(self, post_code, post_title, post_text):
         ''' constructs a post '''
         self.post_code = post_code
         self.post_title = post_title
         self.post_text = post_text
-        now = datetime.datetime.now()
-        self.creation_time = now
-        self.update_time = now
+        now = now_micros()
+        self.creation_micros = now
+        self.update_micros = now
+
+    @property
+    def creation_time(self):
+        ''' when the post was created '''
+        return to_datetime(self.creation_micros)
+
+    @creation_time.setter
+    def creation_time(self, moment):
+        self.creation_micros = to_micros(moment)
+
+    @property
+    def update_time(self):
+        ''' when the post was last updated '''
+        return to_datetime(self.update_micros)
+
+    @update_time.setter
+    def update_time(self, moment):
+        self.update_micros = to_micros(moment)
 
     def update(self, new_post_title, new_post_text):
         ''' update post post_title and post_text '''
         self.post_title = new_post_title
         self.post_text = new_post_text
-        self.update_time = datetime.datetime.now()	
+        self.update_micros = now_micros()
+
+    def __getstate__(self):
+        ''' compact pickled state '''
+        return (self.post_code, self.post_title, self.post_text, self.creation_micros, self.update_micros)
+
+    def __setstate__(self, state):
+        ''' restore pickled state, including posts pickled before timestamps were stored as integers '''
+        if isinstance(state, dict):
+            state = (state['post_code'], state['post_title'], state['post_text'],
+                to_micros(state['creation_time']), to_micros(state['update_time']))
+        self.post_code, self.post_title, self.post_text, self.creation_micros, self.update_micros = state
 
     def __eq__(self, other):
         ''' checks whether this post is the same as other post '''
@@ -28,4 +74,4 @@ class Post():
 
     def __repr__(self):
         ''' converts the post object to a string representation for debugging '''
-        return "Post(%r, %r, %r,\n%r,\n\n%r\n)" % (self.post_code, self.creation_time, self.update_time, self.post_title, self.post_text)
\ No newline at end of file
+        return "Post(%r, %r, %r,\n%r,\n\n%r\n)" % (self.post_code, self.creation_time, self.update_time, self.post_title, self.post_text)
@@ -0,0 +1,85 @@
+import threading
+import weakref
+from contextlib import contextmanager
+
+class ReadWriteLock():
+    ''' lock letting many readers or one writer in, writers waiting take precedence over new readers '''
+
+    def __init__(self):
+        ''' construct an unlocked lock '''
+        self.condition = threading.Condition(threading.Lock())
+        self.readers = 0
+        self.writer = False
+        self.waiting_writers = 0
+        # times the lock was held exclusively, a version of what it guards
+        self.writes = 0
+
+    @contextmanager
+    def read(self):
+        ''' hold the lock shared for the enclosed block '''
+        with self.condition:
+            while self.writer or self.waiting_writers:
+                self.condition.wait()
+            self.readers += 1
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.readers -= 1
+                if not self.readers:
+                    self.condition.notify_all()
+
+    @contextmanager
+    def write(self):
+        ''' hold the lock exclusively for the enclosed block '''
+        with self.condition:
+            self.waiting_writers += 1
+            while self.writer or self.readers:
+                self.condition.wait()
+            self.waiting_writers -= 1
+            self.writer = True
+            self.writes += 1
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.writer = False
+                self.condition.notify_all()
+
+    @contextmanager
+    def try_write(self):
+        ''' hold the lock exclusively for the enclosed block if no one holds or waits for it, without waiting;
+        the block is given whether it holds the lock '''
+        with self.condition:
+            taken = not (self.writer or self.readers or self.waiting_writers)
+            if taken:
+                self.writer = True
+                self.writes += 1
+        try:
+            yield taken
+        finally:
+            if taken:
+                with self.condition:
+                    self.writer = False
+                    self.condition.notify_all()
+
+class LockTable():
+    ''' one read/write lock per key, kept while someone holds a reference to it '''
+
+    def __init__(self):
+        ''' construct an empty table '''
+        self.locks = weakref.WeakValueDictionary()
+        self.mutex = threading.Lock()
+
+    def get(self, key):
+        ''' the lock of key '''
+        lock = self.locks.get(key)
+        if lock is None:
+            with self.mutex:
+                lock = self.locks.get(key)
+                if lock is None:
+                    lock = self.locks[key] = ReadWriteLock()
+        return lock
+
+# locks guarding each blog's posts, by blog id
+blog_locks = LockTable()
\ No newline at end of file
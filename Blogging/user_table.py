@@ -0,0 +1,51 @@
+import os
+import threading
+from blogging.instrumentation import metrics
+
+class UserTable():
+    ''' usernames and password hashes from a users file, reparsed only when the file changes '''
+
+    def __init__(self, users_file):
+        ''' construct an empty table for users_file '''
+        self.users_file = users_file
+        self.users = {}
+        self.signature = None
+        self.lock = threading.Lock()
+
+    def refresh(self):
+        ''' reload the users file if its modification time or size changed, returns the users '''
+        try:
+            stat = os.stat(self.users_file)
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            # If file doesn't exist, start with empty users
+            signature = None
+        if signature != self.signature:
+            with self.lock:
+                if signature != self.signature:
+                    self.users = self.parse() if signature else {}
+                    self.signature = signature
+                    if signature and metrics.enabled:
+                        metrics.add_bytes('users_file', read=signature[1])
+        return self.users
+
+    def parse(self):
+        ''' read the users file, one username,password_hash per line '''
+        users = {}
+        with open(self.users_file, 'r') as file:
+            for line in file:
+                line = line.strip()
+                if line:  # Skip empty lines
+                    username, password_hash = line.split(',')
+                    users[username] = password_hash
+        return users
+
+# users file -> table shared by every controller in the process
+user_tables = {}
+
+def load_users(users_file):
+    ''' users of users_file, shared across controllers and reloaded only when the file changes '''
+    table = user_tables.get(users_file)
+    if table is None:
+        table = user_tables.setdefault(users_file, UserTable(users_file))
+    return table.refresh()
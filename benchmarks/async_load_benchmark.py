@@ -0,0 +1,72 @@
+''' request latency percentiles of concurrent asyncio clients creating and searching posts on one blog '''
+import asyncio
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from blogging.configuration import Configuration
+from blogging.controller import Controller
+from blogging.async_controller import AsyncController, PostWriteCoalescer
+from blogging.engine import BlogEngine
+
+def percentile(latencies, fraction):
+    return latencies[min(len(latencies) - 1, int(len(latencies) * fraction))]
+
+async def client(controller, requests, latencies, coalesce):
+    await controller.login("user", "blogging2025")
+    await controller.set_current_blog(1)
+    for number in range(requests):
+        start = time.perf_counter()
+        if number % 4 == 3:
+            await controller.retrieve_posts("request %d" % number)
+        elif coalesce:
+            await controller.create_post("request %d" % number, "Body of request %d." % number)
+        else:
+            # one write per call, as running Controller.create_post in the executor does
+            await controller.run(controller.controller.create_post, "request %d" % number, "Body of request %d." % number)
+        latencies.append(time.perf_counter() - start)
+
+async def load(clients, requests, coalesce):
+    engine = BlogEngine()
+    executor = ThreadPoolExecutor(8)
+    coalescer = PostWriteCoalescer(executor)
+    setup = Controller(engine=engine)
+    setup.login("user", "blogging2025")
+    setup.create_blog(1, "Load", "load", "load@mail.com")
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*[client(AsyncController(Controller(engine=engine), executor, coalescer), requests, latencies, coalesce)
+        for _ in range(clients)])
+    elapsed = time.perf_counter() - start
+    executor.shutdown()
+    latencies.sort()
+    return elapsed, latencies, coalescer.writes
+
+def main(clients, requests, storages):
+    for storage in storages:
+        for coalesce in (False, True):
+            path = tempfile.mkdtemp()
+            try:
+                Configuration.autosave = True
+                Configuration.post_storage = storage
+                Configuration.blog_storage = 'sqlite'
+                Configuration.log_fsync = True
+                Configuration.records_path = path
+                Configuration.database_file = os.path.join(path, 'blogging.db')
+                Configuration.users_file = os.path.join(path, 'users.txt')
+                with open(Configuration.users_file, 'w') as file:
+                    file.write("user," + hashlib.sha256(b"blogging2025").hexdigest() + "\n")
+                elapsed, latencies, writes = asyncio.run(load(clients, requests, coalesce))
+                print("%-7s %-10s %5d clients  %8.0f req/s  p50 %7.2f ms  p95 %7.2f ms  p99 %7.2f ms  %6s batch writes" % (
+                    storage, "coalesced" if coalesce else "direct", clients, len(latencies) / elapsed,
+                    percentile(latencies, 0.50) * 1000, percentile(latencies, 0.95) * 1000,
+                    percentile(latencies, 0.99) * 1000, writes if coalesce else "-"))
+            finally:
+                shutil.rmtree(path)
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 64, int(sys.argv[2]) if len(sys.argv) > 2 else 100,
+        sys.argv[3:] or ['log', 'sqlite'])
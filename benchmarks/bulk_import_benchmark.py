@@ -0,0 +1,42 @@
+''' import throughput in posts per second: one create_post per post against Blog.create_posts '''
+import os
+import shutil
+import sys
+import tempfile
+import time
+from blogging.blog import Blog
+from blogging.configuration import Configuration
+
+def generate(count):
+    ''' stream count synthetic (post_title, post_text) pairs '''
+    for number in range(count):
+        yield "Imported post %d" % number, "Body of imported post number %d, migrated from the old blog." % number
+
+def one_by_one(blog, count):
+    for post_title, post_text in generate(count):
+        blog.create_post(post_title, post_text)
+
+def batched(blog, count):
+    blog.create_posts(generate(count))
+
+def main(count, storages):
+    for storage in storages:
+        for name, importer in [("create_post", one_by_one), ("create_posts", batched)]:
+            path = tempfile.mkdtemp()
+            try:
+                Configuration.autosave = True
+                Configuration.post_storage = storage
+                Configuration.records_path = path
+                Configuration.database_file = os.path.join(path, 'blogging.db')
+                blog = Blog(1, "Import", "import", "import@mail.com")
+                start = time.perf_counter()
+                importer(blog, count)
+                elapsed = time.perf_counter() - start
+                assert blog.post_dao.counter == count
+                print("%-7s %-13s %8d posts  %10.0f posts/s" % (storage, name, count, count / elapsed))
+                blog.release_post_store()
+            finally:
+                shutil.rmtree(path)
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000, sys.argv[2:] or ['pickle', 'log', 'sqlite'])
@@ -0,0 +1,237 @@
+''' time every Controller operation over synthetic users, blogs and posts, writing results to JSON for comparison
+
+run:      python benchmarks/controller_benchmark.py run --blogs 100000 --posts 1000000 --output new.json
+compare:  python benchmarks/controller_benchmark.py compare base.json new.json --threshold 0.2
+'''
+import argparse
+import hashlib
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from blogging.configuration import Configuration
+from blogging.controller import Controller
+
+PASSWORD = "blogging2025"
+
+def io_counters():
+    ''' bytes this process read from and wrote to storage so far, None where /proc is unavailable '''
+    try:
+        with open('/proc/self/io') as file:
+            counters = dict(line.split(': ') for line in file.read().splitlines())
+        return int(counters['read_bytes']), int(counters['write_bytes'])
+    except (OSError, KeyError, ValueError):
+        return None
+
+def peak_rss_kb():
+    ''' peak resident memory of the process in kilobytes '''
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux kilobytes
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+def storage_bytes(path):
+    ''' total size of the files under path '''
+    return sum(os.path.getsize(os.path.join(folder, name)) for folder, _, names in os.walk(path) for name in names)
+
+def current_commit():
+    ''' the checked out commit, if this is a git checkout '''
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+            check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+class Recorder():
+    ''' collects per-call latencies, memory and I/O of each operation '''
+
+    def __init__(self):
+        self.operations = {}
+
+    def time(self, name, calls):
+        ''' call each of calls, a list of zero-argument callables, and record them as operation name '''
+        latencies = []
+        io_before = io_counters()
+        for call in calls:
+            start = time.perf_counter()
+            call()
+            latencies.append(time.perf_counter() - start)
+        io_after = io_counters()
+        latencies.sort()
+        total = sum(latencies)
+        self.operations[name] = {
+            'calls': len(latencies),
+            'seconds': total,
+            'mean_us': total / len(latencies) * 1e6,
+            'p50_us': latencies[len(latencies) // 2] * 1e6,
+            'p95_us': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1e6,
+            'max_us': latencies[-1] * 1e6,
+            'peak_rss_kb': peak_rss_kb(),
+            'read_bytes': io_after[0] - io_before[0] if io_before else None,
+            'write_bytes': io_after[1] - io_before[1] if io_before else None,
+        }
+        print("%-17s %8d calls  mean %10.1f us  p95 %10.1f us" % (name, len(latencies),
+            self.operations[name]['mean_us'], self.operations[name]['p95_us']), file=sys.stderr)
+
+def configure(path, arguments):
+    ''' point the configuration at a fresh storage folder and write the synthetic users file '''
+    Configuration.autosave = True
+    Configuration.blog_storage = arguments.blog_storage
+    Configuration.post_storage = arguments.post_storage
+    Configuration.records_path = path
+    Configuration.database_file = os.path.join(path, 'blogging.db')
+    Configuration.users_file = os.path.join(path, 'users.txt')
+    password_hash = hashlib.sha256(PASSWORD.encode()).hexdigest()
+    with open(Configuration.users_file, 'w') as file:
+        for number in range(arguments.users):
+            file.write("user%d,%s\n" % (number, password_hash))
+
+def benchmark(arguments):
+    ''' run every operation and return the results '''
+    rng = random.Random(arguments.seed)
+    calls = arguments.calls
+    recorder = Recorder()
+    path = tempfile.mkdtemp()
+    try:
+        configure(path, arguments)
+        start = time.perf_counter()
+        controller = Controller()
+        startup = time.perf_counter() - start
+
+        # every user logs in and out once, up to calls of them
+        users = ["user%d" % number for number in rng.sample(range(arguments.users), min(calls, arguments.users))]
+        recorder.time('login', [lambda user=user: controller.login(user, PASSWORD) and controller.logout()
+            for user in users])
+        controller.login("user0", PASSWORD)
+
+        blog_ids = list(range(1000000000, 1000000000 + arguments.blogs))
+        recorder.time('create_blog', [lambda blog_id=blog_id: controller.create_blog(blog_id, "Blog number %d" % blog_id,
+            "blog_%d" % blog_id, "blog%d@mail.com" % blog_id) for blog_id in blog_ids])
+        recorder.time('search_blog', [lambda blog_id=rng.choice(blog_ids): controller.search_blog(blog_id)
+            for _ in range(calls)])
+        recorder.time('retrieve_blogs', [lambda term="number %d" % rng.randrange(arguments.blogs):
+            controller.retrieve_blogs(term) for _ in range(min(calls, 100))])
+        recorder.time('list_blogs', [controller.list_blogs for _ in range(min(calls, 20))])
+        recorder.time('set_current_blog', [lambda blog_id=rng.choice(blog_ids): controller.set_current_blog(blog_id)
+            for _ in range(calls)])
+
+        # posts are spread over the first post_blogs blogs, loaded in bulk, then measured on the last of them
+        post_blogs = blog_ids[:max(1, min(arguments.post_blogs, arguments.blogs))]
+        per_blog = arguments.posts // len(post_blogs)
+        for blog_id in post_blogs:
+            controller.set_current_blog(blog_id)
+            controller.create_posts(("Post %d of blog %d" % (number, blog_id), "Text of post %d, about topic %d." % (
+                number, number % 997)) for number in range(per_blog))
+        recorder.time('create_post', [lambda number=number: controller.create_post("Timed post %d" % number,
+            "Text of timed post %d." % number) for number in range(calls)])
+        codes = range(1, per_blog + calls + 1)
+        recorder.time('search_post', [lambda code=rng.choice(codes): controller.search_post(code)
+            for _ in range(calls)])
+        recorder.time('retrieve_posts', [lambda term="topic %d." % rng.randrange(997):
+            controller.retrieve_posts(term) for _ in range(min(calls, 100))])
+        recorder.time('list_posts', [controller.list_posts for _ in range(min(calls, 20))])
+        recorder.time('update_post', [lambda code=rng.choice(codes): controller.update_post(code, "Updated post",
+            "Updated text.") for _ in range(calls)])
+        deleted = rng.sample(codes, min(calls, len(codes)))
+        recorder.time('delete_post', [lambda code=code: controller.delete_post(code) for code in deleted])
+        controller.unset_current_blog()
+
+        plain_blogs = blog_ids[len(post_blogs):] or blog_ids
+        renamed = rng.sample(plain_blogs, min(calls, len(plain_blogs)))
+        recorder.time('update_blog', [lambda blog_id=blog_id: controller.update_blog(blog_id, blog_id,
+            "Updated blog %d" % blog_id, "updated_%d" % blog_id, "updated@mail.com") for blog_id in renamed])
+        recorder.time('delete_blog', [lambda blog_id=blog_id: controller.delete_blog(blog_id) for blog_id in renamed])
+        controller.logout()
+
+        return {
+            'meta': {
+                'commit': current_commit(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'users': arguments.users,
+                'blogs': arguments.blogs,
+                'posts': per_blog * len(post_blogs),
+                'calls': calls,
+                'blog_storage': arguments.blog_storage,
+                'post_storage': arguments.post_storage,
+                'seed': arguments.seed,
+            },
+            'startup_seconds': startup,
+            'storage_bytes': storage_bytes(path),
+            'peak_rss_kb': peak_rss_kb(),
+            'operations': recorder.operations,
+        }
+    finally:
+        shutil.rmtree(path)
+
+def compare(base, new, threshold, metric):
+    ''' print the change of every operation and return the ones slower than base by more than threshold '''
+    regressions = []
+    print("%-17s %14s %14s %9s" % ("operation", "base " + metric, "new " + metric, "change"))
+    for name, result in new['operations'].items():
+        if name not in base['operations']:
+            print("%-17s %14s %14.1f %9s" % (name, "-", result[metric], "new"))
+            continue
+        before = base['operations'][name][metric]
+        change = result[metric] / before - 1 if before else 0.0
+        flag = change > threshold
+        if flag:
+            regressions.append(name)
+        print("%-17s %14.1f %14.1f %+8.1f%%%s" % (name, before, result[metric], change * 100,
+            "  REGRESSION" if flag else ""))
+    for name in ('storage_bytes', 'peak_rss_kb'):
+        before, after = base.get(name), new.get(name)
+        if before and after:
+            change = after / before - 1
+            flag = change > threshold
+            if flag:
+                regressions.append(name)
+            print("%-17s %14d %14d %+8.1f%%%s" % (name, before, after, change * 100, "  REGRESSION" if flag else ""))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    run = commands.add_parser('run', help='benchmark the checked out tree')
+    run.add_argument('--users', type=int, default=1000)
+    run.add_argument('--blogs', type=int, default=1000)
+    run.add_argument('--posts', type=int, default=10000, help='posts in total, spread over --post-blogs blogs')
+    run.add_argument('--post-blogs', type=int, default=10)
+    run.add_argument('--calls', type=int, default=1000, help='timed calls per operation')
+    run.add_argument('--blog-storage', default='sqlite', choices=['json', 'sqlite'])
+    run.add_argument('--post-storage', default='log', choices=['pickle', 'log', 'sqlite'])
+    run.add_argument('--seed', type=int, default=2025)
+    run.add_argument('--output', help='JSON file to write, standard output if not given')
+    diff = commands.add_parser('compare', help='flag operations slower than a baseline run')
+    diff.add_argument('base')
+    diff.add_argument('new')
+    diff.add_argument('--threshold', type=float, default=0.2, help='relative slowdown flagged as a regression')
+    diff.add_argument('--metric', default='mean_us', choices=['mean_us', 'p50_us', 'p95_us', 'max_us'])
+    arguments = parser.parse_args()
+
+    if arguments.command == 'run':
+        results = json.dumps(benchmark(arguments), indent=2)
+        if arguments.output:
+            with open(arguments.output, 'w') as file:
+                file.write(results + "\n")
+        else:
+            print(results)
+        return 0
+    with open(arguments.base) as file:
+        base = json.load(file)
+    with open(arguments.new) as file:
+        new = json.load(file)
+    regressions = compare(base, new, arguments.threshold, arguments.metric)
+    if regressions:
+        print("regressions: " + ", ".join(regressions))
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
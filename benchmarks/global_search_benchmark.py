@@ -0,0 +1,85 @@
+''' latency of Controller.search_all_posts against visiting every blog with set_current_blog and retrieve_posts,
+with post stores evicted between searches so the per-blog approach reloads them from disk
+
+python benchmarks/global_search_benchmark.py 100 1000 --posts 100
+'''
+import argparse
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from blogging.configuration import Configuration
+from blogging.controller import Controller
+from blogging.dao.post_store_cache import release_post_stores
+from blogging.index.global_post_index import global_posts
+
+PASSWORD = "blogging2025"
+
+def configure(path):
+    ''' point the configuration at a fresh storage folder with one user '''
+    Configuration.autosave = True
+    Configuration.blog_storage = 'sqlite'
+    Configuration.post_storage = 'log'
+    Configuration.records_path = path
+    Configuration.database_file = os.path.join(path, 'blogging.db')
+    Configuration.users_file = os.path.join(path, 'users.txt')
+    with open(Configuration.users_file, 'w') as file:
+        file.write("user,%s\n" % hashlib.sha256(PASSWORD.encode()).hexdigest())
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+def per_blog(controller, term):
+    ''' the search done before search_all_posts existed '''
+    found = []
+    for blog in controller.list_blogs():
+        controller.set_current_blog(blog.id)
+        found.extend((blog.id, post) for post in controller.retrieve_posts(term))
+    controller.unset_current_blog()
+    return found
+
+def run(blogs, posts):
+    path = tempfile.mkdtemp()
+    try:
+        configure(path)
+        global_posts.clear()
+        controller = Controller()
+        controller.login("user", PASSWORD)
+        for blog_id in range(1000000000, 1000000000 + blogs):
+            controller.create_blog(blog_id, "Blog %d" % blog_id, "blog_%d" % blog_id, "blog%d@mail.com" % blog_id)
+            controller.set_current_blog(blog_id)
+            controller.create_posts(("Post %d" % number, "Text of post %d, about topic %d." % (number, number % 997))
+                for number in range(posts))
+        controller.unset_current_blog()
+        controller.flush()
+        term = "topic 42."
+
+        release_post_stores()
+        naive, expected = timed(lambda: per_blog(controller, term))
+        release_post_stores()
+        cold, found = timed(lambda: list(controller.search_all_posts(term)))
+        assert sorted((blog_id, post.post_code) for blog_id, post in found) == \
+            sorted((blog_id, post.post_code) for blog_id, post in expected)
+        release_post_stores()
+        warm, _ = timed(lambda: list(controller.search_all_posts(term)))
+        first, _ = timed(lambda: next(controller.search_all_posts(term), None))
+        print("%6d blogs x %5d posts  per blog %9.2f ms  first search %9.2f ms  indexed %8.2f ms  "
+            "first result %7.3f ms" % (blogs, posts, naive * 1000, cold * 1000, warm * 1000, first * 1000))
+        controller.logout()
+    finally:
+        global_posts.clear()
+        shutil.rmtree(path)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('blogs', type=int, nargs='*', default=[10, 100, 1000])
+    parser.add_argument('--posts', type=int, default=100, help='posts per blog')
+    arguments = parser.parse_args()
+    for blogs in arguments.blogs:
+        run(blogs, arguments.posts)
+
+if __name__ == '__main__':
+    main()
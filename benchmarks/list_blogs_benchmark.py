@@ -0,0 +1,110 @@
+''' cost of Controller.list_blogs snapshots of the SQLite catalog, and the latency of blog writes made while readers
+keep iterating snapshots, against reading the catalog table as listings did before
+
+python benchmarks/list_blogs_benchmark.py 1000 10000 --readers 4
+'''
+import argparse
+import hashlib
+import os
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from blogging.configuration import Configuration
+from blogging.controller import Controller
+from blogging.engine import BlogEngine
+
+PASSWORD = "blogging2025"
+
+def configure(path):
+    ''' point the configuration at a fresh storage folder with one user '''
+    Configuration.autosave = True
+    Configuration.blog_storage = 'sqlite'
+    Configuration.records_path = path
+    Configuration.database_file = os.path.join(path, 'blogging.db')
+    Configuration.users_file = os.path.join(path, 'users.txt')
+    with open(Configuration.users_file, 'w') as file:
+        file.write("user,%s\n" % hashlib.sha256(PASSWORD.encode()).hexdigest())
+
+def timed(function, repeat):
+    ''' median seconds of repeat runs of function '''
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+def table_listing(controller):
+    ''' the listing read from the catalog table under the catalog lock, as before snapshots '''
+    blog_dao = controller.blog_dao
+    with controller.engine.catalog_lock.read():
+        return [blog_dao.make_blog(row) for row in
+            blog_dao.connection.execute('SELECT id, name, url, email FROM blog ORDER BY rowid')]
+
+def write_latencies(controller, readers, listing, writes):
+    ''' per-write seconds of renaming blogs back and forth while readers threads iterate listings,
+    and the number of listings they read meanwhile '''
+    done = threading.Event()
+    listings = []
+
+    def read():
+        count = 0
+        while not done.is_set():
+            for _ in listing():
+                pass
+            count += 1
+        listings.append(count)
+
+    threads = [threading.Thread(target=read) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    latencies = []
+    try:
+        for number in range(writes):
+            start = time.perf_counter()
+            controller.update_blog(1000000000 + number, 2000000000 + number, "Moved", "moved", "moved@mail.com")
+            controller.update_blog(2000000000 + number, 1000000000 + number, "Blog", "blog", "blog@mail.com")
+            latencies.append((time.perf_counter() - start) / 2)
+            # paced, so the readers get the catalog between writes
+            time.sleep(0.005)
+    finally:
+        done.set()
+        for thread in threads:
+            thread.join()
+    return latencies, sum(listings)
+
+def run(blogs, readers, repeat):
+    path = tempfile.mkdtemp()
+    try:
+        configure(path)
+        controller = Controller(engine=BlogEngine())
+        controller.login("user", PASSWORD)
+        for blog_id in range(1000000000, 1000000000 + blogs):
+            controller.create_blog(blog_id, "Blog", "blog", "blog@mail.com")
+        controller.flush()
+        listing = lambda: controller.list_blogs()
+        table = lambda: table_listing(controller)
+        print("%7d blogs  list_blogs %9.3f ms  iterated %9.2f ms  table listing %9.2f ms" % (blogs,
+            timed(listing, repeat) * 1000, timed(lambda: list(listing()), repeat) * 1000, timed(table, repeat) * 1000))
+        for name, reader in (('snapshots', listing), ('table', table)):
+            latencies, listings = write_latencies(controller, readers, reader, 50)
+            latencies.sort()
+            print("    writes with %d readers of %-9s  median %8.3f ms  p95 %8.3f ms  listings read %5d" % (readers,
+                name, statistics.median(latencies) * 1000, latencies[int(len(latencies) * 0.95)] * 1000, listings))
+        controller.logout()
+    finally:
+        shutil.rmtree(path)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('blogs', type=int, nargs='*', default=[1000, 10000])
+    parser.add_argument('--readers', type=int, default=4, help='threads iterating listings during the writes')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per measurement, the median is reported')
+    arguments = parser.parse_args()
+    for blogs in arguments.blogs:
+        run(blogs, arguments.readers, arguments.repeat)
+
+if __name__ == '__main__':
+    main()
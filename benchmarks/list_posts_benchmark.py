@@ -0,0 +1,31 @@
+''' shows list_posts of the post log store costs the same whatever the number of posts, paying only for the posts read '''
+import sys
+import time
+from blogging.blog import Blog
+from blogging.dao.post_dao_log import PostDAOLog
+from blogging.post import Post
+
+def best_of(function, repeat=20):
+    ''' best wall time of function over repeat runs '''
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main(sizes):
+    for size in sizes:
+        dao = PostDAOLog(Blog(1111114444, "Short Journey", "short_journey", "short.journey@gmail.com"), autosave=False)
+        dao.create_posts([Post(code, "Title %d" % code, "Text %d" % code) for code in range(1, size + 1)])
+        listing = best_of(dao.list_posts)
+        newest = best_of(lambda: dao.list_posts()[:10])
+        full = best_of(lambda: list(dao.list_posts()), 5)
+        # the list built and reversed by each call before the view
+        copied = best_of(lambda: list(reversed(dao.posts.values())), 5)
+        print("%8d posts  list_posts %6.2f us  newest 10 %6.2f us  read all %8.2f ms (%5.1f ns/post)  copy %8.2f ms" %
+            (size, listing * 1e6, newest * 1e6, full * 1000, full / size * 1e9, copied * 1000))
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000, 1000000])
@@ -0,0 +1,71 @@
+''' latency of retrieve_posts over one large blog, scanned serially and across 1, 2, 4, ... worker processes up to
+the number of cores, with the one-off encoding of the blog's segment reported apart
+
+python benchmarks/parallel_scan_benchmark.py 100000 --text 500
+'''
+import argparse
+import os
+import random
+import statistics
+import time
+from blogging.blog import Blog
+from blogging.configuration import Configuration
+from blogging.index.parallel_scan import ParallelScanner
+
+WORDS = ("journey", "mountain", "river", "coffee", "morning", "train", "city", "market", "story", "window")
+
+def timed(function, repeat):
+    ''' median seconds of repeat runs of function and its last result '''
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+def make_blog(posts, text):
+    Configuration.autosave = False
+    blog = Blog(1000000000, "Blog", "blog", "blog@mail.com")
+    generator = random.Random(posts)
+    blog.create_posts(("Post %d" % number, " ".join(generator.choice(WORDS) for _ in range(text // 6)))
+        for number in range(posts))
+    return blog
+
+def worker_counts():
+    counts = []
+    count = 1
+    while count < (os.cpu_count() or 1):
+        counts.append(count)
+        count *= 2
+    return counts + [os.cpu_count() or 1]
+
+def run(posts, text, repeat):
+    blog = make_blog(posts, text)
+    # rare enough that matching posts do not dominate, common enough to return some
+    term = "coffee coffee coffee coffee"
+    serial, expected = timed(lambda: blog.retrieve_posts(term), repeat)
+    print("%7d posts x %5d bytes  %5d matches  serial %9.2f ms" % (posts, text, len(expected), serial * 1000))
+    for workers in worker_counts():
+        scanner = ParallelScanner(workers, min_parallel_bytes=0)
+        try:
+            encode, segment = timed(lambda: scanner.segment(blog), 1)
+            # the first scan starts the worker processes
+            scanner.scan(segment, term)
+            scan, found = timed(lambda: scanner.scan_blog(blog, term), repeat)
+            assert [post.post_code for post in found] == [post.post_code for post in expected]
+            print("    %3d workers  segment %9.2f ms  scan %9.2f ms  speedup %5.2fx of %d cores" % (workers,
+                encode * 1000, scan * 1000, serial / scan, os.cpu_count() or 1))
+        finally:
+            scanner.shutdown()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('posts', type=int, nargs='*', default=[10000, 100000])
+    parser.add_argument('--text', type=int, default=500, help='bytes of text per post')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per measurement, the median is reported')
+    arguments = parser.parse_args()
+    for posts in arguments.posts:
+        run(posts, arguments.text, arguments.repeat)
+
+if __name__ == '__main__':
+    main()
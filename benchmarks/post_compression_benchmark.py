@@ -0,0 +1,77 @@
+''' size on disk, load time and search time of a blog's posts stored by the log DAO with post compression off,
+with zlib and a dictionary trained on the blog, and with lzma; searches run over the loaded posts, scanning every
+text and through the in-memory index the first search builds
+
+python benchmarks/post_compression_benchmark.py 10000 --text 2000
+'''
+import argparse
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from blogging.blog import Blog
+from blogging.configuration import Configuration
+from blogging.dao.indexed_post_dao import IndexedPostDAO
+from blogging.dao.post_dao_log import PostDAOLog
+from blogging.post import Post
+
+WORDS = ("journey", "mountain", "river", "coffee", "morning", "train", "city", "market", "story", "window",
+    "evening", "bridge", "harbour", "garden", "letter", "station", "summer", "winter", "friend", "village")
+
+HEADER = "Posted in Travel by the editors. Subscribe to our newsletter for weekly stories from the road.\n"
+FOOTER = "\nShare this article with your friends. Comments are moderated and may take a day to appear."
+
+def timed(function, repeat=1):
+    ''' median seconds of repeat runs of function and its last result '''
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+def article(generator, text):
+    return HEADER + " ".join(generator.choice(WORDS) for _ in range(text // 7)) + FOOTER
+
+def disk_bytes(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+def run(posts, text, method, repeat):
+    Configuration.post_compression = method
+    path = tempfile.mkdtemp()
+    try:
+        blog = Blog(1000000000, "Blog", "blog", "blog@mail.com")
+        generator = random.Random(posts)
+        dao = PostDAOLog(blog, autosave=True, path=path)
+        dao.create_posts([Post(code, "Post %d" % code, article(generator, text)) for code in range(1, posts + 1)])
+        dao.compact()
+        dao.close()
+        size = disk_bytes(path)
+        load, dao = timed(lambda: PostDAOLog(blog, autosave=True, path=path), repeat)
+        term = "garden letter station"
+        scan, expected = timed(lambda: dao.retrieve_posts(term), repeat)
+        indexed = IndexedPostDAO(dao)
+        first, _ = timed(lambda: indexed.retrieve_posts(term))
+        warm, found = timed(lambda: indexed.retrieve_posts(term), repeat)
+        assert [post.post_code for post in found] == [post.post_code for post in expected]
+        dao.close()
+        print("    %-5s  disk %9.2f MB  load %9.2f ms  scan %9.2f ms  first indexed %9.2f ms  indexed %7.2f ms" % (
+            method or 'off', size / 1e6, load * 1000, scan * 1000, first * 1000, warm * 1000))
+    finally:
+        shutil.rmtree(path)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('posts', type=int, nargs='*', default=[1000, 10000])
+    parser.add_argument('--text', type=int, default=2000, help='bytes of text per post')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per measurement, the median is reported')
+    arguments = parser.parse_args()
+    for posts in arguments.posts:
+        print("%7d posts x %5d bytes" % (posts, arguments.text))
+        for method in (None, 'zlib', 'lzma'):
+            run(posts, arguments.text, method, arguments.repeat)
+
+if __name__ == '__main__':
+    main()
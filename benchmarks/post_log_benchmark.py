@@ -0,0 +1,50 @@
+''' cost of one autosaved create_post: whole-store pickle rewrite against one appended log record '''
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import time
+from blogging.blog import Blog
+from blogging.dao.post_dao_log import PostDAOLog
+from blogging.post import Post
+
+TEXT = "Along the way there were challenges. " * 40
+
+def rewrite_cost(path, posts, count):
+    ''' mean seconds per write when every mutation pickles the whole store, as PostDAOPickle does '''
+    file_name = os.path.join(path, 'rewrite.dat')
+    start = time.perf_counter()
+    for code in range(len(posts) + 1, len(posts) + count + 1):
+        posts[code] = Post(code, "Title %d" % code, TEXT)
+        with open(file_name, 'wb') as file:
+            pickle.dump(posts, file)
+    return (time.perf_counter() - start) / count
+
+def log_cost(path, posts, count):
+    ''' mean seconds per write when every mutation appends one log record '''
+    dao = PostDAOLog(Blog(1, "Benchmark", "benchmark", "benchmark@mail.com"), autosave=True, path=path)
+    dao.compaction_records = sys.maxsize
+    for post in posts.values():
+        dao.create_post(post)
+    start = time.perf_counter()
+    for code in range(len(posts) + 1, len(posts) + count + 1):
+        dao.create_post(Post(code, "Title %d" % code, TEXT))
+    elapsed = time.perf_counter() - start
+    dao.close()
+    return elapsed / count
+
+def main(sizes, count=50):
+    for size in sizes:
+        path = tempfile.mkdtemp()
+        try:
+            posts = {code: Post(code, "Title %d" % code, TEXT) for code in range(1, size + 1)}
+            rewrite = rewrite_cost(path, dict(posts), count)
+            log = log_cost(path, posts, count)
+            print("%7d posts  rewrite %9.3fms/post  log %7.3fms/post  %7.1fx" %
+                (size, rewrite * 1000, log * 1000, rewrite / log))
+        finally:
+            shutil.rmtree(path)
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [100, 1000, 10000])
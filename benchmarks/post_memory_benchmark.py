@@ -0,0 +1,37 @@
+''' bytes per post: the previous dict-backed Post against the slotted one '''
+import datetime
+import sys
+import tracemalloc
+from blogging.post import Post
+
+class DictPost():
+    ''' Post as it was before __slots__: a dict-backed object holding two datetimes '''
+
+    def __init__(self, post_code, post_title, post_text):
+        self.post_code = post_code
+        self.post_title = post_title
+        self.post_text = post_text
+        now = datetime.datetime.now()
+        self.creation_time = now
+        self.update_time = now
+
+def bytes_per_post(post_class, count):
+    ''' memory allocated per post, not counting the title and text strings '''
+    title = "Title"
+    text = "Text"
+    tracemalloc.start()
+    posts = [post_class(code, title, text) for code in range(count)]
+    # the list and the post codes are the same for both classes
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del posts
+    return size / count
+
+def main(count):
+    before = bytes_per_post(DictPost, count)
+    after = bytes_per_post(Post, count)
+    print("%d posts  dict-backed %.1f bytes/post  slotted %.1f bytes/post  saved %.0f%%" %
+        (count, before, after, 100 * (before - after) / before))
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
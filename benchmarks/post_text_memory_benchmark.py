@@ -0,0 +1,67 @@
+''' resident memory after loading a blog of long posts: texts held in memory (log) against texts mapped (mmap) '''
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from blogging.blog import Blog
+from blogging.configuration import Configuration
+
+def resident_bytes():
+    ''' current (anonymous, file-backed) resident memory, from /proc on Linux '''
+    with open('/proc/self/status') as file:
+        status = dict(line.split(':', 1) for line in file)
+    # mapped texts are file-backed pages, which the kernel reclaims under pressure instead of swapping
+    return int(status['RssAnon'].split()[0]) * 1024, int(status['RssFile'].split()[0]) * 1024
+
+def configure(storage, path):
+    Configuration.autosave = True
+    Configuration.post_storage = storage
+    Configuration.records_path = path
+    Configuration.database_file = os.path.join(path, 'blogging.db')
+
+def populate(count, text_bytes):
+    ''' create count posts of about text_bytes each '''
+    blog = Blog(1, "Articles", "articles", "articles@mail.com")
+    paragraph = "Long article text about topic %d. "
+    blog.create_posts(("Article %d" % number, (paragraph % number) * (text_bytes // len(paragraph)))
+        for number in range(count))
+    blog.release_post_store()
+
+def measure(storage, path):
+    ''' run in a fresh process: load the blog, page through it and search one post, report memory and times '''
+    configure(storage, path)
+    before = resident_bytes()
+    blog = Blog(1, "Articles", "articles", "articles@mail.com")
+    start = time.perf_counter()
+    count = blog.post_dao.counter
+    loaded = time.perf_counter() - start
+    start = time.perf_counter()
+    titles = [post.post_title for post in blog.list_posts()]
+    listed = time.perf_counter() - start
+    start = time.perf_counter()
+    for code in range(1, count + 1, max(1, count // 1000)):
+        blog.search_post(code).post_text
+    searched = time.perf_counter() - start
+    after = resident_bytes()
+    print("%-5s %8d posts  heap +%7.1f MB  file-backed +%7.1f MB  load %6.2f s  list_posts %6.3f s  "
+        "1000 search_post+text %6.3f s" % (storage, len(titles), (after[0] - before[0]) / 2 ** 20,
+        (after[1] - before[1]) / 2 ** 20, loaded, listed, searched))
+
+def main(count, text_bytes):
+    for storage in ['log', 'mmap']:
+        path = tempfile.mkdtemp()
+        try:
+            configure(storage, path)
+            populate(count, text_bytes)
+            subprocess.run([sys.executable, __file__, 'measure', storage, path], check=True,
+                env=dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path)))
+        finally:
+            shutil.rmtree(path)
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['measure']:
+        measure(sys.argv[2], sys.argv[3])
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000, int(sys.argv[2]) if len(sys.argv) > 2 else 4096)
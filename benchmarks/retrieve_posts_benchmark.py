@@ -0,0 +1,54 @@
+''' compares Blog.retrieve_posts served by the n-gram index against the linear scan it replaces '''
+import random
+import sys
+import time
+from blogging.post import Post
+from blogging.index.ngram_index import NGramIndex
+
+WORDS = ["journey", "travel", "mountain", "river", "Python", "coffee", "storm", "kid",
+    "challenge", "story", "road", "city", "night", "morning", "friend", "market"]
+
+def make_posts(count, words_per_post=60, seed=2025):
+    ''' generate count synthetic posts '''
+    rng = random.Random(seed)
+    posts = []
+    for code in range(1, count + 1):
+        title = " ".join(rng.choice(WORDS) for _ in range(4))
+        text = " ".join(rng.choice(WORDS) for _ in range(words_per_post)) + " tag%d" % code
+        posts.append(Post(code, title, text))
+    return posts
+
+def scan(posts, term):
+    ''' the linear substring scan done by the post DAO '''
+    return [post for post in posts if term in post.post_title or term in post.post_text]
+
+def best_of(function, repeat=5):
+    ''' best wall time of function over repeat runs '''
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main(sizes):
+    for size in sizes:
+        posts = make_posts(size)
+        by_code = {post.post_code: post for post in posts}
+        start = time.perf_counter()
+        index = NGramIndex()
+        for post in posts:
+            index.add(post.post_code, post.post_title, post.post_text)
+        build = time.perf_counter() - start
+        print("%d posts, index built in %.2fs" % (size, build))
+        for term in ["tag%d" % (size // 2), "Python coffee", "journey"]:
+            expected = scan(posts, term)
+            assert expected == [by_code[code] for code in index.search(term)]
+            scanned = best_of(lambda: scan(posts, term))
+            indexed = best_of(lambda: [by_code[code] for code in index.search(term)])
+            print("  %-16r %6d hits  scan %8.2fms  index %8.2fms  speedup %6.1fx" %
+                (term, len(expected), scanned * 1000, indexed * 1000, scanned / indexed))
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 10000, 50000])
@@ -0,0 +1,63 @@
+''' query latency of Blog.search_posts served by the word index, for every search mode, against retrieve_posts '''
+import random
+import sys
+import time
+from blogging.index.ngram_index import NGramIndex
+from blogging.index.word_index import WordIndex
+from blogging.post import Post
+
+WORDS = ["journey", "travel", "mountain", "river", "Python", "coffee", "storm", "kid",
+    "challenge", "story", "road", "city", "night", "morning", "friend", "market"]
+
+def make_posts(count, words_per_post=60, seed=2025):
+    ''' generate count synthetic posts over a common vocabulary plus rare words '''
+    rng = random.Random(seed)
+    posts = []
+    for code in range(1, count + 1):
+        title = " ".join(rng.choice(WORDS) for _ in range(4))
+        text = " ".join(rng.choice(WORDS) for _ in range(words_per_post)) + " tag%d topic%d" % (code, code % 997)
+        posts.append(Post(code, title, text))
+    return posts
+
+def best_of(function, repeat=5):
+    ''' best wall time of function over repeat runs '''
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main(size, limit):
+    posts = make_posts(size)
+    start = time.perf_counter()
+    index = WordIndex()
+    for post in posts:
+        index.add(post.post_code, post.post_title, post.post_text)
+    print("%d posts, word index built in %.2fs, top %d results" % (size, time.perf_counter() - start, limit))
+    ngrams = NGramIndex()
+    for post in posts:
+        ngrams.add(post.post_code, post.post_title, post.post_text)
+
+    queries = [
+        ("tag%d" % (size // 2), 'all', False),
+        ("topic42", 'all', False),
+        ("topic42 storm", 'all', False),
+        ("topic42 topic43", 'any', False),
+        ("PYTHON coffee", 'phrase', False),
+        ("topic42 Python", 'all', True),
+        ("opic4", 'substring', False),
+        ("journey", 'all', False),
+    ]
+    for query, mode, case_sensitive in queries:
+        hits = len(index.search(query, mode, case_sensitive))
+        ranked = best_of(lambda: index.search(query, mode, case_sensitive, limit))
+        print("  %-16r %-9s %-5s %7d hits  top %d %9.2f ms  scanned %7d" % (query, mode,
+            'case' if case_sensitive else '', hits, limit, ranked * 1000, index.last_scanned))
+    for term in ["topic42", "journey"]:
+        substring = best_of(lambda: ngrams.search(term))
+        print("  %-16r retrieve_posts (n-gram index, unranked) %9.2f ms" % (term, substring * 1000))
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000, int(sys.argv[2]) if len(sys.argv) > 2 else 10)
@@ -0,0 +1,90 @@
+''' time a cold start: importing the controller, constructing it, and the first login and search_blog,
+each run in a fresh interpreter over a catalog of synthetic blogs
+
+python benchmarks/startup_benchmark.py --users 100000 --blogs 100000 --runs 10
+'''
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+PASSWORD = "blogging2025"
+
+# run in each fresh interpreter, prints the seconds spent in every step as JSON
+COLD_START = '''
+import json, sys, time
+start = time.perf_counter()
+from blogging.configuration import Configuration
+from blogging.controller import Controller
+imported = time.perf_counter()
+Configuration.autosave = True
+Configuration.blog_storage, Configuration.records_path, Configuration.database_file, Configuration.users_file = sys.argv[1:5]
+constructing = time.perf_counter()
+controller = Controller()
+constructed = time.perf_counter()
+controller.login("user0", %r)
+logged = time.perf_counter()
+controller.search_blog(1000000000)
+searched = time.perf_counter()
+print(json.dumps({'import': imported - start, 'construct': constructed - constructing,
+    'first_login': logged - constructed, 'first_search_blog': searched - logged}))
+''' % PASSWORD
+
+# fills the catalog once, before the timed runs
+POPULATE = '''
+import sys
+from blogging.configuration import Configuration
+from blogging.controller import Controller
+Configuration.autosave = True
+Configuration.blog_storage, Configuration.records_path, Configuration.database_file, Configuration.users_file = sys.argv[1:5]
+controller = Controller()
+controller.login("user0", %r)
+for blog_id in range(1000000000, 1000000000 + int(sys.argv[5])):
+    controller.create_blog(blog_id, "Blog number %%d" %% blog_id, "blog_%%d" %% blog_id, "blog%%d@mail.com" %% blog_id)
+controller.logout()
+''' % PASSWORD
+
+def run(code, arguments):
+    ''' run code in a fresh interpreter sharing this one's import path, returns its standard output '''
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join(path for path in sys.path if path))
+    return subprocess.run([sys.executable, "-c", code] + arguments, capture_output=True, text=True, check=True,
+        env=environment).stdout
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--blogs', type=int, default=10000)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--blog-storage', default='json', choices=['json', 'sqlite'])
+    arguments = parser.parse_args()
+
+    path = tempfile.mkdtemp()
+    try:
+        users_file = os.path.join(path, 'users.txt')
+        password_hash = hashlib.sha256(PASSWORD.encode()).hexdigest()
+        with open(users_file, 'w') as file:
+            for number in range(arguments.users):
+                file.write("user%d,%s\n" % (number, password_hash))
+        settings = [arguments.blog_storage, path, os.path.join(path, 'blogging.db'), users_file]
+        run(POPULATE, settings + [str(arguments.blogs)])
+
+        steps = {}
+        for _ in range(arguments.runs):
+            for step, seconds in json.loads(run(COLD_START, settings)).items():
+                steps.setdefault(step, []).append(seconds)
+    finally:
+        shutil.rmtree(path)
+
+    print("%d users, %d blogs, %s catalog, median of %d cold starts" % (arguments.users, arguments.blogs,
+        arguments.blog_storage, arguments.runs))
+    for step, seconds in steps.items():
+        print("%-18s %10.2f ms" % (step, statistics.median(seconds) * 1000))
+    print("%-18s %10.2f ms" % ('total', sum(statistics.median(seconds) for seconds in steps.values()) * 1000))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+''' compares the SQLite DAOs with the JSON/pickle ones at growing numbers of posts '''
+import os
+import shutil
+import sys
+import tempfile
+import time
+from blogging.blog import Blog
+from blogging.configuration import Configuration
+from blogging.dao.post_dao_factory import create_post_dao
+from blogging.post import Post
+
+def timed(function):
+    ''' run function, returning its result and wall time '''
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+def run(storage, size, path):
+    ''' time the main post DAO operations of one storage backend '''
+    Configuration.autosave = True
+    Configuration.post_storage = storage
+    Configuration.records_path = path
+    Configuration.database_file = os.path.join(path, 'blogging.db')
+    blog = Blog(1, "Benchmark", "benchmark", "benchmark@mail.com")
+    post_dao = create_post_dao(blog)
+    # bulk load through the DAO, as a migration would
+    _, load = timed(lambda: [post_dao.create_post(Post(code, "Title %d" % code, "Text of post number %d" % code))
+        for code in range(1, size + 1)])
+    blog.release_post_store()
+    post_dao, reopen = timed(lambda: create_post_dao(blog))
+    _, search = timed(lambda: post_dao.search_post(size // 2))
+    _, retrieve = timed(lambda: post_dao.retrieve_posts("number %d" % (size // 3)))
+    _, retrieve_again = timed(lambda: post_dao.retrieve_posts("number %d" % (size // 4)))
+    _, listing = timed(lambda: post_dao.list_posts())
+    print("%-7s %8d posts  load %8.2fs  reopen %8.3fs  search %8.3fms  retrieve first %8.3fms next %8.3fms  list %8.3fs" %
+        (storage, size, load, reopen, search * 1000, retrieve * 1000, retrieve_again * 1000, listing))
+
+def main(sizes, storages):
+    for size in sizes:
+        for storage in storages:
+            path = tempfile.mkdtemp()
+            try:
+                run(storage, size, path)
+            finally:
+                shutil.rmtree(path)
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [10000, 100000, 1000000], ['pickle', 'log', 'sqlite'])
@@ -0,0 +1,61 @@
+''' bytes written per byte of post changed, writing every change against batched autosave '''
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from blogging.blog import Blog
+from blogging.configuration import Configuration
+from blogging.dao.post_store_cache import post_stores
+
+def io_counters():
+    ''' bytes passed to write calls and number of write calls so far, from /proc on Linux '''
+    with open('/proc/self/io') as file:
+        counters = dict(line.split(': ') for line in file.read().splitlines())
+    return int(counters['wchar']), int(counters['syscw'])
+
+def workload(blog, count, rng):
+    ''' create count posts, then edit a hot tenth of them repeatedly and delete some, returns the bytes changed '''
+    changed = 0
+    for number in range(count):
+        post = blog.create_post("Post %d" % number, "Text of post number %d." % number)
+        changed += len(post.post_title) + len(post.post_text)
+    hot = list(range(1, count // 10 + 1))
+    for version in range(count):
+        post_title, post_text = "Post %d" % version, "Edited text, version %d." % version
+        blog.update_post(rng.choice(hot), post_title, post_text)
+        changed += len(post_title) + len(post_text)
+    for post_code in rng.sample(range(count // 10 + 1, count + 1), count // 10):
+        blog.delete_post(post_code)
+    return changed
+
+def main(count, storages):
+    for storage in storages:
+        for batch in (1, 100):
+            path = tempfile.mkdtemp()
+            try:
+                Configuration.autosave = True
+                Configuration.post_storage = storage
+                Configuration.records_path = path
+                Configuration.database_file = os.path.join(path, 'blogging.db')
+                Configuration.autosave_batch_records = batch
+                Configuration.autosave_interval = None
+                Configuration.log_fsync = False
+                Configuration.log_compaction_records = 10 ** 9
+                blog = Blog(1, "Amplification", "amplification", "amplification@mail.com")
+                before = io_counters()
+                start = time.perf_counter()
+                changed = workload(blog, count, random.Random(2025))
+                post_stores.flush()
+                elapsed = time.perf_counter() - start
+                after = io_counters()
+                written = after[0] - before[0]
+                print("%-6s batch %4d  %10d bytes written  %8d writes  amplification %6.2fx  %6.2f s" % (
+                    storage, batch, written, after[1] - before[1], written / changed, elapsed))
+                blog.release_post_store()
+            finally:
+                shutil.rmtree(path)
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000, sys.argv[2:] or ['log', 'mmap', 'sqlite'])
@@ -0,0 +1,109 @@
+import asyncio
+import shutil
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from blogging.blog import Blog
+from blogging.configuration import Configuration
+from blogging.controller import Controller
+from blogging.async_controller import AsyncController
+from blogging.exception.illegal_access_exception import IllegalAccessException
+from blogging.exception.illegal_operation_exception import IllegalOperationException
+from blogging.exception.no_current_blog_exception import NoCurrentBlogException
+from helpers import configure_users_file, preserve_configuration
+
+class AsyncControllerTest(unittest.TestCase):
+    """
+    Checks the async front-end returns what the Controller does and coalesces bursts of post creations.
+    """
+
+    def setUp(self):
+        """Set up an async controller over a temporary users file."""
+        preserve_configuration(self, 'users_file', 'autosave')
+        self.path = tempfile.mkdtemp()
+        configure_users_file(self.path)
+        Configuration.autosave = False
+        self.executor = ThreadPoolExecutor(4)
+        self.controller = AsyncController(Controller(), self.executor)
+
+    def tearDown(self):
+        self.executor.shutdown()
+        shutil.rmtree(self.path)
+
+    def run_async(self, coroutine):
+        return asyncio.run(coroutine)
+
+    def test_operations(self):
+        async def scenario():
+            with self.assertRaises(IllegalAccessException):
+                await self.controller.create_post("Starting my journey", "Once upon a time")
+            await self.controller.login("user", "blogging2025")
+            blog = await self.controller.create_blog(1111114444, "Short Journey", "short_journey", "short.journey@gmail.com")
+            self.assertEqual(blog, await self.controller.search_blog(1111114444))
+            self.assertEqual([blog], await self.controller.retrieve_blogs("Short"))
+            with self.assertRaises(NoCurrentBlogException):
+                await self.controller.create_post("Starting my journey", "Once upon a time")
+            await self.controller.set_current_blog(1111114444)
+            self.assertEqual(blog, await self.controller.get_current_blog())
+            post = await self.controller.create_post("Starting my journey", "Once upon a time")
+            self.assertEqual(1, post.post_code)
+            self.assertEqual(post, await self.controller.search_post(1))
+            self.assertTrue(await self.controller.update_post(1, "Starting my journey", "Once upon a time, again"))
+            self.assertEqual([post.post_code], [post.post_code for post in await self.controller.retrieve_posts("again")])
+            self.assertTrue(await self.controller.delete_post(1))
+            self.assertEqual([], await self.controller.list_posts())
+            with self.assertRaises(IllegalOperationException):
+                await self.controller.delete_blog(1111114444)
+            await self.controller.unset_current_blog()
+            self.assertTrue(await self.controller.delete_blog(1111114444))
+            self.assertEqual([], await self.controller.list_blogs())
+            await self.controller.logout()
+        self.run_async(scenario())
+
+    def test_burst_of_posts_is_written_together(self):
+        async def scenario():
+            await self.controller.login("user", "blogging2025")
+            await self.controller.create_blog(1111114444, "Short Journey", "short_journey", "short.journey@gmail.com")
+            await self.controller.set_current_blog(1111114444)
+            posts = await asyncio.gather(*[self.controller.create_post("Post %d" % i, "text") for i in range(100)])
+            self.assertEqual(list(range(1, 101)), [post.post_code for post in posts])
+            self.assertEqual(["Post %d" % i for i in range(100)], [post.post_title for post in posts])
+            self.assertEqual(100, len(await self.controller.list_posts()))
+            # the first post is written alone, everything queued meanwhile goes in the next write
+            self.assertLessEqual(self.controller.coalescer.writes, 2)
+            self.assertEqual(set(), self.controller.coalescer.tasks)
+        self.run_async(scenario())
+
+    def test_failed_flush_is_reported(self):
+        coalescer = self.controller.coalescer
+        async def failing_flush(key, blog):
+            raise RuntimeError("flush failed")
+        coalescer.flush = failing_flush
+        async def scenario():
+            reported = []
+            asyncio.get_running_loop().set_exception_handler(lambda loop, context: reported.append(context['exception']))
+            waiting = asyncio.ensure_future(coalescer.create_post(Blog(1, "Blog", "blog", "blog@mail.com"), "Post", "text"))
+            for _ in range(3):
+                await asyncio.sleep(0)
+            self.assertEqual(["flush failed"], [str(exception) for exception in reported])
+            self.assertEqual(set(), coalescer.tasks)
+            waiting.cancel()
+        self.run_async(scenario())
+
+    def test_logout_runs_in_the_executor(self):
+        threads = []
+        logout = self.controller.controller.logout
+        def record_logout():
+            threads.append(threading.current_thread())
+            return logout()
+        self.controller.controller.logout = record_logout
+        async def scenario():
+            await self.controller.login("user", "blogging2025")
+            self.assertTrue(await self.controller.logout())
+        self.run_async(scenario())
+        self.assertEqual(1, len(threads))
+        self.assertIsNot(threading.main_thread(), threads[0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import unittest
+from blogging.blog import Blog
+from blogging.configuration import Configuration
+from blogging.controller import Controller
+from blogging.dao.blog_dao_sqlite import BlogDAOSQLite
+from blogging.dao.post_dao_log import PostDAOLog
+from blogging.dao.post_store_cache import post_stores
+from blogging.post import Post
+from helpers import configure_users_file, preserve_configuration
+
+class AutosaveBatchTest(unittest.TestCase):
+    """
+    Test cases for batched autosave: pending changes, coalescing, dirty blogs and flushing on logout.
+    """
+
+    def setUp(self):
+        """Set up a temporary records folder and batched autosave."""
+        preserve_configuration(self, 'users_file', 'autosave', 'blog_storage', 'post_storage', 'database_file',
+            'records_path', 'autosave_batch_records', 'autosave_interval')
+        self.path = tempfile.mkdtemp()
+        Configuration.autosave = True
+        Configuration.autosave_batch_records = 10
+        Configuration.autosave_interval = None
+        Configuration.database_file = os.path.join(self.path, "blogging.db")
+        Configuration.records_path = self.path
+        self.blog = Blog(1111114444, "Short Journey", "short_journey", "short.journey@gmail.com")
+
+    def tearDown(self):
+        post_stores.invalidate(1111114444)
+        shutil.rmtree(self.path)
+
+    def open_log(self):
+        dao = PostDAOLog(self.blog, path=self.path)
+        self.addCleanup(dao.close)
+        return dao
+
+    def test_log_writes_once_per_batch(self):
+        """Test changes are written only once the batch is full."""
+        dao = self.open_log()
+        for code in range(1, 10):
+            dao.create_post(Post(code, "Title %d" % code, "Text"))
+        self.assertFalse(os.path.exists(dao.log_file))
+        dao.create_post(Post(10, "Title 10", "Text"))
+        self.assertEqual(10, dao.log_records)
+        self.assertEqual(10, len(self.open_log().list_posts()))
+
+    def test_log_coalesces_changes_to_one_post(self):
+        """Test a post changed many times between writes is written once, in its latest state."""
+        dao = self.open_log()
+        dao.create_post(Post(1, "Title", "Text"))
+        for version in range(20):
+            dao.update_post(1, "Title", "Text version %d" % version)
+        dao.create_post(Post(2, "Created and deleted", "Text"))
+        dao.delete_post(2)
+        dao.flush()
+        self.assertEqual(2, dao.log_records)
+        replayed = self.open_log()
+        self.assertEqual([Post(1, "Title", "Text version 19")], replayed.list_posts())
+        # the code of the deleted post is never given again
+        self.assertEqual(2, replayed.counter)
+
+    def test_log_writes_after_interval(self):
+        """Test a batch that is not full is written once its oldest change is old enough."""
+        Configuration.autosave_interval = 0.05
+        dao = self.open_log()
+        dao.create_post(Post(1, "Title 1", "Text"))
+        self.assertEqual(0, dao.log_records)
+        time.sleep(0.06)
+        dao.create_post(Post(2, "Title 2", "Text"))
+        self.assertEqual(2, dao.log_records)
+
+    def test_close_writes_pending_changes(self):
+        """Test closing the store writes what is pending."""
+        dao = self.open_log()
+        dao.create_post(Post(1, "Title 1", "Text"))
+        dao.close()
+        self.assertEqual([Post(1, "Title 1", "Text")], self.open_log().list_posts())
+
+    def test_sqlite_commits_once_per_batch(self):
+        """Test SQLite writes become visible to other connections when the batch commits."""
+        dao = BlogDAOSQLite()
+        reader = sqlite3.connect(Configuration.database_file)
+        self.addCleanup(reader.close)
+        count = lambda: reader.execute('SELECT count(*) FROM blog').fetchone()[0]
+        for number in range(9):
+            dao.create_blog(Blog(number, "Blog %d" % number, "url", "blog@gmail.com"))
+        self.assertEqual(0, count())
+        dao.create_blog(Blog(9, "Blog 9", "url", "blog@gmail.com"))
+        self.assertEqual(10, count())
+        dao.create_blog(Blog(10, "Blog 10", "url", "blog@gmail.com"))
+        dao.flush()
+        self.assertEqual(11, count())
+
+    def test_tracked_blog_writes_edited_fields(self):
+        """Test edits to a blog read from the store are tracked and only they are written."""
+        Configuration.autosave_batch_records = 1
+        dao = BlogDAOSQLite()
+        dao.create_blog(self.blog)
+        statements = []
+        dao.connection.set_trace_callback(statements.append)
+        self.addCleanup(dao.connection.set_trace_callback, None)
+        blog = dao.search_blog(1111114444)
+        self.assertEqual({}, blog.changed)
+        blog.name = "Short Journey"
+        self.assertEqual({}, blog.changed)
+        blog.name = "Longer Journey"
+        blog.email = "longer.journey@gmail.com"
+        self.assertEqual({'name': "Short Journey", 'email': "short.journey@gmail.com"}, blog.changed)
+        statements.clear()
+        dao.flush()
+        # the trace repeats the statement for each trigger it fires
+        updates = {statement for statement in statements if statement.startswith('UPDATE')}
+        self.assertEqual({"UPDATE blog SET name = 'Longer Journey', email = 'longer.journey@gmail.com' WHERE id = 1111114444"},
+            updates)
+        self.assertEqual({}, blog.changed)
+        self.assertEqual(Blog(1111114444, "Longer Journey", "short_journey", "longer.journey@gmail.com"),
+            dao.search_blog(1111114444))
+        statements.clear()
+        self.assertTrue(dao.update_blog(1111114444, blog))
+        self.assertEqual([], [statement for statement in statements if statement.startswith('UPDATE')])
+
+    def test_logout_flushes(self):
+        """Test logging out writes the pending post changes."""
+        Configuration.blog_storage = 'sqlite'
+        Configuration.post_storage = 'log'
+        configure_users_file(self.path)
+        controller = Controller()
+        controller.login("user", "blogging2025")
+        controller.create_blog(1111114444, "Short Journey", "short_journey", "short.journey@gmail.com")
+        controller.set_current_blog(1111114444)
+        controller.create_post("Starting my journey", "Once upon a time")
+        log_file = os.path.join(self.path, "1111114444.log")
+        self.assertFalse(os.path.exists(log_file))
+        controller.logout()
+        self.assertGreater(os.path.getsize(log_file), 0)
+        self.assertEqual([Post(1, "Starting my journey", "Once upon a time")], self.open_log().list_posts())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,224 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+from blogging.blog import Blog
+from blogging.configuration import Configuration
+from blogging.controller import Controller
+from blogging.dao.blog_dao_sqlite import BlogDAOSQLite
+from blogging.dao.blog_order import BlogOrder, GARBAGE_SLACK
+from blogging.dao.indexed_blog_dao import IndexedBlogDAO
+from blogging.engine import BlogEngine
+from helpers import configure_users_file, preserve_configuration
+
+def make_blog(blog_id, name=None):
+    return Blog(blog_id, name or "Blog %d" % blog_id, "blog_%d" % blog_id, "blog%d@mail.com" % blog_id)
+
+class BlogOrderTest(unittest.TestCase):
+    """
+    Test cases for the versioned blog catalog and the snapshots listed from it.
+    A snapshot keeps the catalog as it was when taken, whatever is written afterwards.
+    """
+
+    def setUp(self):
+        """Set up an order of five blogs."""
+        self.order = BlogOrder((blog_id, "Blog %d" % blog_id, "blog_%d" % blog_id, "blog%d@mail.com" % blog_id)
+            for blog_id in range(1, 6))
+
+    def ids(self, blogs):
+        return [blog.id for blog in blogs]
+
+    def snapshot(self):
+        return self.order.snapshot(lambda record: Blog(*record))
+
+    def test_view_lists_stored_order(self):
+        """Test indexing, slicing and iterating a snapshot in stored order."""
+        view = self.snapshot()
+        self.assertEqual(5, len(view))
+        self.assertEqual([1, 2, 3, 4, 5], self.ids(view))
+        self.assertEqual(1, view[0].id)
+        self.assertEqual(5, view[-1].id)
+        self.assertEqual([2, 3], self.ids(view[1:3]))
+        self.assertEqual([5, 3, 1], self.ids(view[::-2]))
+        self.assertEqual([], view[3:1])
+        self.assertEqual(list(view), view)
+        self.assertEqual(view, list(view))
+        with self.assertRaises(IndexError):
+            view[5]
+
+    def test_view_keeps_its_version(self):
+        """Test creating, updating, renaming and deleting blogs leaves snapshots taken earlier untouched."""
+        view = self.snapshot()
+        self.order.append(make_blog(6))
+        self.order.remove(3)
+        self.order.replace(2, make_blog(20, "Renamed in place"))
+        self.order.move(1, make_blog(10))
+        middle = self.snapshot()
+        self.order.remove(4)
+        self.order.replace(20, make_blog(20, "Renamed again"))
+        self.assertEqual([1, 2, 3, 4, 5], self.ids(view))
+        self.assertEqual("Blog 2", view[1].name)
+        self.assertEqual([20, 4, 5, 6, 10], self.ids(middle))
+        self.assertEqual("Renamed in place", middle[0].name)
+        current = self.snapshot()
+        self.assertEqual([20, 5, 6, 10], self.ids(current))
+        self.assertEqual("Renamed again", current[0].name)
+        self.assertLess(view.version, middle.version)
+        self.assertLess(middle.version, current.version)
+
+    def test_superseded_records_are_collected(self):
+        """Test the cells are rebuilt once superseded records pile up, without disturbing older snapshots."""
+        view = self.snapshot()
+        for round in range(GARBAGE_SLACK + 10):
+            self.order.replace(1, make_blog(1, "Round %d" % round))
+            self.snapshot()
+        self.assertLess(max(len(cell) for cell in self.order.cells), GARBAGE_SLACK)
+        self.assertEqual("Blog 1", view[0].name)
+        self.assertEqual("Round %d" % (GARBAGE_SLACK + 9), self.snapshot()[0].name)
+
+        # records no snapshot read are overwritten rather than kept
+        cells = self.order.cells
+        for round in range(10):
+            self.order.replace(2, make_blog(2, "Unread %d" % round))
+        self.assertEqual(2, len(cells[self.order.positions[2]]))
+
+class CatalogSnapshotTest(unittest.TestCase):
+    """
+    Test cases for list_blogs snapshots of the SQLite catalog, shared by the DAOs of one database.
+    """
+
+    def setUp(self):
+        """Set up a temporary database folder."""
+        preserve_configuration(self, 'users_file', 'autosave', 'blog_storage', 'database_file', 'records_path')
+        self.path = tempfile.mkdtemp()
+        self.database_file = os.path.join(self.path, "blogging.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_daos_of_one_database_share_the_catalog(self):
+        """Test a snapshot follows the writes made through every DAO of the database, and tracked edits."""
+        first = BlogDAOSQLite(True, self.database_file)
+        second = BlogDAOSQLite(True, self.database_file)
+        for blog_id in range(1, 4):
+            first.create_blog(make_blog(blog_id))
+        before = first.list_blogs()
+        second.create_blog(make_blog(4))
+        second.rename_blog(1, make_blog(5))
+        second.delete_blog(2)
+        blog = second.search_blog(3)
+        blog.name = "Edited"
+        second.flush()
+        self.assertEqual([1, 2, 3], [blog.id for blog in before])
+        after = first.list_blogs()
+        self.assertEqual([3, 4, 5], [blog.id for blog in after])
+        self.assertEqual("Edited", after[0].name)
+        self.assertEqual(after, [second.search_blog(blog_id) for blog_id in (3, 4, 5)])
+
+        # listed blogs are tracked like the blogs searched
+        listed = after[1]
+        listed.name = "Edited too"
+        first.flush()
+        self.assertEqual("Edited too", second.search_blog(4).name)
+        self.assertEqual("Blog 4", after[1].name)
+
+    def test_listing_follows_other_connections(self):
+        """Test a listing reloads the catalog once another connection, as of another process, has committed."""
+        dao = BlogDAOSQLite(True, self.database_file)
+        for blog_id in range(1, 4):
+            dao.create_blog(make_blog(blog_id))
+        before = dao.list_blogs()
+        other = sqlite3.connect(self.database_file)
+        self.addCleanup(other.close)
+        with other:
+            other.execute("INSERT INTO blog (id, name, url, email) VALUES (4, 'Blog 4', 'blog_4', 'blog4@mail.com')")
+            other.execute("UPDATE blog SET name = 'Edited elsewhere' WHERE id = 2")
+            other.execute("DELETE FROM blog WHERE id = 1")
+        after = dao.list_blogs()
+        self.assertEqual([2, 3, 4], [blog.id for blog in after])
+        self.assertEqual("Edited elsewhere", after[0].name)
+        self.assertEqual([1, 2, 3], [blog.id for blog in before])
+        dao.create_blog(make_blog(5))
+        self.assertEqual([2, 3, 4, 5], [blog.id for blog in dao.list_blogs()])
+
+    def test_indexed_catalog_snapshots(self):
+        """Test the catalog wrapped by the n-gram index lists snapshots of its stored blogs, which later writes
+        update in place without changing which blogs a snapshot lists."""
+        dao = IndexedBlogDAO(BlogDAOSQLite(True, self.database_file))
+        for blog_id in range(1, 4):
+            dao.create_blog(make_blog(blog_id))
+        before = dao.list_blogs()
+        dao.create_blog(make_blog(4))
+        dao.update_blog(2, make_blog(2, "Updated"))
+        dao.rename_blog(1, make_blog(5))
+        dao.delete_blog(3)
+        self.assertEqual([1, 2, 3], [blog.id for blog in before])
+        after = dao.list_blogs()
+        self.assertIs(before[1], after[0])
+        self.assertEqual([2, 4, 5], [blog.id for blog in after])
+        self.assertEqual("Updated", after[0].name)
+        self.assertEqual([5], [blog.id for blog in dao.retrieve_blogs("Blog 5")])
+
+    def test_listing_keeps_unsaved_posts(self):
+        """Test the default catalog lists the stored blogs, whose posts live only in memory with autosave off."""
+        Configuration.autosave = False
+        Configuration.blog_storage = 'json'
+        configure_users_file(self.path)
+        controller = Controller()
+        controller.login("user", "blogging2025")
+        controller.create_blog(1, "Blog 1", "blog_1", "blog1@mail.com")
+        controller.create_blog(2, "Blog 2", "blog_2", "blog2@mail.com")
+        controller.set_current_blog(1)
+        post = controller.create_post("Unsaved", "Kept in memory only")
+        before = controller.list_blogs()
+        controller.create_blog(3, "Blog 3", "blog_3", "blog3@mail.com")
+        self.assertEqual([1, 2], [blog.id for blog in before])
+        self.assertEqual([post], before[0].list_posts())
+        self.assertEqual([post], controller.list_blogs()[0].list_posts())
+        self.assertEqual([(1, post)], list(controller.search_all_posts("memory")))
+
+    def test_concurrent_listing(self):
+        """Test readers iterating snapshots while writers create, rename and delete blogs always see whole catalogs."""
+        Configuration.autosave = True
+        Configuration.blog_storage = 'sqlite'
+        Configuration.database_file = self.database_file
+        Configuration.records_path = self.path
+        configure_users_file(self.path)
+        engine = BlogEngine()
+        writer = Controller(engine=engine)
+        writer.login("user", "blogging2025")
+        for blog_id in range(1000, 1100):
+            writer.create_blog(blog_id, "Blog", "blog", "blog@mail.com")
+        errors = []
+        done = threading.Event()
+
+        def write():
+            # every step keeps 100 blogs in the catalog
+            for blog_id in range(1100, 1400):
+                writer.create_blog(blog_id, "Blog", "blog", "blog@mail.com")
+                writer.update_blog(blog_id - 100, blog_id + 100000, "Moved", "moved", "moved@mail.com")
+                writer.delete_blog(blog_id + 100000)
+            done.set()
+
+        def read():
+            reader = Controller(engine=engine)
+            reader.login("user", "blogging2025")
+            while not done.is_set():
+                blogs = reader.list_blogs()
+                ids = [blog.id for blog in blogs]
+                if len(ids) != len(blogs) or len(set(ids)) != len(ids) or not 100 <= len(ids) <= 101:
+                    errors.append(ids)
+
+        readers = [threading.Thread(target=read) for _ in range(3)]
+        for thread in readers:
+            thread.start()
+        write()
+        for thread in readers:
+            thread.join()
+        self.assertEqual([], errors)
+        self.assertEqual(list(range(1300, 1400)), [blog.id for blog in writer.list_blogs()])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from blogging.configuration import Configuration
+from blogging.controller import Controller
+from blogging.dao.post_store_cache import post_stores
+from blogging.engine import BlogEngine
+from helpers import configure_users_file, preserve_configuration
+
+THREADS = 8
+POSTS_PER_THREAD = 50
+
+class ConcurrencyTest(unittest.TestCase):
+    """
+    Runs many controller sessions over one engine at once and checks no post is lost or coded twice.
+    """
+
+    def setUp(self):
+        """Set up saved storage in a temporary folder and a blog shared by every session."""
+        preserve_configuration(self, 'users_file', 'autosave', 'blog_storage', 'post_storage', 'database_file',
+            'records_path')
+        self.path = tempfile.mkdtemp()
+        configure_users_file(self.path)
+        Configuration.autosave = True
+        Configuration.blog_storage = 'sqlite'
+        Configuration.database_file = os.path.join(self.path, "blogging.db")
+        Configuration.records_path = self.path
+        self.engine = BlogEngine()
+        controller = Controller(engine=self.engine)
+        controller.login("user", "blogging2025")
+        controller.create_blog(1111114444, "Short Journey", "short_journey", "short.journey@gmail.com")
+
+    def tearDown(self):
+        post_stores.invalidate(1111114444)
+        shutil.rmtree(self.path)
+
+    def run_sessions(self):
+        """Create posts from many sessions at once, searching the blog in between."""
+        errors = []
+        def session(number):
+            try:
+                controller = Controller(engine=self.engine)
+                controller.login("user", "blogging2025")
+                controller.set_current_blog(1111114444)
+                for i in range(POSTS_PER_THREAD):
+                    controller.create_post("Session %d post %d" % (number, i), "text")
+                    controller.retrieve_posts("Session %d" % number)
+                    controller.list_blogs()
+                controller.logout()
+            except Exception as exception:
+                errors.append(exception)
+        threads = [threading.Thread(target=session, args=(number,)) for number in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([], errors)
+
+        controller = Controller(engine=self.engine)
+        controller.login("user", "blogging2025")
+        controller.set_current_blog(1111114444)
+        posts = controller.list_posts()
+        codes = [post.post_code for post in posts]
+        self.assertEqual(THREADS * POSTS_PER_THREAD, len(posts))
+        self.assertEqual(len(codes), len(set(codes)), "post codes were allocated twice")
+        self.assertEqual(list(range(THREADS * POSTS_PER_THREAD, 0, -1)), codes)
+        for number in range(THREADS):
+            self.assertEqual(POSTS_PER_THREAD, len(controller.retrieve_posts("Session %d post" % number)))
+
+    def test_concurrent_create_post_log(self):
+        Configuration.post_storage = 'log'
+        self.run_sessions()
+
+    def test_concurrent_create_post_sqlite(self):
+        Configuration.post_storage = 'sqlite'
+        self.run_sessions()
+
+    def test_concurrent_blog_catalog(self):
+        Configuration.post_storage = 'log'
+        errors = []
+        def session(number):
+            try:
+                controller = Controller(engine=self.engine)
+                controller.login("user", "blogging2025")
+                for i in range(20):
+                    blog_id = 2000000000 + number * 100 + i
+                    controller.create_blog(blog_id, "Blog %d" % blog_id, "url", "blog@gmail.com")
+                    controller.update_blog(blog_id, blog_id + 50, "Renamed %d" % blog_id, "url", "blog@gmail.com")
+                    controller.retrieve_blogs("Renamed")
+            except Exception as exception:
+                errors.append(exception)
+        threads = [threading.Thread(target=session, args=(number,)) for number in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([], errors)
+        controller = Controller(engine=self.engine)
+        controller.login("user", "blogging2025")
+        self.assertEqual(THREADS * 20, len(controller.retrieve_blogs("Renamed")))
+        self.assertEqual(THREADS * 20 + 1, len(controller.list_blogs()))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,199 @@
+import shutil
+import tempfile
+import unittest
+from blogging.configuration import Configuration
+from blogging.controller import Controller
+from helpers import configure_users_file, preserve_configuration
+
+# DAO methods that persist something
+WRITES = {'create_blog', 'update_blog', 'rename_blog', 'delete_blog', 'create_post', 'create_posts',
+    'update_post', 'update_if_exists', 'delete_post', 'delete_if_exists'}
+
+class CountingDAO():
+    """Wraps a DAO and counts the calls made to it."""
+
+    def __init__(self, dao):
+        self.dao = dao
+        self.calls = []
+
+    def __getattr__(self, name):
+        attribute = getattr(self.dao, name)
+        if not callable(attribute):
+            return attribute
+        def counted(*args, **kwargs):
+            self.calls.append(name)
+            return attribute(*args, **kwargs)
+        return counted
+
+    def writes(self):
+        return [name for name in self.calls if name in WRITES]
+
+class SavingStore():
+    """Wraps a post store without batches, counting the saves of all its posts it makes on each write
+    while autosave is on, as the pickle store does."""
+
+    def __init__(self, post_dao):
+        self.post_dao = post_dao
+        self.autosave = True
+        self.saves = 0
+
+    def __getattr__(self, name):
+        return getattr(self.post_dao, name)
+
+    def create_post(self, post):
+        created = self.post_dao.create_post(post)
+        if created and self.autosave:
+            self.saves += 1
+        return created
+
+class DAOCallCountTest(unittest.TestCase):
+    """
+    Counts DAO calls and writes per Controller operation, so extra lookups or writes show up as failures.
+    """
+
+    def setUp(self):
+        """Set up a logged in controller over counted SQLite DAOs."""
+        preserve_configuration(self, 'users_file', 'autosave', 'blog_storage', 'post_storage')
+        self.path = tempfile.mkdtemp()
+        configure_users_file(self.path)
+        Configuration.autosave = False
+        Configuration.blog_storage = 'sqlite'
+        Configuration.post_storage = 'sqlite'
+        self.controller = Controller()
+        self.controller.login("user", "blogging2025")
+        self.controller.blog_dao = CountingDAO(self.controller.blog_dao)
+        for blog_id, name in [(1111114444, "Short Journey"), (1111115555, "Long Journey"), (1111112000, "Long Trip")]:
+            self.controller.create_blog(blog_id, name, name.lower().replace(" ", "_"), "blog@gmail.com")
+        self.controller.blog_dao.calls.clear()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def counted_posts(self):
+        self.controller.set_current_blog(1111114444)
+        blog = self.controller.current_blog
+        blog._post_dao = CountingDAO(blog.post_dao)
+        self.controller.create_posts([("Starting my journey", "Once upon a time"), ("Second step", "A storm stroke.")])
+        blog._post_dao.calls.clear()
+        return blog._post_dao
+
+    def test_create_blog(self):
+        self.controller.create_blog(1111116666, "Short Trip", "short_trip", "short.trip@gmail.com")
+        self.assertEqual(self.controller.blog_dao.calls, ['create_blog'])
+
+    def test_update_blog_same_id(self):
+        self.assertTrue(self.controller.update_blog(1111114444, 1111114444, "Short Travel", "short_travel", "short.travel@gmail.com"))
+        self.assertEqual(self.controller.blog_dao.calls, ['update_blog'])
+
+    def test_update_blog_new_id(self):
+        self.assertTrue(self.controller.update_blog(1111114444, 1111118888, "Cool Blog", "cool_blog", "cool.blog@gmail.com"))
+        self.assertEqual(self.controller.blog_dao.calls, ['rename_blog'])
+        self.assertEqual([blog.id for blog in self.controller.list_blogs()], [1111115555, 1111112000, 1111118888])
+
+    def test_update_blog_to_taken_id(self):
+        with self.assertRaises(Exception):
+            self.controller.update_blog(1111114444, 1111112000, "Short Travel", "short_travel", "short.travel@gmail.com")
+        self.assertEqual(self.controller.blog_dao.writes(), ['rename_blog'])
+
+    def test_delete_blog(self):
+        self.assertTrue(self.controller.delete_blog(1111112000))
+        self.assertEqual(self.controller.blog_dao.calls, ['delete_blog'])
+
+    def test_update_post(self):
+        post_dao = self.counted_posts()
+        self.assertTrue(self.controller.update_post(2, "Second step, revised", "The storm passed."))
+        self.assertEqual(post_dao.calls, ['update_if_exists'])
+        self.assertFalse(self.controller.update_post(9, "Missing", "Missing"))
+        self.assertEqual(post_dao.writes(), ['update_if_exists', 'update_if_exists'])
+
+    def test_delete_post(self):
+        post_dao = self.counted_posts()
+        self.assertTrue(self.controller.delete_post(1))
+        self.assertEqual(post_dao.calls, ['delete_if_exists'])
+
+    def test_create_posts_writes_once(self):
+        post_dao = self.counted_posts()
+        self.controller.create_posts(("Post %d" % number, "Text") for number in range(100))
+        self.assertEqual(post_dao.writes(), ['create_posts'])
+
+class DefaultBackendCallCountTest(unittest.TestCase):
+    """
+    Counts the calls reaching the default pickle post store behind its index, and checks updates keep the
+    stored blogs of the default catalog, whose posts are not saved with autosave off.
+    """
+
+    def setUp(self):
+        """Set up a logged in controller over the default DAOs, a blog with two posts as current."""
+        preserve_configuration(self, 'users_file', 'autosave', 'blog_storage', 'post_storage')
+        self.path = tempfile.mkdtemp()
+        configure_users_file(self.path)
+        Configuration.autosave = False
+        Configuration.blog_storage = 'json'
+        Configuration.post_storage = 'pickle'
+        self.controller = Controller()
+        self.controller.login("user", "blogging2025")
+        self.controller.create_blog(1111114444, "Short Journey", "short_journey", "short.journey@gmail.com")
+        self.controller.create_blog(1111115555, "Long Journey", "long_journey", "long.journey@gmail.com")
+        self.controller.set_current_blog(1111114444)
+        self.controller.create_posts([("Starting my journey", "Once upon a time"), ("Second step", "A storm stroke.")])
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_update_and_delete_post(self):
+        indexed = self.controller.current_blog.post_dao
+        # the order serving lookups is listed from the store once, by the first update or delete
+        indexed.get_order()
+        post_dao = indexed.post_dao = CountingDAO(indexed.post_dao)
+        self.assertTrue(self.controller.update_post(2, "Second step, revised", "The storm passed."))
+        self.assertEqual(post_dao.calls, ['update_post'])
+        self.assertFalse(self.controller.update_post(9, "Missing", "Missing"))
+        self.assertTrue(self.controller.delete_post(1))
+        self.assertFalse(self.controller.delete_post(1))
+        self.assertEqual(post_dao.calls, ['update_post', 'delete_post'])
+        self.assertEqual(["Second step, revised"], [post.post_title for post in self.controller.list_posts()])
+        self.assertEqual(["The storm passed."], [post.post_text for post in self.controller.retrieve_posts("storm")])
+
+    def test_create_posts_saves_once(self):
+        indexed = self.controller.current_blog.post_dao
+        store = indexed.post_dao = SavingStore(indexed.post_dao)
+        self.assertEqual(100, self.controller.create_posts(("Post %d" % number, "Text") for number in range(100)))
+        self.assertEqual(1, store.saves)
+        self.assertTrue(store.autosave)
+        self.assertEqual(102, len(self.controller.list_posts()))
+        self.controller.create_post("One more", "Saved on its own")
+        self.assertEqual(2, store.saves)
+
+    def test_pages_read_the_order(self):
+        self.controller.create_posts(("Post %d" % number, "Text") for number in range(3, 51))
+        indexed = self.controller.current_blog.post_dao
+        post_dao = indexed.post_dao = CountingDAO(indexed.post_dao)
+        self.assertEqual([50, 49, 48], [post.post_code for post in self.controller.iter_posts(limit=3)])
+        self.assertEqual(['list_posts'], post_dao.calls)
+        self.assertEqual([47, 46], [post.post_code for post in self.controller.iter_posts(after=48, limit=2)])
+        self.controller.delete_post(46)
+        self.controller.create_post("Newest", "Text")
+        self.assertEqual([51, 50], [post.post_code for post in self.controller.iter_posts(limit=2)])
+        self.assertEqual([47, 45], [post.post_code for post in self.controller.iter_posts(after=48, limit=2)])
+        self.assertEqual(['list_posts', 'delete_post', 'create_post'], post_dao.calls)
+        self.assertEqual([2, 1], [post.post_code for post in self.controller.iter_posts(after=3)])
+
+    def test_update_blog_keeps_unsaved_posts(self):
+        self.controller.unset_current_blog()
+        self.assertTrue(self.controller.update_blog(1111114444, 1111114444, "Short Travel", "short_travel", "short.travel@gmail.com"))
+        self.controller.set_current_blog(1111114444)
+        self.assertEqual("Short Travel", self.controller.current_blog.name)
+        self.assertEqual(2, len(self.controller.list_posts()))
+
+        self.controller.unset_current_blog()
+        self.assertTrue(self.controller.update_blog(1111114444, 1111118888, "Cool Blog", "cool_blog", "cool.blog@gmail.com"))
+        with self.assertRaises(Exception):
+            self.controller.update_blog(1111118888, 1111115555, "Taken", "taken", "taken@gmail.com")
+        self.controller.set_current_blog(1111118888)
+        self.assertEqual("Cool Blog", self.controller.current_blog.name)
+        self.assertEqual(2, len(self.controller.list_posts()))
+        self.assertEqual([1111115555, 1111118888], [blog.id for blog in self.controller.list_blogs()])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import os
+import shutil
+import tempfile
+import unittest
+from blogging.configuration import Configuration
+from blogging.controller import Controller
+from blogging.dao.post_store_cache import post_stores, release_post_stores
+from blogging.index.global_post_index import global_posts
+from helpers import configure_users_file, preserve_configuration
+
+BLOGS = list(range(1111110000, 1111110006))
+
+class GlobalPostSearchTest(unittest.TestCase):
+    """
+    Test cases for Controller.search_all_posts, served by the global post index and parallel per-blog scans.
+    """
+
+    def setUp(self):
+        """Set up blogs with saved posts in a temporary records folder."""
+        preserve_configuration(self, 'users_file', 'autosave', 'blog_storage', 'post_storage', 'database_file',
+            'records_path')
+        self.path = tempfile.mkdtemp()
+        Configuration.autosave = True
+        Configuration.blog_storage = 'sqlite'
+        Configuration.post_storage = 'log'
+        Configuration.database_file = os.path.join(self.path, "blogging.db")
+        Configuration.records_path = self.path
+        configure_users_file(self.path)
+        global_posts.clear()
+        self.controller = Controller()
+        self.controller.login("user", "blogging2025")
+        for blog_id in BLOGS:
+            self.controller.create_blog(blog_id, "Blog %d" % blog_id, "blog_%d" % blog_id, "blog%d@mail.com" % blog_id)
+            self.controller.set_current_blog(blog_id)
+            self.controller.create_posts([("Post %d" % number, "Journey %d of blog %d" % (number, blog_id))
+                for number in range(1, 4)])
+        self.controller.unset_current_blog()
+
+    def tearDown(self):
+        global_posts.clear()
+        for blog_id in BLOGS:
+            post_stores.invalidate(blog_id)
+        shutil.rmtree(self.path)
+
+    def found(self, term, limit=None):
+        return sorted((blog_id, post.post_code) for blog_id, post in self.controller.search_all_posts(term, limit))
+
+    def test_search_every_blog(self):
+        """Test posts of every blog are found, scanned first and then served by the global index."""
+        expected = [(blog_id, 2) for blog_id in BLOGS]
+        self.assertEqual(expected, self.found("Journey 2 "))
+        self.assertTrue(all(global_posts.covers(blog_id) for blog_id in BLOGS))
+
+        # covered blogs are searched without loading their post stores again
+        release_post_stores()
+        misses = post_stores.stats()['misses']
+        self.assertEqual(expected, self.found("Journey 2 "))
+        self.assertEqual(misses, post_stores.stats()['misses'])
+        self.assertEqual([], self.found("journey"))
+
+    def test_index_follows_writes(self):
+        """Test creates, updates and deletes of posts and blogs after indexing are searchable."""
+        self.found("Journey")
+        self.controller.set_current_blog(BLOGS[0])
+        self.controller.create_post("Post 4", "A storm on the way")
+        self.controller.update_post(1, "Post 1", "Another storm")
+        self.controller.delete_post(2)
+        self.controller.unset_current_blog()
+        self.assertEqual([(BLOGS[0], 1), (BLOGS[0], 4)], self.found("storm"))
+        self.assertEqual([(BLOGS[0], 3)], self.found("of blog %d" % BLOGS[0]))
+
+        self.controller.delete_blog(BLOGS[1])
+        self.assertFalse(global_posts.covers(BLOGS[1]))
+        self.assertEqual([], self.found("of blog %d" % BLOGS[1]))
+
+    def test_results_stream_up_to_limit(self):
+        """Test results are yielded one by one and stop at limit."""
+        results = self.controller.search_all_posts("Journey")
+        blog_id, post = next(results)
+        self.assertIn(blog_id, BLOGS)
+        self.assertIn("Journey", post.post_text)
+        results.close()
+        self.assertEqual(4, len(self.found("Journey", 4)))
+        self.assertEqual(len(BLOGS) * 3, len(self.found("Journey")))
+        self.assertEqual([], self.found("Journey", 0))
+
+    def test_budget_evicts_least_recently_searched_blogs(self):
+        """Test the index stays within its byte budget, blogs evicted or too big for it being scanned instead."""
+        self.addCleanup(setattr, global_posts, 'max_bytes', global_posts.max_bytes)
+        expected = [(blog_id, 2) for blog_id in BLOGS]
+        self.found("Journey")
+        blog_bytes = max(global_posts.sizes.values())
+        global_posts.clear()
+        global_posts.max_bytes = 2 * blog_bytes
+        self.assertEqual(expected, self.found("Journey 2 "))
+        self.assertLessEqual(global_posts.total_bytes, global_posts.max_bytes)
+        self.assertEqual(2, len(global_posts.blogs))
+        self.assertEqual(expected, self.found("Journey 2 "))
+
+        # writes to a covered blog count against the budget too
+        covered = list(global_posts.blogs)
+        self.controller.set_current_blog(covered[0])
+        self.controller.create_post("Post 4", "A long storm")
+        self.controller.unset_current_blog()
+        self.assertLessEqual(global_posts.total_bytes, global_posts.max_bytes)
+        self.assertEqual([covered[0]], list(global_posts.blogs))
+        self.assertEqual([(covered[0], 4)], self.found("long storm"))
+
+        global_posts.clear()
+        global_posts.max_bytes = blog_bytes - 1
+        self.assertEqual(expected, self.found("Journey 2 "))
+        self.assertEqual([], list(global_posts.blogs))
+        self.assertEqual(0, global_posts.total_bytes)
+
+if __name__ == '__main__':
+    unittest.main()
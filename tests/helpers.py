@@ -0,0 +1,25 @@
+import hashlib
+import os
+from blogging.configuration import Configuration
+
+# password of the user written by configure_users_file
+PASSWORD = "blogging2025"
+
+def preserve_configuration(test, *names):
+    """Restore the named Configuration settings once test finishes, removing those that were not set."""
+    saved = {name: getattr(Configuration, name) for name in names if hasattr(Configuration, name)}
+
+    def restore():
+        for name in names:
+            if name in saved:
+                setattr(Configuration, name, saved[name])
+            elif hasattr(Configuration, name):
+                delattr(Configuration, name)
+    test.addCleanup(restore)
+
+def configure_users_file(path, username="user", password=PASSWORD):
+    """Point Configuration.users_file at a users file under path holding one user, returns its name."""
+    Configuration.users_file = os.path.join(path, "users.txt")
+    with open(Configuration.users_file, "w") as file:
+        file.write(username + "," + hashlib.sha256(password.encode()).hexdigest() + "\n")
+    return Configuration.users_file
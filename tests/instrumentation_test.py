@@ -0,0 +1,86 @@
+import os
+import shutil
+import tempfile
+import unittest
+from blogging.configuration import Configuration
+from blogging.controller import Controller
+from blogging.dao.post_store_cache import post_stores
+from blogging.instrumentation import Instrumented, metrics, enable, disable, snapshot, prometheus
+from helpers import configure_users_file, preserve_configuration
+
+class InstrumentationTest(unittest.TestCase):
+    """
+    Checks instrumented controllers record calls, bytes and items scanned, and plain ones record nothing.
+    """
+
+    def setUp(self):
+        """Set up saved log storage in a temporary folder."""
+        preserve_configuration(self, 'users_file', 'autosave', 'blog_storage', 'post_storage', 'database_file',
+            'records_path')
+        self.path = tempfile.mkdtemp()
+        configure_users_file(self.path)
+        Configuration.autosave = True
+        Configuration.blog_storage = 'sqlite'
+        Configuration.post_storage = 'log'
+        Configuration.database_file = os.path.join(self.path, "blogging.db")
+        Configuration.records_path = self.path
+        metrics.reset()
+
+    def tearDown(self):
+        disable()
+        metrics.reset()
+        post_stores.invalidate(1111114444)
+        shutil.rmtree(self.path)
+
+    def exercise(self):
+        controller = Controller()
+        controller.login("user", "blogging2025")
+        controller.create_blog(1111114444, "Short Journey", "short_journey", "short.journey@gmail.com")
+        controller.set_current_blog(1111114444)
+        for i in range(20):
+            controller.create_post("Post %d" % i, "Once upon a time, post number %d" % i)
+        self.assertEqual(11, len(controller.retrieve_posts("Post 1")))
+        self.assertEqual(1, len(controller.retrieve_posts("number 17")))
+        controller.logout()
+        return controller
+
+    def test_disabled_records_nothing(self):
+        controller = self.exercise()
+        self.assertNotIn('login', vars(controller))
+        self.assertNotIsInstance(controller.blog_dao, Instrumented)
+        self.assertNotIsInstance(controller.verifier, Instrumented)
+        self.assertEqual({'calls': {}, 'latency_seconds': {}, 'bytes_read': {}, 'bytes_written': {},
+            'items_scanned': {}}, snapshot())
+
+    def test_enabled_records_calls_bytes_and_scans(self):
+        enable()
+        self.exercise()
+        recorded = snapshot()
+        self.assertEqual(1, recorded['calls']['controller.login'])
+        self.assertEqual(1, recorded['calls']['verifier.verify'])
+        self.assertEqual(20, recorded['calls']['controller.create_post'])
+        self.assertEqual(20, recorded['calls']['post_dao.create_post'])
+        self.assertEqual(1, recorded['calls']['blog_dao.create_blog'])
+        self.assertEqual(1, recorded['calls']['post_dao.load'])
+        self.assertEqual(2, recorded['latency_seconds']['controller.retrieve_posts']['count'])
+        self.assertEqual(['+Inf', 20], recorded['latency_seconds']['controller.create_post']['buckets'][-1])
+        self.assertGreater(recorded['bytes_written']['post_dao_log'], 20 * len("Once upon a time, post number"))
+        self.assertGreater(recorded['bytes_read']['users_file'], 0)
+        scanned = recorded['items_scanned']['post_dao.retrieve_posts']
+        self.assertEqual(2, scanned['count'])
+        # the index narrows "number 17" down to the one post holding it
+        self.assertLess(scanned['sum'], 40)
+
+    def test_prometheus_export(self):
+        enable()
+        self.exercise()
+        text = prometheus()
+        self.assertIn('# TYPE blogging_latency_seconds histogram', text)
+        self.assertIn('blogging_calls_total{operation="controller.create_post"} 20', text)
+        self.assertIn('blogging_latency_seconds_count{operation="controller.create_post"} 20', text)
+        self.assertIn('blogging_latency_seconds_bucket{operation="controller.create_post",le="+Inf"} 20', text)
+        self.assertIn('blogging_items_scanned_count{operation="post_dao.retrieve_posts"} 2', text)
+        self.assertIn('blogging_written_bytes_total{component="post_dao_log"}', text)
+
+if __name__ == '__main__':
+    unittest.main()
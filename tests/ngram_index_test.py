@@ -0,0 +1,129 @@
+import unittest
+from blogging.blog import Blog
+from blogging.dao.blog_dao_sqlite import BlogDAOSQLite
+from blogging.dao.indexed_blog_dao import IndexedBlogDAO
+from blogging.index.ngram_index import NGramIndex
+
+class NGramIndexTest(unittest.TestCase):
+    """
+    Test cases for the n-gram index behind Blog.retrieve_posts.
+    Results must match a case-sensitive substring scan, in insertion order.
+    """
+
+    def setUp(self):
+        """Set up an index with a few entries."""
+        self.index = NGramIndex()
+        self.index.add(1, "Starting my journey", "Once upon a time\nThere was a kid...")
+        self.index.add(2, "Second step", "Before one could think,\nA storm stroke.")
+        self.index.add(3, "Continuing my journey", "Along the way...\nThere were challenges.")
+
+    def test_search_in_insertion_order(self):
+        """Test matching keys come back in insertion order."""
+        self.assertEqual(self.index.search("journey"), [1, 3])
+        self.assertEqual(self.index.search("think"), [2])
+
+    def test_search_is_case_sensitive(self):
+        """Test that matching is case-sensitive."""
+        self.assertEqual(self.index.search("Journey"), [])
+        self.assertEqual(self.index.search("There"), [1, 3])
+
+    def test_search_short_terms(self):
+        """Test terms shorter than an n-gram fall back to verifying every entry."""
+        self.assertEqual(self.index.search("St"), [1])
+        self.assertEqual(self.index.search(""), [1, 2, 3])
+
+    def test_no_match_across_fields(self):
+        """Test that a term spanning the title and the text does not match."""
+        self.assertEqual(self.index.search("stepBefore"), [])
+
+    def test_update_keeps_position(self):
+        """Test that reindexing a key keeps its position and drops old n-grams."""
+        self.index.add(1, "Restarting the trip", "Once upon a time")
+        self.assertEqual(self.index.search("journey"), [3])
+        self.assertEqual(self.index.search("Once"), [1])
+        self.index.add(1, "Back on my journey", "")
+        self.assertEqual(self.index.search("journey"), [1, 3])
+
+    def test_remove(self):
+        """Test removed keys are no longer found."""
+        self.assertTrue(self.index.remove(1))
+        self.assertFalse(self.index.remove(1))
+        self.assertEqual(self.index.search("journey"), [3])
+        self.assertEqual(len(self.index), 2)
+
+
+class WithoutRename():
+    """Blog DAO without rename_blog, which the indexed DAO renames through by deleting and re-creating."""
+
+    def __init__(self, blog_dao):
+        self.blog_dao = blog_dao
+
+    def __getattr__(self, name):
+        if name == 'rename_blog':
+            raise AttributeError(name)
+        return getattr(self.blog_dao, name)
+
+class IndexedBlogDAOTest(unittest.TestCase):
+    """
+    Test cases for the n-gram index of blog names behind IndexedBlogDAO.retrieve_blogs.
+    Results after every write must match the underlying DAO's, whether the index was built before or after it.
+    """
+
+    def setUp(self):
+        """Set up an indexed DAO of three blogs, its index built."""
+        self.inner = BlogDAOSQLite(autosave=False)
+        self.dao = IndexedBlogDAO(self.inner)
+        for blog_id, name in [(1, "Short Journey"), (2, "Long Journey"), (3, "Long Trip")]:
+            self.dao.create_blog(Blog(blog_id, name, name.lower().replace(" ", "_"), "blog@gmail.com"))
+        self.assertEqual([1, 2], self.retrieved("Journey"))
+
+    def retrieved(self, search_term):
+        return [blog.id for blog in self.dao.retrieve_blogs(search_term)]
+
+    def check_index(self, expected):
+        """Check the kept index and one built afresh answer as the underlying DAO does."""
+        fresh = IndexedBlogDAO(self.inner)
+        for search_term, ids in expected.items():
+            self.assertEqual(ids, self.retrieved(search_term), search_term)
+            self.assertEqual(ids, [blog.id for blog in fresh.retrieve_blogs(search_term)], search_term)
+            self.assertEqual(ids, [blog.id for blog in self.inner.retrieve_blogs(search_term)], search_term)
+
+    def test_update_blog(self):
+        """Test an updated name is found under its new name only, the blog keeping its place."""
+        self.assertTrue(self.dao.update_blog(1, Blog(1, "Short Trip", "short_trip", "short.trip@gmail.com")))
+        self.assertFalse(self.dao.update_blog(9, Blog(9, "Missing Journey", "missing", "missing@gmail.com")))
+        self.check_index({"Journey": [2], "Trip": [1, 3], "Short": [1], "Missing": []})
+
+    def test_rename_blog(self):
+        """Test a renamed blog is found under its new id and name only, moved to the end."""
+        self.assertTrue(self.dao.rename_blog(1, Blog(8, "Cool Trip", "cool_trip", "cool.trip@gmail.com")))
+        self.assertFalse(self.dao.rename_blog(2, Blog(3, "Taken Trip", "taken", "taken@gmail.com")))
+        self.assertFalse(self.dao.rename_blog(9, Blog(10, "Missing Trip", "missing", "missing@gmail.com")))
+        self.check_index({"Journey": [2], "Trip": [3, 8], "Short": [], "Taken": [], "Missing": []})
+        # the old id taken again is indexed at the end, as the new blog it is
+        self.assertTrue(self.dao.create_blog(Blog(1, "Fresh Journey", "fresh_journey", "fresh.journey@gmail.com")))
+        self.check_index({"Journey": [2, 1], "Short": [], "Fresh": [1]})
+
+    def test_rename_blog_by_re_creating(self):
+        """Test renaming through a DAO without rename_blog indexes the blog as the native rename does."""
+        self.dao = IndexedBlogDAO(WithoutRename(self.inner))
+        self.assertEqual([1, 2], self.retrieved("Journey"))
+        self.assertTrue(self.dao.rename_blog(1, Blog(8, "Cool Trip", "cool_trip", "cool.trip@gmail.com")))
+        self.assertFalse(self.dao.rename_blog(2, Blog(3, "Taken Trip", "taken", "taken@gmail.com")))
+        self.assertFalse(self.dao.rename_blog(9, Blog(10, "Missing Trip", "missing", "missing@gmail.com")))
+        self.check_index({"Journey": [2], "Trip": [3, 8], "Short": [], "Taken": [], "Missing": []})
+        # the old id taken again is indexed at the end, as the new blog it is
+        self.assertTrue(self.dao.create_blog(Blog(1, "Fresh Journey", "fresh_journey", "fresh.journey@gmail.com")))
+        self.check_index({"Journey": [2, 1], "Short": [], "Fresh": [1]})
+        self.assertEqual([2, 3, 8, 1], [blog.id for blog in self.dao.list_blogs()])
+
+    def test_delete_blog(self):
+        """Test a deleted blog is no longer found, and its id taken again is indexed at the end."""
+        self.assertTrue(self.dao.delete_blog(2))
+        self.assertFalse(self.dao.delete_blog(2))
+        self.check_index({"Journey": [1], "Long": [3]})
+        self.assertTrue(self.dao.create_blog(Blog(2, "New Journey", "new_journey", "new.journey@gmail.com")))
+        self.check_index({"Journey": [1, 2], "o": [1, 3, 2], "Long": [3], "New": [2]})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+import os
+import shutil
+import tempfile
+import unittest
+from blogging.configuration import Configuration
+from blogging.controller import Controller
+from blogging.dao.post_store_cache import post_stores
+from blogging.index.parallel_scan import ParallelScanner, Segment, scan_partition
+from blogging.post import Post
+from helpers import configure_users_file, preserve_configuration
+
+BLOGS = [1111110000, 1111110001]
+
+class ParallelScanTest(unittest.TestCase):
+    """
+    Test cases for retrieve_posts scanning posts across worker processes.
+    Results must match the serial scan, in creation order, and follow writes to the blog.
+    """
+
+    def setUp(self):
+        """Set up blogs with saved posts and a scanner that always uses its worker processes."""
+        preserve_configuration(self, 'users_file', 'autosave', 'blog_storage', 'post_storage', 'database_file',
+            'records_path')
+        self.path = tempfile.mkdtemp()
+        Configuration.autosave = True
+        Configuration.blog_storage = 'sqlite'
+        Configuration.post_storage = 'log'
+        Configuration.database_file = os.path.join(self.path, "blogging.db")
+        Configuration.records_path = self.path
+        configure_users_file(self.path)
+        self.scanner = ParallelScanner(workers=2, min_parallel_bytes=0)
+        self.controller = Controller()
+        self.controller.login("user", "blogging2025")
+        for blog_id in BLOGS:
+            self.controller.create_blog(blog_id, "Blog %d" % blog_id, "blog_%d" % blog_id, "blog%d@mail.com" % blog_id)
+            self.controller.set_current_blog(blog_id)
+            self.controller.create_posts([("Post %d" % number, "Journey %d of the blog, día %d" % (number, blog_id))
+                for number in range(1, 41)])
+        self.blog = self.controller.current_blog
+
+    def tearDown(self):
+        self.scanner.shutdown()
+        for blog_id in BLOGS:
+            post_stores.invalidate(blog_id)
+        shutil.rmtree(self.path)
+
+    def codes(self, posts):
+        return [post.post_code for post in posts]
+
+    def test_matches_serial_scan(self):
+        """Test the parallel scan finds the same posts as the serial one, in creation order."""
+        for term in ("Journey 1", "Post 4", "día", "of the", "", "missing", "1111110001"):
+            self.assertEqual(self.codes(self.blog.retrieve_posts(term)),
+                self.codes(self.scanner.scan_blog(self.blog, term)), term)
+        self.assertEqual(list(range(1, 41)), self.codes(self.scanner.scan_blog(self.blog, "Journey")))
+
+    def test_match_stays_within_a_field(self):
+        """Test a term running from the title into the text, or across posts, is not found."""
+        segment = Segment([Post(1, "abc", "def"), Post(2, "", "cdx"), Post(3, "ab", "")])
+        for first, last in ((0, 3), (1, 3)):
+            self.assertEqual([], scan_partition(segment.path, first, last, b"cde"))
+            self.assertEqual([], scan_partition(segment.path, first, last, b"fcd"))
+        self.assertEqual([1], scan_partition(segment.path, 0, 3, b"cdx"))
+        self.assertEqual([0, 2], scan_partition(segment.path, 0, 3, b"ab"))
+        self.assertEqual([2], scan_partition(segment.path, 1, 3, b"ab"))
+
+    def test_partitions_cover_every_post(self):
+        """Test the partitions are contiguous, in order and cover every post once."""
+        segment = Segment([Post(number, "t" * number, "x" * (number % 7)) for number in range(1, 50)])
+        for count in (1, 2, 5, 100):
+            ranges = segment.partitions(count)
+            self.assertLessEqual(len(ranges), count)
+            self.assertEqual(0, ranges[0][0])
+            self.assertEqual(49, ranges[-1][1])
+            self.assertTrue(all(ranges[i][1] == ranges[i + 1][0] for i in range(len(ranges) - 1)))
+        self.assertEqual([], Segment([]).partitions(4))
+
+    def test_segment_follows_writes(self):
+        """Test the segment is kept between scans and encoded again after the blog's posts change."""
+        segment = self.scanner.segment(self.blog)
+        self.assertIs(segment, self.scanner.segment(self.blog))
+        self.controller.update_post(3, "Post 3", "Changed text")
+        self.controller.delete_post(5)
+        self.controller.create_post("Post 41", "Journey 41")
+        self.assertIsNot(segment, self.scanner.segment(self.blog))
+        self.assertEqual(self.codes(self.blog.retrieve_posts("Journey")),
+            self.codes(self.scanner.scan_blog(self.blog, "Journey")))
+        self.assertNotIn(3, self.codes(self.scanner.scan_blog(self.blog, "Journey")))
+        self.assertEqual([3], self.codes(self.scanner.scan_blog(self.blog, "Changed")))
+
+        # the segment's file goes with the blog's post store
+        path = self.scanner.segment(self.blog).path
+        self.assertTrue(os.path.exists(path))
+        self.controller.delete_blog(BLOGS[0])
+        post_stores.invalidate(BLOGS[1])
+        self.controller.current_blog = None
+        self.blog = segment = None
+        self.assertNotIn(BLOGS[1], self.scanner.segments)
+        self.assertFalse(os.path.exists(path))
+
+    def test_segments_kept_within_budget(self):
+        """Test the segments kept stay within their byte budget, dropping the least recently scanned blog's."""
+        blogs = [self.controller.search_blog(blog_id) for blog_id in BLOGS]
+        size = self.scanner.segment(blogs[0]).size
+        scanner = ParallelScanner(workers=2, min_parallel_bytes=0, max_bytes=size + size // 2)
+        self.addCleanup(scanner.shutdown)
+        self.assertEqual(22, len(scanner.scan_blogs(blogs, "Journey 1")))
+        self.assertEqual([BLOGS[1]], list(scanner.segments))
+        self.assertLessEqual(scanner.total_bytes, scanner.max_bytes)
+        self.assertEqual(1, scanner.evictions)
+
+        # a segment scanned again is the most recent, the other blog's is dropped and its file removed
+        path = scanner.segment(blogs[1]).path
+        scanner.segment(blogs[0])
+        self.assertEqual([BLOGS[0]], list(scanner.segments))
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(scanner.segments[BLOGS[0]][3].size, scanner.total_bytes)
+
+    def test_scan_every_blog(self):
+        """Test scanning every blog returns each blog's posts in creation order, blogs in the given order."""
+        blogs = [self.controller.search_blog(blog_id) for blog_id in BLOGS]
+        expected = [(blog.id, post.post_code) for blog in blogs for post in blog.retrieve_posts("Journey 2")]
+        self.assertEqual(expected, [(blog_id, post.post_code) for blog_id, post in self.scanner.scan_blogs(blogs, "Journey 2")])
+        self.assertEqual(22, len(expected))
+
+    def test_controller_parallel_retrieve(self):
+        """Test the controller serves parallel retrieval with the same results as the serial one."""
+        self.assertEqual(self.codes(self.controller.retrieve_posts("Journey 3")),
+            self.codes(self.controller.retrieve_posts("Journey 3", parallel=True)))
+        serial = [(blog_id, post.post_code) for blog_id, post in self.controller.search_all_posts("Journey 4")]
+        parallel = [(blog_id, post.post_code) for blog_id, post in self.controller.search_all_posts("Journey 4", parallel=True)]
+        self.assertEqual(sorted(serial), parallel)
+        self.assertEqual(parallel[:3], [(blog_id, post.post_code) for blog_id, post
+            in self.controller.search_all_posts("Journey 4", 3, parallel=True)])
+
+if __name__ == '__main__':
+    unittest.main()
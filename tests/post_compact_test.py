@@ -0,0 +1,60 @@
+import datetime
+import pickle
+import unittest
+from blogging.post import Post, to_datetime, to_micros
+
+class PostCompactTest(unittest.TestCase):
+    """
+    Test cases for the slotted Post with integer timestamps.
+    """
+
+    def test_no_instance_dict(self):
+        """Test that posts carry no per-instance dict."""
+        post = Post(1, "Title", "Text")
+        self.assertFalse(hasattr(post, '__dict__'))
+
+    def test_timestamps_are_datetimes(self):
+        """Test timestamps convert to equal datetimes on creation."""
+        post = Post(1, "Title", "Text")
+        self.assertIsInstance(post.creation_time, datetime.datetime)
+        self.assertEqual(post.creation_time, post.update_time)
+        self.assertLess(abs(post.creation_time - datetime.datetime.now()), datetime.timedelta(seconds=5))
+
+    def test_datetime_round_trip(self):
+        """Test datetimes survive conversion to microseconds and back."""
+        moment = datetime.datetime(2025, 3, 14, 15, 9, 26, 535897)
+        self.assertEqual(to_datetime(to_micros(moment)), moment)
+        post = Post(1, "Title", "Text")
+        post.creation_time = moment
+        self.assertEqual(post.creation_time, moment)
+
+    def test_str_and_repr(self):
+        """Test the string representations keep their format."""
+        post = Post(1, "Title", "Text")
+        post.creation_time = datetime.datetime(2025, 1, 2, 3, 4, 5, 6)
+        post.update_time = datetime.datetime(2025, 1, 2, 3, 4, 5, 7)
+        self.assertEqual(str(post), "1; 2025-01-02 03:04:05.000006; 2025-01-02 03:04:05.000007\nTitle\n\nText")
+        self.assertEqual(repr(post), "Post(1, datetime.datetime(2025, 1, 2, 3, 4, 5, 6), "
+            "datetime.datetime(2025, 1, 2, 3, 4, 5, 7),\n'Title',\n\n'Text'\n)")
+
+    def test_pickle_round_trip(self):
+        """Test posts pickle with their timestamps."""
+        post = Post(1, "Title", "Text")
+        post.update("New title", "New text")
+        loaded = pickle.loads(pickle.dumps(post))
+        self.assertEqual(loaded, post)
+        self.assertEqual(loaded.creation_time, post.creation_time)
+        self.assertEqual(loaded.update_time, post.update_time)
+
+    def test_setstate_from_dict(self):
+        """Test restoring the dict state of posts pickled before Post had slots."""
+        moment = datetime.datetime(2025, 1, 2, 3, 4, 5, 6)
+        post = Post.__new__(Post)
+        post.__setstate__({'post_code': 1, 'post_title': "Title", 'post_text': "Text",
+            'creation_time': moment, 'update_time': moment})
+        self.assertEqual(post, Post(1, "Title", "Text"))
+        self.assertEqual(post.update_time, moment)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,173 @@
+import os
+import pickle
+import random
+import shutil
+import tempfile
+import unittest
+from blogging.blog import Blog
+from blogging.configuration import Configuration
+from blogging.dao.indexed_post_dao import IndexedPostDAO
+from blogging.dao.post_compression import CompressedPost, TextCompression
+from blogging.dao.post_dao_log import PostDAOLog
+from blogging.dao.post_dao_mmap import PostDAOMmap
+from blogging.post import Post
+from helpers import preserve_configuration
+
+WORDS = ("journey", "mountain", "river", "coffee", "morning", "train", "city", "market", "story", "window")
+
+def article(number):
+    """A long, repetitive body as blog archives hold."""
+    generator = random.Random(number)
+    body = " ".join(generator.choice(WORDS) for _ in range(300))
+    return "Posted in Travel. Read the full story on our blog, día %d.\n%s\nShare this article." % (number, body)
+
+class PostCompressionTest(unittest.TestCase):
+    """
+    Test cases for compressing long post texts in the log and snapshot of a blog.
+    Posts read back compressed must equal those written, and records written with any setting must stay readable.
+    """
+
+    def setUp(self):
+        """Set up a temporary records folder and the compression settings."""
+        preserve_configuration(self, 'post_compression', 'post_compression_threshold', 'post_compression_level')
+        Configuration.post_compression = 'zlib'
+        Configuration.post_compression_threshold = 100
+        self.path = tempfile.mkdtemp()
+        self.blog = Blog(1111114444, "Short Journey", "short_journey", "short.journey@gmail.com")
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def open_dao(self, dao_class=PostDAOLog):
+        dao = dao_class(self.blog, autosave=True, path=self.path)
+        self.addCleanup(dao.close)
+        return dao
+
+    def disk_bytes(self):
+        return sum(os.path.getsize(os.path.join(self.path, name)) for name in os.listdir(self.path))
+
+    def write_posts(self, count=60):
+        dao = self.open_dao()
+        dao.create_posts([Post(code, "Title %d" % code, article(code)) for code in range(1, count + 1)])
+        dao.create_post(Post(count + 1, "Short", "Too short to compress"))
+        dao.update_post(2, "Title 2, revised", article(1000))
+        dao.delete_post(3)
+        dao.close()
+        return dao
+
+    def expected_posts(self, count=60):
+        posts = {code: Post(code, "Title %d" % code, article(code)) for code in range(1, count + 1)}
+        posts[2] = Post(2, "Title 2, revised", article(1000))
+        del posts[3]
+        posts[count + 1] = Post(count + 1, "Short", "Too short to compress")
+        return posts
+
+    def test_log_round_trip(self):
+        """Test posts replayed from a compressed log equal those written, long texts kept compressed until read."""
+        self.write_posts()
+        replayed = self.open_dao()
+        expected = self.expected_posts()
+        self.assertEqual(sorted(expected), sorted(replayed.posts))
+        for code, post in replayed.posts.items():
+            self.assertEqual(expected[code], post)
+        self.assertIs(CompressedPost, type(replayed.posts[1]))
+        self.assertIs(Post, type(replayed.posts[61]))
+        self.assertLess(replayed.posts[1].resident_bytes(), len(article(1)) // 2)
+
+        # a replaced text is held as is, and written compressed again
+        replayed.update_post(1, "Title 1", article(2000))
+        self.assertIs(Post, type(replayed.posts[1]))
+        replayed.close()
+        self.assertEqual(article(2000), self.open_dao().posts[1].post_text)
+
+    def test_dictionary_shared_by_the_blog(self):
+        """Test a dictionary trained on the blog's texts is kept next to its records and used by later ones."""
+        self.write_posts()
+        dictionary_file = os.path.join(self.path, "1111114444.dict")
+        self.assertTrue(os.path.exists(dictionary_file))
+        compressed = self.disk_bytes()
+        dao = self.open_dao()
+        self.assertTrue(dao.posts[2].codec.dictionary)
+        dictionary = TextCompression(dictionary_file, 'zlib').codec('zlib', True)
+        self.assertLess(len(dictionary.compress(article(5000))), len(TextCompression(dictionary_file, 'zlib')
+            .codec('zlib', False).compress(article(5000))))
+        dao.close()
+
+        shutil.rmtree(self.path)
+        os.makedirs(self.path)
+        Configuration.post_compression = None
+        self.write_posts()
+        self.assertFalse(os.path.exists(dictionary_file))
+        self.assertLess(compressed * 2, self.disk_bytes())
+
+    def test_compaction_keeps_texts_compressed(self):
+        """Test a snapshot rewrites loaded texts without decompressing them, and survives another reload."""
+        self.write_posts()
+        dao = self.open_dao()
+        data = dao.compression.reference(dao.posts[4])[4]
+        dao.compact()
+        dao.close()
+        reloaded = self.open_dao()
+        self.assertEqual(self.expected_posts()[4], reloaded.posts[4])
+        self.assertEqual(data, reloaded.compression.reference(reloaded.posts[4])[4])
+
+    def test_settings_can_change(self):
+        """Test records written with lzma, with zlib or uncompressed all load under any setting."""
+        Configuration.post_compression = 'lzma'
+        self.write_posts(10)
+        Configuration.post_compression = None
+        dao = self.open_dao()
+        self.assertIs(CompressedPost, type(dao.posts[1]))
+        dao.create_post(Post(20, "Plain", article(20)))
+        dao.close()
+        Configuration.post_compression = 'zlib'
+        dao = self.open_dao()
+        self.assertIs(Post, type(dao.posts[20]))
+        dao.compact()
+        dao.close()
+        expected = self.expected_posts(10)
+        expected[20] = Post(20, "Plain", article(20))
+        reloaded = self.open_dao()
+        self.assertEqual(sorted(expected), sorted(reloaded.posts))
+        for code, post in reloaded.posts.items():
+            self.assertEqual(expected[code], post)
+        self.assertTrue(all(type(reloaded.posts[code]) is CompressedPost for code in (1, 2, 20)))
+
+    def test_compressed_post_pickles_plain(self):
+        """Test a compressed post pickled outside its DAO carries its text."""
+        self.write_posts(10)
+        post = self.open_dao().posts[1]
+        copy = pickle.loads(pickle.dumps(post))
+        self.assertIs(Post, type(copy))
+        self.assertEqual(post, copy)
+
+    def test_indexes_keep_texts_compressed(self):
+        """Test the indexes over a compressed store read texts through its posts instead of holding them decompressed."""
+        self.write_posts(10)
+        dao = IndexedPostDAO(self.open_dao())
+        self.assertEqual([5], [post.post_code for post in dao.retrieve_posts("día 5.")])
+        self.assertEqual([2], [post.post_code for post in dao.search_posts("1000")])
+        held = [field for index in dao.indexes() for fields in index.fields.values() if fields for field in fields]
+        self.assertEqual([], held)
+        self.assertTrue(all(type(post) is CompressedPost for post in dao.list_posts() if post.post_code < 11))
+
+        # the words of replaced and deleted texts leave the postings
+        dao.update_post(4, "Renamed", "Nothing but snow " * 20)
+        dao.delete_post(5)
+        self.assertEqual([], dao.retrieve_posts("día 4."))
+        self.assertEqual([4], [post.post_code for post in dao.search_posts("snow")])
+        self.assertFalse({4, 5} & dao.get_index().postings["día"])
+        self.assertFalse({4, 5} & set(dao.get_word_index().postings["journey"]))
+        self.assertEqual([1, 2, 6, 7, 8, 9, 10], sorted(post.post_code for post in dao.search_posts("día")))
+
+    def test_mmap_texts_stay_uncompressed(self):
+        """Test the mmap DAO keeps its texts in the text file, which its searches scan."""
+        dao = self.open_dao(PostDAOMmap)
+        dao.create_posts([Post(code, "Title %d" % code, article(code)) for code in range(1, 11)])
+        dao.close()
+        reopened = self.open_dao(PostDAOMmap)
+        self.assertEqual([5], [post.post_code for post in reopened.retrieve_posts("día 5.")])
+        self.assertFalse(any(type(post) is CompressedPost for post in reopened.posts.values()))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import os
+import shutil
+import tempfile
+import unittest
+from blogging.blog import Blog
+from blogging.dao.post_dao_log import PostDAOLog
+from blogging.post import Post
+
+class PostDAOLogTest(unittest.TestCase):
+    """
+    Test cases for the append-only log persistence mode for posts.
+    Covers appending, replay, compaction and torn log tails.
+    """
+
+    def setUp(self):
+        """Set up a temporary records folder."""
+        self.path = tempfile.mkdtemp()
+        self.blog = Blog(1111114444, "Short Journey", "short_journey", "short.journey@gmail.com")
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def open_dao(self, **kwargs):
+        dao = PostDAOLog(self.blog, autosave=True, path=self.path, **kwargs)
+        self.addCleanup(dao.close)
+        return dao
+
+    def test_replay_restores_posts(self):
+        """Test that a new DAO replays creates, updates and deletes from the log."""
+        dao = self.open_dao()
+        dao.create_post(Post(1, "Starting my journey", "Once upon a time"))
+        dao.create_post(Post(2, "Second step", "A storm stroke."))
+        dao.create_post(Post(3, "Continuing my journey", "Along the way..."))
+        dao.update_post(2, "Second step, revised", "The storm passed.")
+        dao.delete_post(3)
+        dao.close()
+
+        replayed = self.open_dao()
+        self.assertEqual(replayed.counter, 3)
+        self.assertEqual(replayed.list_posts(), [Post(2, "Second step, revised", "The storm passed."),
+            Post(1, "Starting my journey", "Once upon a time")])
+
+    def test_compaction_folds_log_into_snapshot(self):
+        """Test compaction writes a snapshot and empties the log."""
+        dao = self.open_dao()
+        dao.compaction_records = 3
+        for code in range(1, 5):
+            dao.create_post(Post(code, "Title %d" % code, "Text"))
+        self.assertEqual(dao.log_records, 1)
+        self.assertTrue(os.path.exists(dao.snapshot_file))
+        dao.close()
+
+        replayed = self.open_dao()
+        self.assertEqual([post.post_code for post in replayed.list_posts()], [4, 3, 2, 1])
+        self.assertEqual(replayed.counter, 4)
+
+    def test_torn_tail_is_dropped(self):
+        """Test that a partially written record at the end of the log is ignored."""
+        dao = self.open_dao()
+        dao.create_post(Post(1, "Title", "Text"))
+        dao.close()
+        with open(dao.log_file, 'ab') as file:
+            file.write(b'\x80\x05\x95')
+
+        replayed = self.open_dao()
+        self.assertEqual(replayed.list_posts(), [Post(1, "Title", "Text")])
+        replayed.create_post(Post(2, "Title 2", "Text"))
+        replayed.close()
+        self.assertEqual(len(self.open_dao().list_posts()), 2)
+
+    def test_batch_is_one_record(self):
+        """Test a batch of posts is appended as one record and replayed."""
+        dao = self.open_dao()
+        self.assertTrue(dao.create_posts([Post(code, "Title %d" % code, "Text") for code in range(1, 4)]))
+        self.assertFalse(dao.create_posts([Post(3, "Duplicate", "Text")]))
+        dao.close()
+
+        replayed = self.open_dao()
+        self.assertEqual([post.post_code for post in replayed.list_posts()], [3, 2, 1])
+        self.assertEqual(replayed.counter, 3)
+
+    def test_iter_posts_pages_newest_first(self):
+        """Test paging through posts with a cursor, before and after a replay."""
+        dao = self.open_dao()
+        dao.create_posts([Post(code, "Title %d" % code, "Text") for code in range(1, 8)])
+        dao.delete_post(5)
+        dao.delete_post(6)
+        self.assertEqual([post.post_code for post in dao.iter_posts(limit=3)], [7, 4, 3])
+        self.assertEqual([post.post_code for post in dao.iter_posts(after=3, limit=3)], [2, 1])
+        self.assertEqual([post.post_code for post in dao.iter_posts(after=6)], [4, 3, 2, 1])
+        self.assertEqual(list(dao.iter_posts(limit=0)), [])
+        dao.close()
+
+        replayed = self.open_dao()
+        self.assertEqual([post.post_code for post in replayed.iter_posts(after=7, limit=2)], [4, 3])
+
+    def test_listings_keep_updated_posts(self):
+        """Test a listing and a page taken before an update keep the post as it was."""
+        dao = self.open_dao()
+        dao.create_posts([Post(code, "t%d" % code, "Text %d" % code) for code in range(1, 4)])
+        listing = dao.list_posts()
+        page = dao.iter_posts(limit=3)
+        dao.update_post(2, "CHANGED", "Changed text")
+        self.assertEqual(["t3", "t2", "t1"], [post.post_title for post in listing])
+        self.assertEqual(["t3", "t2", "t1"], [post.post_title for post in page])
+        self.assertEqual("Text 2", listing[1].post_text)
+        self.assertEqual(["t3", "CHANGED", "t1"], [post.post_title for post in dao.list_posts()])
+        self.assertEqual(listing[1].creation_micros, dao.search_post(2).creation_micros)
+
+    def test_no_files_without_autosave(self):
+        """Test that nothing is written when autosave is off."""
+        dao = PostDAOLog(self.blog, autosave=False, path=self.path)
+        dao.create_post(Post(1, "Title", "Text"))
+        self.assertEqual(os.listdir(self.path), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
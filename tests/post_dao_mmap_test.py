@@ -0,0 +1,91 @@
+import pickle
+import shutil
+import tempfile
+import unittest
+from blogging.blog import Blog
+from blogging.dao.post_dao_mmap import PostDAOMmap, StoredPost
+from blogging.post import Post
+
+class PostDAOMmapTest(unittest.TestCase):
+    """
+    Test cases for the memory-mapped post text storage mode.
+    Covers lazy texts, replay after reopening, searches over the mapping and stale texts.
+    """
+
+    def setUp(self):
+        """Set up a temporary records folder."""
+        self.path = tempfile.mkdtemp()
+        self.blog = Blog(1111114444, "Short Journey", "short_journey", "short.journey@gmail.com")
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def open_dao(self, autosave=True):
+        dao = PostDAOMmap(self.blog, autosave=autosave, path=self.path)
+        self.addCleanup(dao.close)
+        return dao
+
+    def test_texts_are_read_from_the_mapping(self):
+        """Test stored posts hold a location rather than their text."""
+        dao = self.open_dao()
+        dao.create_post(Post(1, "Starting my journey", "Once upon a time"))
+        post = dao.search_post(1)
+        self.assertIsInstance(post, StoredPost)
+        self.assertEqual((0, len("Once upon a time")), (post.offset, post.length))
+        self.assertEqual("Once upon a time", post.post_text)
+        self.assertEqual(Post(1, "Starting my journey", "Once upon a time"), post)
+
+    def test_replay_restores_posts(self):
+        """Test a new DAO replays creates, updates and deletes and reads texts from the file."""
+        dao = self.open_dao()
+        dao.create_post(Post(1, "Starting my journey", "Once upon a time"))
+        dao.create_posts([Post(2, "Second step", "A storm stroke. ☂"), Post(3, "Continuing my journey", "")])
+        dao.update_post(2, "Second step, revised", "The storm passed. ☀")
+        dao.delete_post(1)
+        dao.close()
+
+        replayed = self.open_dao()
+        self.assertEqual(3, replayed.counter)
+        self.assertEqual([Post(3, "Continuing my journey", ""), Post(2, "Second step, revised", "The storm passed. ☀")],
+            replayed.list_posts())
+        replayed.compact()
+        self.assertEqual([Post(3, "Continuing my journey", ""), Post(2, "Second step, revised", "The storm passed. ☀")],
+            self.open_dao().list_posts())
+
+    def test_retrieve_posts(self):
+        """Test searches match titles and texts in creation order, but not stale texts or across texts."""
+        dao = self.open_dao()
+        dao.create_posts([Post(1, "Starting my journey", "Once upon a time"),
+            Post(2, "Second step", "A storm stroke."), Post(3, "Continuing", "Along the way, a storm")])
+        dao.update_post(2, "Second step", "The sky cleared.")
+        self.assertEqual([3], [post.post_code for post in dao.retrieve_posts("storm")])
+        self.assertEqual([1, 3], [post.post_code for post in dao.retrieve_posts("journey")
+            + dao.retrieve_posts("Along")])
+        self.assertEqual([2], [post.post_code for post in dao.retrieve_posts("cleared")])
+        # "timeA" only exists across the end of post 1 and the start of post 2's stale text
+        self.assertEqual([], dao.retrieve_posts("timeA"))
+        self.assertEqual(3, len(dao.retrieve_posts("")))
+
+    def test_posts_handed_out_keep_their_text(self):
+        """Test a post read before an update keeps its text."""
+        dao = self.open_dao()
+        dao.create_post(Post(1, "Starting my journey", "Once upon a time"))
+        before = dao.search_post(1)
+        previous = dao.update_if_exists(1, "Starting my journey", "Twice upon a time")
+        self.assertEqual(("Starting my journey", "Once upon a time"), previous)
+        self.assertEqual("Once upon a time", before.post_text)
+        self.assertEqual("Twice upon a time", dao.search_post(1).post_text)
+
+    def test_text_replaced_in_memory_pickles_as_post(self):
+        """Test a stored post updated in memory keeps its new text and pickles as a plain post."""
+        dao = self.open_dao(autosave=False)
+        dao.create_post(Post(1, "Starting my journey", "Once upon a time"))
+        post = dao.search_post(1)
+        post.update("Starting my journey", "Twice upon a time")
+        self.assertEqual("Twice upon a time", post.post_text)
+        restored = pickle.loads(pickle.dumps(post))
+        self.assertIs(Post, type(restored))
+        self.assertEqual(post, restored)
+
+if __name__ == '__main__':
+    unittest.main()
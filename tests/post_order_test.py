@@ -0,0 +1,100 @@
+import random
+import unittest
+from blogging.dao import post_order
+from blogging.dao.post_order import PostOrder
+from blogging.post import Post
+
+class PostOrderTest(unittest.TestCase):
+    """
+    Test cases for the creation order of posts and the newest-first views listed from it.
+    """
+
+    def setUp(self):
+        """Set up an order of five posts."""
+        self.order = PostOrder([Post(code, "Title %d" % code, "Text %d" % code) for code in range(1, 6)])
+
+    def codes(self, posts):
+        return [post.post_code for post in posts]
+
+    def test_view_lists_newest_first(self):
+        """Test indexing, slicing and iterating a view newest first."""
+        view = self.order.newest()
+        self.assertEqual(5, len(view))
+        self.assertEqual([5, 4, 3, 2, 1], self.codes(view))
+        self.assertEqual(5, view[0].post_code)
+        self.assertEqual(1, view[-1].post_code)
+        self.assertEqual([4, 3], self.codes(view[1:3]))
+        self.assertEqual([5, 3, 1], self.codes(view[::2]))
+        self.assertEqual([], view[3:1])
+        self.assertEqual([1, 2, 3, 4, 5], self.codes(reversed(view)))
+        with self.assertRaises(IndexError):
+            view[5]
+
+    def test_view_equals_list(self):
+        """Test a view compares equal to a list of the same posts, from either side."""
+        view = self.order.newest()
+        self.assertEqual(list(view), view)
+        self.assertEqual(view, list(view))
+        self.assertNotEqual(view, list(view)[1:])
+        self.assertNotEqual(view, "not a list")
+
+    def test_view_keeps_its_posts(self):
+        """Test creating, replacing and deleting posts leaves views taken earlier untouched."""
+        view = self.order.newest()
+        self.order.append(Post(6, "Title 6", "Text 6"))
+        self.order.remove(3)
+        self.order.replace(Post(2, "Replaced", "Text"))
+        self.assertEqual([5, 4, 3, 2, 1], self.codes(view))
+        self.assertEqual("Title 2", view[3].post_title)
+        current = self.order.newest()
+        self.assertEqual([6, 5, 4, 2, 1], self.codes(current))
+        self.assertEqual("Replaced", current[3].post_title)
+
+    def test_iter_newest_pages(self):
+        """Test paging below a cursor and a deleted cursor."""
+        self.assertEqual([5, 4], self.codes(self.order.iter_newest(limit=2)))
+        self.assertEqual([3, 2], self.codes(self.order.iter_newest(4, 2)))
+        self.order.remove(4)
+        self.assertEqual([3, 2, 1], self.codes(self.order.iter_newest(4)))
+        self.assertEqual([], list(self.order.iter_newest(limit=0)))
+
+    def test_blocks_follow_a_list(self):
+        """Test views and pages across many small blocks match a plain list through creates, replaces and deletes."""
+        self.addCleanup(setattr, post_order, 'BLOCK_SIZE', post_order.BLOCK_SIZE)
+        post_order.BLOCK_SIZE = 4
+        generator = random.Random(4)
+        posts = [Post(code, "Title %d" % code, "Text") for code in range(1, 41)]
+        order = PostOrder(posts)
+        views = []
+        for step in range(400):
+            change = generator.random()
+            if change < 0.3:
+                post = Post(posts[-1].post_code + 1 if posts else step + 100, "Title", "Text")
+                posts.append(post)
+                order.append(post)
+            elif posts and change < 0.8:
+                post = posts.pop(generator.randrange(len(posts)))
+                order.remove(post.post_code)
+            elif posts:
+                position = generator.randrange(len(posts))
+                posts[position] = Post(posts[position].post_code, "Replaced %d" % step, "Text")
+                order.replace(posts[position])
+            if step % 10 == 0:
+                views.append((order.newest(), posts[::-1]))
+        self.assertLessEqual(len(order.blocks), len(posts) // 2 + 1)
+        for view, expected in views:
+            self.assertEqual(expected, view)
+            self.assertEqual([post.post_title for post in expected], [post.post_title for post in view])
+            self.assertEqual(expected[::-1], list(reversed(view)))
+            self.assertEqual(expected[:2], view[:2])
+            self.assertEqual(expected[3:11], view[3:11])
+            self.assertEqual(expected[::3], view[::3])
+            self.assertEqual([expected[index] for index in range(len(expected))], [view[index] for index in range(len(view))])
+        newest = posts[::-1]
+        for after in (None, newest[0].post_code + 1, newest[len(newest) // 2].post_code, newest[-1].post_code, 0):
+            expected = [post for post in newest if after is None or post.post_code < after]
+            self.assertEqual(expected, list(order.iter_newest(after)))
+            self.assertEqual(expected[:5], list(order.iter_newest(after, 5)))
+
+if __name__ == '__main__':
+    unittest.main()
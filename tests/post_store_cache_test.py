@@ -0,0 +1,111 @@
+import threading
+import unittest
+from blogging.blog import Blog
+from blogging.configuration import Configuration
+from blogging.post import Post
+from blogging.dao.post_store_cache import PostStoreCache, post_bytes
+from blogging.rwlock import blog_locks
+
+class PostStoreCacheTest(unittest.TestCase):
+    """
+    Test cases for the process-wide LRU cache of post stores.
+    """
+
+    def setUp(self):
+        """Use in-memory log stores so the cache can be exercised without files."""
+        self.storage = getattr(Configuration, 'post_storage', 'pickle')
+        Configuration.post_storage = 'log'
+        self.blogs = [Blog(code, "Blog %d" % code, "blog_%d" % code, "blog%d@mail.com" % code) for code in range(4)]
+
+    def tearDown(self):
+        Configuration.post_storage = self.storage
+
+    def test_hits_and_misses(self):
+        """Test stores are shared by blog id and counted as hits and misses."""
+        cache = PostStoreCache()
+        post_dao = cache.get(self.blogs[0])
+        self.assertIs(cache.get(Blog(0, "Blog 0", "blog_0", "blog0@mail.com")), post_dao)
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 1)
+
+    def test_entry_budget_evicts_least_recently_used(self):
+        """Test the entry budget evicts the least recently used store."""
+        cache = PostStoreCache(max_entries=2)
+        first = cache.get(self.blogs[0])
+        cache.get(self.blogs[1])
+        cache.get(self.blogs[0])
+        cache.get(self.blogs[2])
+        self.assertEqual(cache.stats()['evictions'], 1)
+        self.assertEqual(sorted(cache.entries), [0, 2])
+        self.assertIs(cache.get(self.blogs[0]), first)
+
+    def test_byte_budget_follows_writes(self):
+        """Test writes are charged to the byte budget and can trigger eviction."""
+        post = Post(1, "Title", "x" * 1000)
+        cache = PostStoreCache(max_bytes=2 * post_bytes(post))
+        cache.get(self.blogs[0]).create_post(post)
+        cache.charge(self.blogs[0], post_bytes(post))
+        self.assertEqual(cache.total_bytes, post_bytes(post))
+        cache.get(self.blogs[1])
+        cache.charge(self.blogs[1], 2 * post_bytes(post))
+        self.assertEqual(cache.stats()['evictions'], 1)
+        self.assertEqual(list(cache.entries), [1])
+
+    def test_invalidate(self):
+        """Test invalidated stores are reloaded on next access."""
+        cache = PostStoreCache()
+        post_dao = cache.get(self.blogs[0])
+        self.assertTrue(cache.invalidate(0))
+        self.assertFalse(cache.invalidate(0))
+        self.assertIsNot(cache.get(self.blogs[0]), post_dao)
+
+    def test_private_stores_are_counted(self):
+        """Test stores private to a Blog object count as resident while the blog lives."""
+        cache = PostStoreCache()
+        blog = self.blogs[0]
+        post_dao = cache.private_store(blog)
+        self.assertIs(cache.private_store(blog), post_dao)
+        self.assertEqual(len(cache), 1)
+        del post_dao
+        self.assertTrue(blog.release_post_store())
+        self.assertEqual(len(cache), 0)
+
+    def test_private_store_with_unsaved_posts_is_kept(self):
+        """Test releasing a private store holding posts it does not save keeps it and its posts."""
+        autosave = Configuration.autosave
+        self.addCleanup(setattr, Configuration, 'autosave', autosave)
+        Configuration.autosave = False
+        blog = self.blogs[0]
+        post = blog.create_post("Unsaved", "Kept in memory only")
+        post_dao = blog._post_dao
+        self.assertFalse(blog.release_post_store())
+        self.assertIs(post_dao, blog._post_dao)
+        self.assertEqual([post], blog.list_posts())
+        blog.delete_post(post.post_code)
+        self.assertTrue(blog.release_post_store())
+        self.assertIsNone(blog._post_dao)
+
+    def test_stores_in_use_are_not_evicted(self):
+        """Test eviction and release skip a store whose blog lock is held, and invalidation waits for it."""
+        cache = PostStoreCache(max_entries=1)
+        first = cache.get(self.blogs[0])
+        with blog_locks.get(0).write():
+            cache.get(self.blogs[1])
+            self.assertEqual([0, 1], list(cache.entries))
+            self.assertEqual(1, cache.release())
+            self.assertEqual([0], list(cache.entries))
+            invalidated = []
+            thread = threading.Thread(target=lambda: invalidated.append(cache.invalidate(0)))
+            thread.start()
+            thread.join(0.1)
+            self.assertEqual([], invalidated)
+            self.assertIs(cache.get(self.blogs[0]), first)
+        thread.join()
+        self.assertEqual([True], invalidated)
+        cache.get(self.blogs[2])
+        self.assertEqual([2], list(cache.entries))
+        self.assertEqual(1, cache.release())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -118,10 +118,12 @@ class PostTest(unittest.TestCase):
         self.assertEqual(post.creation, post.update)
 
     def test_attribute_access(self):
-        """Test that post attributes can be accessed and modified."""
+        """Test that post attributes can be accessed and modified, and that posts take no other attributes."""
         post = Post(1, "Original", "Text")
-        post.title = "Modified"
-        self.assertEqual(post.title, "Modified")
+        post.post_title = "Modified"
+        self.assertEqual(post.post_title, "Modified")
+        with self.assertRaises(AttributeError):
+            post.title = "Modified"
 
     def test_none_values(self):
         """Test post behavior with None values."""
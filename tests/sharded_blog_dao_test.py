@@ -0,0 +1,139 @@
+import gc
+import os
+import shutil
+import tempfile
+import unittest
+from blogging.blog import Blog
+from blogging.configuration import Configuration
+from blogging.controller import Controller
+from blogging.dao.sharded_blog_dao import ShardedBlogDAO, shard_of
+from helpers import configure_users_file, preserve_configuration
+
+SHARDS = 3
+
+class ShardedBlogDAOTest(unittest.TestCase):
+    """
+    Test cases for the sharded blog catalog, served by one worker process per shard.
+    Results must match the single-store DAOs, including ordering across shards and renames between them.
+    """
+
+    def setUp(self):
+        """Set up a temporary database folder."""
+        preserve_configuration(self, 'users_file', 'autosave', 'blog_storage', 'database_file', 'records_path',
+            'blog_shards')
+        self.path = tempfile.mkdtemp()
+        self.database_file = os.path.join(self.path, "blogging.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def open_dao(self):
+        dao = ShardedBlogDAO(autosave=True, database_file=self.database_file, shards=SHARDS)
+        self.addCleanup(dao.close)
+        return dao
+
+    def ids_in_distinct_shards(self, count):
+        """Blog ids that land in pairwise different shards."""
+        ids = {}
+        blog_id = 1111110000
+        while len(ids) < count:
+            ids.setdefault(shard_of(blog_id, SHARDS), blog_id)
+            blog_id += 1
+        return list(ids.values())
+
+    def test_workers_are_processes(self):
+        """Test each shard runs in its own live process."""
+        dao = self.open_dao()
+        pids = {shard.process.pid for shard in dao.shards}
+        self.assertEqual(SHARDS, len(pids))
+        self.assertNotIn(os.getpid(), pids)
+        self.assertTrue(all(shard.process.is_alive() for shard in dao.shards))
+        dao.close()
+        self.assertFalse(any(shard.process.is_alive() for shard in dao.shards))
+
+    def test_unreferenced_catalog_stops_its_workers(self):
+        """Test the workers of a catalog without autosave stop once no controller references it."""
+        Configuration.autosave = False
+        Configuration.blog_storage = 'sharded'
+        Configuration.blog_shards = SHARDS
+        Configuration.database_file = self.database_file
+        controller = Controller()
+        processes = [shard.process for shard in controller.blog_dao.shards]
+        self.assertTrue(all(process.is_alive() for process in processes))
+        del controller
+        gc.collect()
+        for process in processes:
+            process.join(10)
+        self.assertFalse(any(process.is_alive() for process in processes))
+
+    def test_listing_merges_shards_in_stored_order(self):
+        """Test list_blogs and retrieve_blogs return blogs in creation order whatever shard holds them."""
+        dao = self.open_dao()
+        ids = list(range(1111110000, 1111110020))
+        for blog_id in ids:
+            self.assertTrue(dao.create_blog(Blog(blog_id, "Journey %d" % blog_id, "journey", "journey@gmail.com")))
+        self.assertFalse(dao.create_blog(Blog(ids[0], "Duplicate", "duplicate", "duplicate@gmail.com")))
+        self.assertGreater(len({shard_of(blog_id, SHARDS) for blog_id in ids}), 1)
+        self.assertEqual(ids, [blog.id for blog in dao.list_blogs()])
+        self.assertEqual([ids[5]], [blog.id for blog in dao.retrieve_blogs("Journey 1111110005")])
+        self.assertEqual(ids[10:20], [blog.id for blog in dao.retrieve_blogs("Journey 111111001")])
+        self.assertEqual([], dao.retrieve_blogs("journey"))
+        self.assertEqual(Blog(ids[3], "Journey %d" % ids[3], "journey", "journey@gmail.com"), dao.search_blog(ids[3]))
+        self.assertTrue(dao.delete_blog(ids[3]))
+        self.assertIsNone(dao.search_blog(ids[3]))
+        self.assertFalse(dao.delete_blog(ids[3]))
+
+    def test_rename_across_shards(self):
+        """Test a rename to an id of another shard moves the blog to the end, and an update keeps its place."""
+        first, second, third = self.ids_in_distinct_shards(3)
+        dao = self.open_dao()
+        dao.create_blog(Blog(first, "First", "first", "first@gmail.com"))
+        dao.create_blog(Blog(second, "Second", "second", "second@gmail.com"))
+        self.assertTrue(dao.rename_blog(first, Blog(third, "Third", "third", "third@gmail.com")))
+        self.assertIsNone(dao.search_blog(first))
+        self.assertEqual([second, third], [blog.id for blog in dao.list_blogs()])
+
+        # taken and missing ids leave both shards unchanged
+        self.assertFalse(dao.rename_blog(third, Blog(second, "Taken", "taken", "taken@gmail.com")))
+        self.assertFalse(dao.rename_blog(first, Blog(first + 100000, "Missing", "missing", "missing@gmail.com")))
+        self.assertEqual([second, third], [blog.id for blog in dao.list_blogs()])
+
+        self.assertTrue(dao.update_blog(second, Blog(first, "First again", "first", "first@gmail.com")))
+        self.assertEqual([first, third], [blog.id for blog in dao.list_blogs()])
+
+    def test_catalog_persists(self):
+        """Test a new catalog over the same files finds the blogs and keeps appending after them."""
+        dao = self.open_dao()
+        for blog_id in range(1111110000, 1111110005):
+            dao.create_blog(Blog(blog_id, "Blog %d" % blog_id, "blog", "blog@gmail.com"))
+        dao.close()
+
+        reopened = self.open_dao()
+        reopened.create_blog(Blog(1111110005, "Blog 1111110005", "blog", "blog@gmail.com"))
+        self.assertEqual(list(range(1111110000, 1111110006)), [blog.id for blog in reopened.list_blogs()])
+
+    def test_controller_routes_to_shards(self):
+        """Test the controller works unchanged over a sharded catalog."""
+        Configuration.autosave = True
+        Configuration.blog_storage = 'sharded'
+        Configuration.blog_shards = SHARDS
+        Configuration.database_file = self.database_file
+        Configuration.records_path = self.path
+        configure_users_file(self.path)
+        first, second, third = self.ids_in_distinct_shards(3)
+
+        controller = Controller()
+        self.addCleanup(controller.blog_dao.close)
+        controller.login("user", "blogging2025")
+        controller.create_blog(first, "Short Journey", "short_journey", "short.journey@gmail.com")
+        controller.create_blog(second, "Long Journey", "long_journey", "long.journey@gmail.com")
+        self.assertTrue(controller.update_blog(first, third, "Short Trip", "short_trip", "short.trip@gmail.com"))
+        self.assertEqual([second, third], [blog.id for blog in controller.list_blogs()])
+        self.assertEqual([second], [blog.id for blog in controller.retrieve_blogs("Journey")])
+        self.assertEqual("Short Trip", controller.search_blog(third).name)
+        self.assertTrue(controller.delete_blog(second))
+        self.assertEqual([third], [blog.id for blog in controller.list_blogs()])
+        controller.logout()
+
+if __name__ == '__main__':
+    unittest.main()
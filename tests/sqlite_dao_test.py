@@ -0,0 +1,108 @@
+import os
+import shutil
+import tempfile
+import unittest
+from blogging.blog import Blog
+from blogging.post import Post
+from blogging.dao.blog_dao_sqlite import BlogDAOSQLite
+from blogging.dao.post_dao_sqlite import PostDAOSQLite
+
+class SQLiteDAOTest(unittest.TestCase):
+    """
+    Test cases for the SQLite blog and post DAOs.
+    Results must match the JSON/pickle DAOs, including ordering and case-sensitive search.
+    """
+
+    def setUp(self):
+        """Set up DAOs over a fresh in-memory database."""
+        self.blog_dao = BlogDAOSQLite(autosave=False)
+        self.blog = Blog(1111114444, "Short Journey", "short_journey", "short.journey@gmail.com")
+        self.post_dao = PostDAOSQLite(self.blog, autosave=False)
+
+    def test_create_search_blog(self):
+        """Test blogs are found by id and ids are unique."""
+        self.assertTrue(self.blog_dao.create_blog(self.blog))
+        self.assertFalse(self.blog_dao.create_blog(Blog(1111114444, "Long Journey", "long_journey", "long.journey@gmail.com")))
+        self.assertEqual(self.blog_dao.search_blog(1111114444), self.blog)
+        self.assertIsNone(self.blog_dao.search_blog(1111115555))
+
+    def test_retrieve_and_list_blogs_keep_order(self):
+        """Test blogs are retrieved and listed in the order they were stored."""
+        self.blog_dao.create_blog(self.blog)
+        self.blog_dao.create_blog(Blog(1111115555, "Long Journey", "long_journey", "long.journey@gmail.com"))
+        self.blog_dao.create_blog(Blog(1111112000, "Long Trip", "long_trip", "long.trip@gmail.com"))
+        self.assertEqual([blog.id for blog in self.blog_dao.retrieve_blogs("Journey")], [1111114444, 1111115555])
+        self.assertEqual([blog.id for blog in self.blog_dao.retrieve_blogs("journey")], [])
+        self.assertEqual([blog.id for blog in self.blog_dao.retrieve_blogs("Lo")], [1111115555, 1111112000])
+        self.assertTrue(self.blog_dao.delete_blog(1111114444))
+        self.assertEqual([blog.id for blog in self.blog_dao.list_blogs()], [1111115555, 1111112000])
+
+    def test_update_blog(self):
+        """Test updating a blog, including its id."""
+        self.blog_dao.create_blog(self.blog)
+        self.assertTrue(self.blog_dao.update_blog(1111114444, Blog(1111118888, "Cool Blog", "cool_blog", "cool.blog@gmail.com")))
+        self.assertIsNone(self.blog_dao.search_blog(1111114444))
+        self.assertEqual(self.blog_dao.retrieve_blogs("Cool")[0].id, 1111118888)
+
+    def test_delete_and_rename_blog_take_its_posts(self):
+        """Test a deleted blog's posts go with it and a renamed blog's posts follow it to its new id."""
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        database_file = os.path.join(path, "blogging.db")
+        blog_dao = BlogDAOSQLite(True, database_file)
+        blog_dao.create_blog(self.blog)
+        PostDAOSQLite(self.blog, True, database_file).create_posts([Post(1, "First", "Text"), Post(2, "Second", "Text")])
+        self.assertTrue(blog_dao.rename_blog(1111114444, Blog(1111118888, "Cool Blog", "cool_blog", "cool.blog@gmail.com")))
+        renamed = PostDAOSQLite(Blog(1111118888, "Cool Blog", "cool_blog", "cool.blog@gmail.com"), True, database_file)
+        self.assertEqual([2, 1], [post.post_code for post in renamed.list_posts()])
+        self.assertEqual(2, renamed.counter)
+
+        # a blog created under an id that was renamed away or deleted starts without posts
+        self.assertTrue(blog_dao.delete_blog(1111118888))
+        for blog_id in (1111114444, 1111118888):
+            blog = Blog(blog_id, "New Blog", "new_blog", "new.blog@gmail.com")
+            self.assertTrue(blog_dao.create_blog(blog))
+            post_dao = PostDAOSQLite(blog, True, database_file)
+            self.assertEqual([], post_dao.list_posts())
+            self.assertEqual(0, post_dao.counter)
+
+    def test_posts(self):
+        """Test creating, searching, updating, deleting and listing posts."""
+        self.assertTrue(self.post_dao.create_post(Post(1, "Starting my journey", "Once upon a time")))
+        self.assertTrue(self.post_dao.create_post(Post(2, "Second step", "Before one could think")))
+        self.assertTrue(self.post_dao.create_post(Post(3, "Continuing my journey", "Along the way")))
+        self.assertFalse(self.post_dao.create_post(Post(3, "Duplicate", "Duplicate")))
+        self.assertEqual(self.post_dao.counter, 3)
+        self.assertEqual(self.post_dao.search_post(2), Post(2, "Second step", "Before one could think"))
+        self.assertEqual([post.post_code for post in self.post_dao.retrieve_posts("journey")], [1, 3])
+        self.assertEqual([post.post_code for post in self.post_dao.retrieve_posts("Journey")], [])
+        self.assertEqual([post.post_code for post in self.post_dao.retrieve_posts("on")], [1, 2, 3])
+        self.assertTrue(self.post_dao.update_post(2, "Second journey", "A storm stroke"))
+        self.assertEqual([post.post_code for post in self.post_dao.retrieve_posts("journey")], [1, 2, 3])
+        self.assertTrue(self.post_dao.delete_post(3))
+        self.assertFalse(self.post_dao.delete_post(3))
+        self.assertEqual([post.post_code for post in self.post_dao.list_posts()], [2, 1])
+        self.assertEqual(self.post_dao.counter, 3)
+
+    def test_create_posts_batch(self):
+        """Test a batch of posts is created in one transaction, or not at all."""
+        self.assertTrue(self.post_dao.create_posts([Post(code, "Title %d" % code, "Text") for code in range(1, 4)]))
+        self.assertFalse(self.post_dao.create_posts([Post(4, "Title 4", "Text"), Post(3, "Duplicate", "Text")]))
+        self.assertEqual([post.post_code for post in self.post_dao.list_posts()], [3, 2, 1])
+        self.assertEqual(self.post_dao.counter, 3)
+
+    def test_iter_posts_pages_newest_first(self):
+        """Test paging through posts with a cursor."""
+        self.post_dao.create_posts([Post(code, "Title %d" % code, "Text") for code in range(1, 6)])
+        self.post_dao.delete_post(4)
+        self.assertEqual([post.post_code for post in self.post_dao.iter_posts(limit=2)], [5, 3])
+        self.assertEqual([post.post_code for post in self.post_dao.iter_posts(after=3)], [2, 1])
+
+    def test_search_does_not_span_title_and_text(self):
+        """Test that a term spanning the title and the text does not match."""
+        self.post_dao.create_post(Post(1, "Second step", "Before one could think"))
+        self.assertEqual(self.post_dao.retrieve_posts("stepBefore"), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from blogging.configuration import Configuration
+from blogging.controller import Controller
+from blogging.engine import BlogEngine
+from helpers import configure_users_file, preserve_configuration
+
+class StartupTest(unittest.TestCase):
+    """
+    Test cases for lazy startup: the users file, the blog catalog and the DAO modules are loaded on first use.
+    """
+
+    def setUp(self):
+        """Set up a temporary users file and blog storage."""
+        preserve_configuration(self, 'users_file', 'autosave', 'blog_storage', 'database_file', 'records_path')
+        self.path = tempfile.mkdtemp()
+        Configuration.autosave = False
+        Configuration.blog_storage = 'sqlite'
+        Configuration.database_file = os.path.join(self.path, "blogging.db")
+        Configuration.records_path = self.path
+        configure_users_file(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_construction_loads_nothing(self):
+        engine = BlogEngine()
+        controller = Controller(engine=engine)
+        self.assertIsNone(controller._users)
+        self.assertIsNone(controller._blog_dao)
+        self.assertIsNone(engine._blog_dao)
+
+        # logging in reads the users file but leaves the catalog closed
+        self.assertTrue(controller.login("user", "blogging2025"))
+        self.assertIn("user", controller._users)
+        self.assertIsNone(engine._blog_dao)
+
+        # the first blog operation opens the catalog, shared with the other sessions of the engine
+        self.assertIsNone(controller.search_blog(1111114444))
+        self.assertIsNotNone(engine._blog_dao)
+        self.assertIs(Controller(engine=engine).blog_dao, engine._blog_dao)
+        self.assertTrue(controller.logout())
+
+    def test_logout_leaves_catalog_closed(self):
+        engine = BlogEngine()
+        controller = Controller(engine=engine)
+        controller.login("user", "blogging2025")
+        self.assertTrue(controller.logout())
+        self.assertIsNone(engine._blog_dao)
+
+    def test_import_defers_dao_modules(self):
+        code = ("import sys, blogging.controller; "
+            "print(' '.join(name for name in sys.modules if name.startswith(('blogging.dao.', 'blogging.index.')) "
+            "or name in ('sqlite3', 'pickle', 'zlib', 'mmap', 'hashlib', 'concurrent.futures')))")
+        loaded = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout.split()
+        for module in ('sqlite3', 'pickle', 'zlib', 'mmap', 'concurrent.futures', 'blogging.dao.blog_dao_sqlite',
+                'blogging.dao.blog_dao_json', 'blogging.dao.post_dao_log', 'blogging.dao.post_dao_sqlite',
+                'blogging.dao.post_dao_mmap', 'blogging.dao.post_dao_pickle', 'blogging.dao.post_compression',
+                'blogging.dao.post_dao_factory', 'blogging.index.global_post_index', 'blogging.index.ngram_index',
+                'blogging.index.word_index'):
+            self.assertNotIn(module, loaded)
+
+if __name__ == '__main__':
+    unittest.main()
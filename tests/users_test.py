@@ -0,0 +1,102 @@
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+from blogging.password_verifier import CachingVerifier, ScryptVerifier, SHA256Verifier
+from blogging.user_table import UserTable, load_users
+
+class UsersTest(unittest.TestCase):
+    """
+    Test cases for the shared users table and the password verifiers.
+    """
+
+    def setUp(self):
+        """Set up a temporary users file."""
+        self.path = tempfile.mkdtemp()
+        self.users_file = os.path.join(self.path, "users.txt")
+        self.write_users("user," + SHA256Verifier().hash("blogging2025") + "\n\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def write_users(self, content, mtime_ns=None):
+        with open(self.users_file, 'w') as file:
+            file.write(content)
+        if mtime_ns is not None:
+            os.utime(self.users_file, ns=(mtime_ns, mtime_ns))
+
+    def test_table_is_shared_until_file_changes(self):
+        """Test the parsed table is reused and only reparsed after the file changes."""
+        users = load_users(self.users_file)
+        self.assertEqual(list(users), ["user"])
+        self.assertIs(load_users(self.users_file), users)
+        self.write_users("user,abc\nother,def\n", mtime_ns=10 ** 18)
+        self.assertEqual(load_users(self.users_file), {"user": "abc", "other": "def"})
+
+    def test_missing_file(self):
+        """Test a missing users file gives an empty table."""
+        self.assertEqual(UserTable(os.path.join(self.path, "missing.txt")).refresh(), {})
+
+    def test_sha256_verifier(self):
+        """Test SHA-256 verification against the users file format."""
+        verifier = SHA256Verifier()
+        stored_hash = load_users(self.users_file)["user"]
+        self.assertTrue(verifier.verify("blogging2025", stored_hash))
+        self.assertFalse(verifier.verify("123456", stored_hash))
+
+    def test_scrypt_verifier(self):
+        """Test salted scrypt hashes verify and differ between hashings."""
+        verifier = ScryptVerifier(n=2 ** 8)
+        stored_hash = verifier.hash("blogging2025")
+        self.assertNotEqual(stored_hash, verifier.hash("blogging2025"))
+        self.assertTrue(verifier.verify("blogging2025", stored_hash))
+        self.assertFalse(verifier.verify("123456", stored_hash))
+        self.assertFalse(verifier.verify("blogging2025", "not a hash"))
+
+    def test_caching_verifier(self):
+        """Test successful verifications are cached and failures are not."""
+        calls = []
+        class CountingVerifier(SHA256Verifier):
+            def verify(self, password, stored_hash):
+                calls.append(password)
+                return super().verify(password, stored_hash)
+        verifier = CachingVerifier(CountingVerifier(), size=1)
+        stored_hash = SHA256Verifier().hash("blogging2025")
+        self.assertTrue(verifier.verify("blogging2025", stored_hash))
+        self.assertTrue(verifier.verify("blogging2025", stored_hash))
+        self.assertFalse(verifier.verify("123456", stored_hash))
+        self.assertFalse(verifier.verify("123456", stored_hash))
+        self.assertEqual(calls, ["blogging2025", "123456", "123456"])
+
+    def test_caching_verifier_threads(self):
+        """Test logins on many threads reordering and evicting a small cache all succeed."""
+        verifier = CachingVerifier(SHA256Verifier(), size=2)
+        passwords = ["password %d" % number for number in range(4)]
+        hashes = [SHA256Verifier().hash(password) for password in passwords]
+        errors = []
+        def login(offset):
+            try:
+                for step in range(2000):
+                    number = (step + offset) % 4
+                    if not verifier.verify(passwords[number], hashes[number]):
+                        errors.append(number)
+            except Exception as exception:
+                errors.append(exception)
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            threads = [threading.Thread(target=login, args=(offset,)) for offset in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(switch_interval)
+        self.assertEqual([], errors)
+        self.assertLessEqual(len(verifier.verified), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+import shutil
+import tempfile
+import threading
+import unittest
+from blogging.blog import Blog
+from blogging.dao.post_store_cache import PostStoreCache
+from blogging.dao.post_dao_mmap import PostDAOMmap
+from blogging.index.word_index import WordIndex
+from blogging.rwlock import blog_locks
+
+class WordIndexTest(unittest.TestCase):
+    """
+    Test cases for the word index behind Blog.search_posts.
+    Covers every search mode, case sensitivity, BM25 ranking and the top-k limit.
+    """
+
+    def setUp(self):
+        """Set up an index with a few entries."""
+        self.index = WordIndex()
+        self.index.add(1, "Starting my journey", "Once upon a time\nThere was a kid...")
+        self.index.add(2, "Second step", "Before one could think,\nA storm stroke.")
+        self.index.add(3, "Continuing my Journey", "Along the way...\nThere were challenges on my journey.")
+
+    def test_all_words(self):
+        """Test every word must appear, in any field, in any case."""
+        self.assertEqual(self.index.search("my JOURNEY"), [3, 1])
+        self.assertEqual(self.index.search("journey kid"), [1])
+        self.assertEqual(self.index.search("journey storm"), [])
+        self.assertEqual(self.index.search("jour"), [])
+        self.assertEqual(self.index.search("..."), [])
+
+    def test_any_word(self):
+        """Test at least one word must appear, posts holding more of them ranked first."""
+        self.assertEqual(self.index.search("storm kid", 'any'), [2, 1])
+        self.assertEqual(self.index.search("kid journey", 'any')[0], 1)
+        self.assertEqual(sorted(self.index.search("kid journey", 'any')), [1, 3])
+
+    def test_phrase(self):
+        """Test words must appear in sequence within one field."""
+        self.assertEqual(self.index.search("my journey", 'phrase'), [3, 1])
+        self.assertEqual(self.index.search("journey my", 'phrase'), [])
+        self.assertEqual(self.index.search("journey once", 'phrase'), [])
+        self.assertEqual(self.index.search("A STORM stroke", 'phrase'), [2])
+
+    def test_substring(self):
+        """Test case-insensitive substrings, inside words and across them."""
+        self.assertEqual(sorted(self.index.search("OURNE", 'substring')), [1, 3])
+        self.assertEqual(self.index.search("could think", 'substring'), [2])
+        self.assertEqual(self.index.search("ourney", 'substring', case_sensitive=True), [3, 1])
+
+    def test_case_sensitive(self):
+        """Test case-sensitive searches match words as written."""
+        self.assertEqual(self.index.search("Journey", case_sensitive=True), [3])
+        self.assertEqual(self.index.search("my Journey", 'phrase', case_sensitive=True), [3])
+        self.assertEqual(self.index.search("Kid Journey", 'any', case_sensitive=True), [3])
+
+    def test_rank_and_limit(self):
+        """Test denser matches rank first, ties keep insertion order and limit keeps the best."""
+        self.index.add(4, "Notes", "journey journey journey")
+        self.index.add(5, "Notes", "journey journey journey")
+        self.assertEqual(self.index.search("journey"), [4, 5, 3, 1])
+        self.assertEqual(self.index.search("journey", limit=2), [4, 5])
+        self.assertEqual(self.index.search("journey", limit=0), [])
+
+    def test_update_and_remove(self):
+        """Test reindexing drops old words and keeps the key's position."""
+        self.index.add(1, "Restarting the trip", "Once upon a time")
+        self.assertEqual(self.index.search("journey"), [3])
+        self.assertEqual(self.index.search("trip"), [1])
+        self.assertTrue(self.index.remove(3))
+        self.assertFalse(self.index.remove(3))
+        self.assertEqual(self.index.search("journey"), [])
+        self.assertEqual(self.index.total_length, sum(self.index.lengths.values()))
+
+    def test_unknown_mode(self):
+        """Test unknown modes are rejected."""
+        with self.assertRaises(ValueError):
+            self.index.search("journey", 'fuzzy')
+
+    def test_blog_search_posts(self):
+        """Test Blog.search_posts ranks posts and leaves retrieve_posts case-sensitive."""
+        blog = Blog(1111114444, "Short Journey", "short_journey", "short.journey@gmail.com")
+        blog.create_post("Starting my journey", "Once upon a time")
+        blog.create_post("Second step", "A storm stroke on my Journey, journey after journey.")
+        self.assertEqual([post.post_code for post in blog.search_posts("journey")], [2, 1])
+        self.assertEqual([post.post_code for post in blog.search_posts("journey", limit=1)], [2])
+        self.assertEqual([post.post_code for post in blog.search_posts("my journey", 'phrase', True)], [1])
+        self.assertEqual([post.post_code for post in blog.retrieve_posts("Journey")], [2])
+        blog.delete_post(2)
+        self.assertEqual([post.post_code for post in blog.search_posts("journey")], [1])
+
+    def test_blog_search_posts_keeps_index_of_unindexed_store(self):
+        """Test a store without a word index keeps the one built by a search until the blog is written again."""
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        blog = Blog(1111114444, "Short Journey", "short_journey", "short.journey@gmail.com")
+        blog._post_dao = PostDAOMmap(blog, autosave=True, path=path)
+        self.addCleanup(blog._post_dao.close)
+        blog.create_post("Starting my journey", "Once upon a time")
+        blog.create_post("Second step", "A storm stroke on my Journey, journey after journey.")
+        self.assertEqual([post.post_code for post in blog.search_posts("journey")], [2, 1])
+        index = blog._post_dao.search_index.index
+        self.assertEqual([post.post_code for post in blog.search_posts("storm")], [2])
+        self.assertIs(index, blog._post_dao.search_index.index)
+        blog.update_post(1, "Starting my journey", "A storm at sea")
+        self.assertEqual([post.post_code for post in blog.search_posts("storm")], [1, 2])
+        self.assertIsNot(index, blog._post_dao.search_index.index)
+    def test_concurrent_searches_charge_the_index_once(self):
+        """Test readers building the index of a cached store at the same time charge its bytes to the cache once."""
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        blog = Blog(1111114444, "Short Journey", "short_journey", "short.journey@gmail.com")
+        post_dao = PostDAOMmap(blog, autosave=True, path=path)
+        self.addCleanup(post_dao.close)
+        for number in range(1, 6):
+            blog._post_dao = post_dao
+            blog.create_post("Post %d" % number, "Journey %d" % number)
+        cache = PostStoreCache(max_bytes=1 << 30)
+        cache.entries[blog.id] = [post_dao, 0]
+        # both readers list the posts before either swaps its index in
+        barrier = threading.Barrier(2)
+        list_posts = post_dao.list_posts
+        def listed():
+            barrier.wait(5)
+            return list_posts()
+        post_dao.list_posts = listed
+        lock = blog_locks.get(blog.id)
+        built = []
+        readers = [threading.Thread(target=lambda: built.append(cache.search_index(blog, post_dao, lock)))
+            for _ in range(2)]
+        for thread in readers:
+            thread.start()
+        for thread in readers:
+            thread.join()
+        self.assertIs(built[0], built[1])
+        self.assertIs(built[0], post_dao.search_index)
+        self.assertEqual(post_dao.search_index.size, cache.total_bytes)
+        self.assertEqual([5], [post.post_code for post in built[0].search("journey 5", 'phrase', False, None)])
+
+if __name__ == '__main__':
+    unittest.main()